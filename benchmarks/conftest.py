@@ -0,0 +1,68 @@
+import json
+
+import pytest
+import requests
+from requests.adapters import BaseAdapter
+
+from mistifi import MistiFi
+
+try:
+    import pytest_benchmark
+except ImportError:
+    # Nothing to run without the benchmark fixture
+    collect_ignore_glob = ['test_*.py']
+
+
+def clients_payload(n):
+    '''A client stats list like the one from /sites/:site_id/stats/clients.
+    '''
+    return [
+        {
+            'mac': f'{i:012x}', 'hostname': f'client-{i}', 'ip': f'10.0.{i // 256 % 256}.{i % 256}',
+            'ssid': 'Corp', 'wlan_id': 'be22bba7-8e22-e1cf-5185-b880816fe2cf',
+            'ap_mac': f'5c5b3500{i % 64:04x}', 'ap_id': f'00000000-0000-0000-1000-5c5b3500{i % 64:04x}',
+            'site_id': 'd0b3c6a2-0b7d-4a8e-9e6f-5b6a8f0c1d21', 'band': '5', 'channel': 36 + i % 8 * 4,
+            'proto': 'ac', 'os': 'iOS', 'manufacture': 'Apple', 'rssi': -40 - i % 40, 'snr': 30 - i % 20,
+            'tx_rate': 866.7, 'rx_rate': 650.0, 'tx_bytes': i * 1024, 'rx_bytes': i * 2048,
+            'uptime': 3600 + i, 'last_seen': 1584541391 + i, 'x': 12.5, 'y': 30.1,
+            'vlan_id': 100, 'key_mgmt': 'WPA2-PSK/CCMP', 'is_guest': False,
+        }
+        for i in range(n)
+    ]
+
+
+class LocalAdapter(BaseAdapter):
+    '''In-process transport answering every request with a canned JSON body.
+
+    Measures the client overhead around a request without any network.
+    '''
+
+    def __init__(self, body):
+        super().__init__()
+        self.body = json.dumps(body).encode()
+
+    def send(self, request, **kwargs):
+        response = requests.Response()
+        response.status_code = 200
+        response.headers['Content-Type'] = 'application/json'
+        response._content = self.body
+        response.encoding = 'utf-8'
+        response.url = request.url
+        response.request = request
+        return response
+
+    def close(self):
+        pass
+
+
+@pytest.fixture
+def make_mist():
+    '''Returns a function building a MistiFi answered by a LocalAdapter.
+    '''
+    def make(body):
+        mist = MistiFi(token='careparetoken')
+        mist.comms()
+        mist.session.mount(mist.mist_base_api_url, LocalAdapter(body))
+        return mist
+
+    return make
@@ -0,0 +1,114 @@
+'''Micro-benchmarks of the MistiFi hot paths.
+
+Run and store the results with
+
+    pytest benchmarks --benchmark-autosave
+
+and compare against the stored runs with
+
+    pytest benchmarks --benchmark-compare
+'''
+import json
+import logging
+
+import pytest
+
+from mistifi import codec
+from mistifi._log import logger, loglevel
+
+from conftest import clients_payload
+
+SITE_ID = 'd0b3c6a2-0b7d-4a8e-9e6f-5b6a8f0c1d21'
+WLAN_ID = 'be22bba7-8e22-e1cf-5185-b880816fe2cf'
+
+
+#
+## URL and params
+#
+
+def test_resource_url_uri(benchmark, make_mist):
+    mist = make_mist({})
+    benchmark(mist._resource_url, uri='/self')
+
+
+def test_resource_url_ids(benchmark, make_mist):
+    mist = make_mist({})
+    benchmark(mist._resource_url, site_id=SITE_ID, wlan_id=WLAN_ID, extra='derived')
+
+
+def test_params(benchmark, make_mist):
+    mist = make_mist({})
+    benchmark(mist._params, site_id=SITE_ID, params={'limit': 100, 'page': 2})
+
+
+#
+## Request dispatch against the in-process transport
+#
+
+def test_resource_small(benchmark, make_mist):
+    mist = make_mist({'email': 'user@mistifi.com'})
+    result = benchmark(mist.resource, 'GET', uri='/self')
+    assert result == {'email': 'user@mistifi.com'}
+
+
+@pytest.mark.parametrize('n', [1000, 10000])
+def test_resource_clients(benchmark, make_mist, n):
+    mist = make_mist(clients_payload(n))
+    result = benchmark(mist.resource, 'GET', site_id=SITE_ID, uri='stats/clients')
+    assert len(result) == n
+
+
+#
+## JSON decode
+#
+
+@pytest.mark.parametrize('n', [1000, 10000])
+def test_decode_clients(benchmark, n):
+    text = json.dumps(clients_payload(n))
+    result = benchmark(codec.loads, text)
+    assert len(result) == n
+
+
+@pytest.mark.parametrize('n', [1000, 10000])
+def test_decode_clients_fields(benchmark, n):
+    text = json.dumps(clients_payload(n))
+    result = benchmark(codec.loads, text, fields=['mac', 'ap_mac', 'rssi'])
+    assert len(result) == n
+
+
+@pytest.mark.parametrize('n', [10000])
+def test_resource_clients_fields(benchmark, make_mist, n):
+    mist = make_mist(clients_payload(n))
+    result = benchmark(mist.resource, 'GET', site_id=SITE_ID, uri='stats/clients', fields=['mac', 'rssi'])
+    assert len(result) == n
+
+
+#
+## Logging cost per call
+#
+
+def test_logging_disabled(benchmark):
+    '''A log call below the level, which is what every call pays by default.
+    '''
+    loglevel(logging.ERROR)
+
+    def log():
+        logger.info(f'Calling URL: https://api.mist.com/api/v1/sites/{SITE_ID}/stats/clients')
+
+    benchmark(log)
+
+
+def test_logging_debug(benchmark):
+    '''A log call above the level, with the output discarded.
+    '''
+    loglevel(logging.DEBUG)
+    handlers = logger.handlers[:]
+    for handler in handlers:
+        logger.removeHandler(handler)
+    logger.addHandler(logging.NullHandler())
+
+    try:
+        benchmark(logger.debug, f'kwargs in: {{"site_id": "{SITE_ID}", "uri": "stats/clients"}}')
+    finally:
+        logger.handlers[:] = handlers
+        loglevel(logging.ERROR)
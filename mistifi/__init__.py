@@ -1 +1,14 @@
-from .mistifi import MistiFi
\ No newline at end of file
+# MistiFi is imported on first access so that `import mistifi`
+# doesn't load requests and logzero until they are needed
+__all__ = ['MistiFi', 'PageError']
+
+
+def __getattr__(name):
+    if name in __all__:
+        from . import mistifi
+        return getattr(mistifi, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def __dir__():
+    return sorted(list(globals()) + __all__)
@@ -0,0 +1,36 @@
+import logging
+
+
+_logzero = None
+
+
+def _load():
+    """Imports logzero on first use and sets the default level to ERROR.
+    """
+    global _logzero
+
+    if _logzero is None:
+        import logzero
+        logzero.loglevel(logging.ERROR)
+        _logzero = logzero
+
+    return _logzero
+
+
+class _Logger:
+    """Stand-in for `logzero.logger` which imports logzero only once used.
+
+    Every attribute is looked up on the current `logzero.logger`, so it
+    follows the level set with `logzero.loglevel()` like the real one.
+    """
+    def __getattr__(self, name):
+        return getattr(_load().logger, name)
+
+
+logger = _Logger()
+
+
+def loglevel(level):
+    """Same as `logzero.loglevel()`.
+    """
+    _load().loglevel(level)
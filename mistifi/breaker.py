@@ -0,0 +1,218 @@
+import re
+import threading
+import time
+
+from collections import deque
+from urllib.parse import urlparse
+
+from ._log import logger
+
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half-open'
+
+_UUID = re.compile(r'^[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}$', re.I)
+_MAC = re.compile(r'^[0-9a-f]{12}$', re.I)
+
+
+def template(url):
+    """The endpoint template of a URL, IDs and MACs replaced.
+
+    >>> template('https://api.mist.com/api/v1/sites/4ac1dcf4-9d8b-7211-65c4-057819f0862b/stats/devices/5c5b35000001')
+    '/api/v1/sites/:id/stats/devices/:mac'
+    """
+    segments = []
+    for segment in urlparse(url).path.rstrip('/').split('/'):
+        if _UUID.match(segment):
+            segment = ':id'
+        elif _MAC.match(segment):
+            segment = ':mac'
+        segments.append(segment)
+
+    return '/'.join(segments)
+
+
+class _Circuit:
+    """State and recent outcomes of one endpoint template.
+    """
+    def __init__(self, window):
+        self.state = CLOSED
+        self.outcomes = deque(maxlen=window)
+        self.opened_at = 0.0
+        self.trials = 0
+        self.trial_successes = 0
+
+        self.calls = 0
+        self.failures = 0
+        self.rejected = 0
+        self.opened = 0
+
+
+class CircuitBreaker:
+    """Circuit breaker per endpoint template.
+
+    The outcomes of the last `window` calls of each endpoint template are
+    kept. Once at least `min_calls` of them are in and too many failed, with
+    a 5xx or an exception, or were slower than `slow_call`, the circuit
+    opens and calls to the endpoint fail fast without being sent. After
+    `open_for` seconds the circuit is half-open and lets `half_open_calls`
+    trial calls through, which close it again if they all succeed or open
+    it again on the first failure.
+
+    One breaker can be shared by several `MistiFi` instances.
+
+    Parameters
+    ----------
+    failure_rate: `float`, optional, default: 0.5
+        Fraction of failed calls which opens the circuit.
+
+    slow_call: `float`, optional, default: None
+        Calls taking longer than this many seconds count as slow. Latency
+        is not considered if not set.
+
+    slow_rate: `float`, optional, default: 0.5
+        Fraction of slow calls which opens the circuit.
+
+    window: `int`, optional, default: 20
+        Number of recent calls considered per template.
+
+    min_calls: `int`, optional, default: 10
+        Calls needed in the window before the circuit can open.
+
+    open_for: `float`, optional, default: 30
+        Seconds a circuit stays open before trial calls are let through.
+
+    half_open_calls: `int`, optional, default: 3
+        Number of successful trial calls which close the circuit.
+
+    Examples:
+    ---------
+    >>> mist = MistiFi(token="thetoken", breaker=CircuitBreaker(slow_call=5))
+    >>> mist.comms()
+    >>> mist.stats()['breaker']
+    """
+    def __init__(self, failure_rate=0.5, slow_call=None, slow_rate=0.5, window=20, min_calls=10,
+                 open_for=30, half_open_calls=3):
+
+        self.failure_rate = failure_rate
+        self.slow_call = slow_call
+        self.slow_rate = slow_rate
+        self.window = window
+        self.min_calls = min_calls
+        self.open_for = open_for
+        self.half_open_calls = half_open_calls
+
+        self.circuits = {}
+        self._lock = threading.Lock()
+
+    def _circuit(self, key):
+        circuit = self.circuits.get(key)
+        if circuit is None:
+            circuit = self.circuits[key] = _Circuit(self.window)
+        return circuit
+
+    def allow(self, key):
+        """Whether a call to the endpoint template can be sent.
+        """
+        with self._lock:
+            circuit = self._circuit(key)
+
+            if circuit.state == OPEN:
+                if time.monotonic() - circuit.opened_at < self.open_for:
+                    circuit.rejected += 1
+                    return False
+                circuit.state = HALF_OPEN
+                circuit.trials = 0
+                circuit.trial_successes = 0
+                logger.info(f'Circuit half-open for {key}')
+
+            if circuit.state == HALF_OPEN:
+                if circuit.trials >= self.half_open_calls:
+                    circuit.rejected += 1
+                    return False
+                circuit.trials += 1
+
+            return True
+
+    def cancel(self, key):
+        """Gives back the trial of a call let through by `allow()` which
+        was not sent or got no response, so a half-open circuit isn't left
+        waiting for its outcome.
+        """
+        with self._lock:
+            circuit = self.circuits.get(key)
+            if circuit is not None and circuit.state == HALF_OPEN and circuit.trials > 0:
+                circuit.trials -= 1
+
+    def record(self, key, failed, duration):
+        """Records the outcome of a call to the endpoint template.
+
+        Args
+        ----
+        key: `str`
+            The endpoint template
+        failed: `bool`
+            Whether the call failed
+        duration: `float`
+            How long the call took in seconds
+        """
+        slow = self.slow_call is not None and duration > self.slow_call
+
+        with self._lock:
+            circuit = self._circuit(key)
+            circuit.calls += 1
+            circuit.failures += failed
+
+            if circuit.state == HALF_OPEN:
+                if failed or slow:
+                    self._open(key, circuit)
+                else:
+                    circuit.trial_successes += 1
+                    if circuit.trial_successes >= self.half_open_calls:
+                        circuit.state = CLOSED
+                        circuit.outcomes.clear()
+                        logger.info(f'Circuit closed for {key}')
+                return
+
+            if circuit.state == OPEN:
+                # Sent before the circuit opened
+                return
+
+            circuit.outcomes.append((failed, slow))
+            if len(circuit.outcomes) < self.min_calls:
+                return
+
+            failures = sum(f for f, _ in circuit.outcomes) / len(circuit.outcomes)
+            slows = sum(s for _, s in circuit.outcomes) / len(circuit.outcomes)
+            if failures >= self.failure_rate or (self.slow_call is not None and slows >= self.slow_rate):
+                self._open(key, circuit)
+
+    def _open(self, key, circuit):
+        logger.error(f'Circuit open for {key}')
+        circuit.state = OPEN
+        circuit.opened_at = time.monotonic()
+        circuit.opened += 1
+        circuit.outcomes.clear()
+
+    def state(self, key):
+        """The state of the endpoint template, 'closed', 'open' or 'half-open'.
+        """
+        with self._lock:
+            circuit = self.circuits.get(key)
+            return circuit.state if circuit else CLOSED
+
+    def stats(self):
+        """State and counters per endpoint template.
+        """
+        with self._lock:
+            return {
+                key: {
+                    'state': circuit.state,
+                    'calls': circuit.calls,
+                    'failures': circuit.failures,
+                    'rejected': circuit.rejected,
+                    'opened': circuit.opened,
+                }
+                for key, circuit in self.circuits.items()
+            }
@@ -0,0 +1,130 @@
+import json
+import threading
+
+from . import projection
+
+
+class InternTable:
+    """Bounded table of strings, so repeated keys and values share one object.
+
+    Device and client lists repeat the same keys and many of the same
+    values (site IDs, models, firmware versions) thousands of times. Decoded
+    through a table each of them is kept once, which matters for anything
+    holding on to the decoded objects.
+
+    Only strings up to `max_length` are kept, and new strings are not added
+    any more once the table holds `maxsize` of them, so unique values like
+    MACs or hostnames can't grow it without limit.
+
+    Parameters
+    ----------
+    maxsize: `int`, optional, default: 100000
+        Maximum number of strings in the table.
+
+    max_length: `int`, optional, default: 64
+        Longer strings are not interned.
+    """
+    def __init__(self, maxsize=100000, max_length=64):
+
+        self.maxsize = maxsize
+        self.max_length = max_length
+
+        self.strings = {}
+
+        self._lock = threading.Lock()
+        self._decoder = None
+
+    def __len__(self):
+        return len(self.strings)
+
+    def intern(self, s):
+        """The shared copy of `s`, which becomes it if there is none yet.
+        """
+        if len(s) > self.max_length:
+            return s
+
+        shared = self.strings.get(s)
+        if shared is not None:
+            return shared
+
+        with self._lock:
+            if len(self.strings) < self.maxsize:
+                return self.strings.setdefault(s, s)
+
+        return s
+
+    def clear(self):
+        with self._lock:
+            self.strings.clear()
+
+    def decoder(self):
+        """A `json.JSONDecoder` interning the keys and string values through this table.
+        """
+        if self._decoder is None:
+            # Looked up first without the call, most strings are already there
+            get = self.strings.get
+            intern = self.intern
+
+            def pairs(items):
+                return {get(k) or intern(k): (get(v) or intern(v)) if type(v) is str else v for k, v in items}
+
+            self._decoder = json.JSONDecoder(object_pairs_hook=pairs)
+
+        return self._decoder
+
+
+# The table used when interning is asked for without one
+default_table = InternTable()
+
+
+def loads(text, fields=None, intern=None):
+    """Decodes a JSON document.
+
+    The one decoder used for everything coming from the Mist cloud, the API
+    responses as well as the webhook and streaming payloads.
+
+    Args
+    ----
+    text: `str` or `bytes`
+        The JSON document
+    fields: `list`, optional
+        Dotted paths of the fields to keep, see `mistifi.projection.loads()`
+    intern: `InternTable` or `bool`, optional
+        Intern the keys and string values through the table, `default_table`
+        if True
+
+    Returns
+    -------
+    The decoded object
+    """
+    # An empty table is falsy, through its __len__
+    if intern is None or intern is False:
+        if fields:
+            return projection.loads(text, fields)
+        return json.loads(text)
+
+    if intern is True:
+        intern = default_table
+
+    if isinstance(text, (bytes, bytearray)):
+        text = text.decode('utf-8')
+
+    decoder = intern.decoder()
+
+    if fields:
+        return projection.loads(text, fields, decoder=decoder)
+
+    return decoder.decode(text)
+
+
+# Built once, json.dumps() builds a new encoder for every call with options
+_encode = json.JSONEncoder(separators=(',', ':')).encode
+_encode_sorted = json.JSONEncoder(separators=(',', ':'), sort_keys=True).encode
+
+
+def dumps(obj, sort_keys=False):
+    """Encodes an object to a compact JSON string.
+
+    With `sort_keys` equal objects always give the same string.
+    """
+    return _encode_sorted(obj) if sort_keys else _encode(obj)
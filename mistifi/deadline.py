@@ -0,0 +1,153 @@
+import functools
+import threading
+import time
+
+from contextlib import contextmanager
+
+
+_local = threading.local()
+
+
+class Deadline:
+    """A total time budget for a call and everything it leads to.
+
+    Retries, pages and fan-out calls made while a deadline is current share
+    its budget: their timeouts are cut to the time that is left and no new
+    call is sent once it is used up.
+
+    Parameters
+    ----------
+    seconds: `float`
+        The budget, from now.
+
+    Examples:
+    ---------
+    >>> mist.resource('GET', org_id=":org_id", uri="sites", deadline=5)
+    """
+    def __init__(self, seconds):
+        self.seconds = seconds
+        self.expires = time.monotonic() + seconds
+
+    def remaining(self):
+        """Seconds left, 0 once the deadline passed.
+        """
+        return max(0.0, self.expires - time.monotonic())
+
+    def expired(self):
+        return time.monotonic() >= self.expires
+
+    def timeout(self, timeout):
+        """Cuts a requests timeout, a number or ``(connect, read)``, to the time left.
+        """
+        remaining = self.remaining()
+
+        if timeout is None:
+            return remaining
+        if isinstance(timeout, tuple):
+            return tuple(remaining if t is None else min(t, remaining) for t in timeout)
+
+        return min(timeout, remaining)
+
+    def __repr__(self):
+        return f'Deadline(remaining={self.remaining():.3f})'
+
+
+def current():
+    """The deadline of the calls made in this thread, or None.
+    """
+    return getattr(_local, 'deadline', None)
+
+
+def earliest(deadline):
+    """The earlier of `deadline` and the current one, or None if there is neither.
+
+    Args
+    ----
+    deadline: `Deadline` or `float`
+        The deadline or a budget in seconds from now
+    """
+    if deadline is not None and not isinstance(deadline, Deadline):
+        deadline = Deadline(deadline)
+
+    previous = current()
+    if deadline is None or (previous is not None and previous.expires <= deadline.expires):
+        return previous
+
+    return deadline
+
+
+@contextmanager
+def scope(deadline):
+    """Makes `deadline` current in this thread, if it is earlier than the current one.
+
+    Args
+    ----
+    deadline: `Deadline` or `float`
+        The deadline or a budget in seconds from now, None keeps the current one
+    """
+    previous = current()
+    deadline = earliest(deadline)
+
+    _local.deadline = deadline
+    try:
+        yield deadline
+    finally:
+        _local.deadline = previous
+
+
+def bind(fn):
+    """Wraps `fn` to run under the deadline current here, e.g. in a worker thread.
+    """
+    deadline = current()
+
+    @functools.wraps(fn)
+    def bound(*args, **kwargs):
+        with scope(deadline):
+            return fn(*args, **kwargs)
+
+    return bound
+
+
+_retry_class = None
+
+
+def retry(**kwargs):
+    """A urllib3 `Retry` which stops retrying when the current deadline would pass.
+
+    The backoff and ``Retry-After`` waits are cut to the time left. The
+    class is built on first use, so importing this module doesn't import
+    urllib3.
+
+    Keyword Args
+    ------------
+    Passed to `Retry`.
+    """
+    global _retry_class
+
+    if _retry_class is None:
+        from urllib3.util.retry import Retry
+
+        class DeadlineRetry(Retry):
+
+            def is_exhausted(self):
+                deadline = current()
+                if deadline is not None and deadline.remaining() <= self.get_backoff_time():
+                    return True
+                return super().is_exhausted()
+
+            def sleep(self, response=None):
+                deadline = current()
+                if deadline is None:
+                    return super().sleep(response)
+
+                wait = None
+                if self.respect_retry_after_header and response:
+                    wait = self.get_retry_after(response)
+                if wait is None:
+                    wait = self.get_backoff_time()
+
+                time.sleep(min(wait, deadline.remaining()))
+
+        _retry_class = DeadlineRetry
+
+    return _retry_class(**kwargs)
@@ -0,0 +1,194 @@
+import hashlib
+
+from ._log import logger
+
+from . import codec
+
+
+def diff(old, new, prefix=''):
+    """The fields which differ between two versions of an object.
+
+    Nested objects are compared field by field, lists as a whole.
+
+    >>> diff({'name': 'ap-1', 'radio': {'channel': 36}}, {'name': 'ap-1', 'radio': {'channel': 40}})
+    {'radio.channel': (36, 40)}
+
+    Returns
+    -------
+    A dict of dotted path to the (old, new) values, None for a side where
+    the field is missing
+    """
+    changes = {}
+    for key in old.keys() | new.keys():
+        before = old.get(key)
+        after = new.get(key)
+        if before == after and (key in old) == (key in new):
+            continue
+
+        path = f'{prefix}{key}'
+        if isinstance(before, dict) and isinstance(after, dict):
+            changes.update(diff(before, after, f'{path}.'))
+        else:
+            changes[path] = (before, after)
+
+    return changes
+
+
+class DeltaTracker:
+    """Changes between the polls of one endpoint.
+
+    Only a hash of each object of the previous poll is kept, by its key,
+    so that a new snapshot is compared in one pass over it and everything
+    unchanged is dropped. The full previous objects, needed for the field
+    level diffs, are only kept with `diffs`, as compact JSON.
+
+    The first poll reports all the objects as added.
+
+    Parameters
+    ----------
+    key: `str` or `tuple`, optional, default: 'id'
+        Field, or fields, identifying an object. Objects missing any of
+        them are skipped, and so are the repeats of a key in a snapshot.
+
+    diffs: `bool`, optional, default: False
+        Add the changed fields to the modified records and the last
+        version of the object to the removed ones.
+
+    ignore: `list`, optional
+        Top level fields left out of the comparison, e.g. counters like
+        'uptime' or 'last_seen' which change on every poll.
+
+    Examples:
+    ---------
+    >>> tracker = DeltaTracker(diffs=True, ignore=["uptime", "last_seen"])
+    >>> tracker.poll(mist, site_id=":site_id", uri="stats/devices")
+    >>> tracker.poll(mist, site_id=":site_id", uri="stats/devices")
+    [{'op': 'modified', 'id': '00000000-...', 'object': {...}, 'changes': {'status': ('connected', 'disconnected')}}]
+    """
+    def __init__(self, key='id', diffs=False, ignore=None):
+
+        self.key = key
+        self.diffs = diffs
+        self.ignore = frozenset(ignore or ())
+
+        # Key to the 16 byte digest of the object
+        self.hashes = {}
+        # Key to the compact JSON of the object, only with diffs
+        self.previous = {}
+
+    def __len__(self):
+        return len(self.hashes)
+
+    def _key(self, obj):
+        if isinstance(self.key, str):
+            return obj[self.key]
+        return tuple(obj[field] for field in self.key)
+
+    def _strip(self, obj):
+        if not self.ignore:
+            return obj
+        return {k: v for k, v in obj.items() if k not in self.ignore}
+
+    def update(self, objects):
+        """Compares a full snapshot with the previous one and keeps it for the next.
+
+        Args
+        ----
+        objects: `list`
+            All the objects currently returned by the endpoint
+
+        Returns
+        -------
+        A list of records, dicts with the `op`, one of 'added', 'removed'
+        or 'modified', the `id` and the new `object`. With `diffs` the
+        modified records have the `changes`, see `diff()`, and the removed
+        ones the last `object`. Changes only in the encoding, like 1 to 1.0,
+        are not reported with `diffs`.
+        """
+        hashes = {}
+        previous = {}
+        records = []
+
+        for obj in objects:
+            try:
+                key = self._key(obj)
+            except KeyError:
+                logger.warning(f'Object without a {self.key!r} skipped')
+                continue
+
+            if key in hashes:
+                logger.warning(f'Repeated {self.key!r} {key!r} skipped')
+                continue
+
+            text = codec.dumps(self._strip(obj), sort_keys=True)
+            digest = hashlib.blake2b(text.encode(), digest_size=16).digest()
+            hashes[key] = digest
+            if self.diffs:
+                previous[key] = text
+
+            before = self.hashes.get(key)
+            if before == digest:
+                continue
+
+            if before is None:
+                records.append({'op': 'added', 'id': key, 'object': obj})
+                continue
+
+            record = {'op': 'modified', 'id': key, 'object': obj}
+            if self.diffs:
+                record['changes'] = diff(codec.loads(self.previous[key]), self._strip(obj))
+                if not record['changes']:
+                    continue
+            records.append(record)
+
+        for key in self.hashes:
+            if key in hashes:
+                continue
+            record = {'op': 'removed', 'id': key}
+            if self.diffs:
+                record['object'] = codec.loads(self.previous[key])
+            records.append(record)
+
+        self.hashes = hashes
+        self.previous = previous
+
+        logger.debug(f'{len(records)} changes out of {len(hashes)} objects')
+
+        return records
+
+    def poll(self, mist, method='GET', **kwargs):
+        """Fetches all the pages of the endpoint and returns what changed.
+
+        Args
+        ----
+        mist: `MistiFi`
+            An instance on which `comms()` has already been called
+        method: `str`, default 'GET'
+            A valid HTTP method
+
+        Keyword Args
+        ------------
+        Same as for `MistiFi.iterate()`.
+
+        Returns
+        -------
+        The records of `update()`, or None if any page failed, in which
+        case the previous snapshot is kept
+        """
+        logger.info('Calling poll()')
+
+        from .mistifi import PageError
+
+        try:
+            objects = list(mist.iterate(method, **kwargs))
+        except PageError as e:
+            logger.error(f'Poll failed, the previous snapshot is kept: {e}')
+            return
+
+        return self.update(objects)
+
+    def clear(self):
+        """Forgets the previous snapshot, the next one is all added.
+        """
+        self.hashes = {}
+        self.previous = {}
@@ -0,0 +1,218 @@
+import bz2
+import csv
+import gzip
+import itertools
+import lzma
+
+from ._log import logger
+
+from . import codec
+
+
+# Compression by name and by file extension
+OPENERS = {
+    'gzip': gzip.open,
+    'bz2': bz2.open,
+    'xz': lzma.open,
+}
+EXTENSIONS = {
+    '.gz': 'gzip',
+    '.bz2': 'bz2',
+    '.xz': 'xz',
+}
+
+
+def _open(path, compression=None):
+    """Opens a text file for writing, compressed if asked or by its extension.
+    """
+    if compression is None:
+        compression = next((c for ext, c in EXTENSIONS.items() if str(path).endswith(ext)), None)
+
+    if compression is None:
+        return open(path, 'w', newline='', encoding='utf-8')
+
+    if compression not in OPENERS:
+        raise ValueError(f'Not a valid compression {list(OPENERS)}')
+
+    return OPENERS[compression](path, 'wt', newline='', encoding='utf-8')
+
+
+def _batches(items, batch_size):
+    """Splits an iterable into lists of at most `batch_size` items.
+    """
+    items = iter(items)
+    while True:
+        batch = list(itertools.islice(items, batch_size))
+        if not batch:
+            return
+        yield batch
+
+
+def flatten(obj, prefix=''):
+    """Flattens nested dicts into a single dict with dotted keys.
+
+    Lists are kept as they are.
+
+    >>> flatten({'a': 1, 'b': {'c': 2}})
+    {'a': 1, 'b.c': 2}
+    """
+    flat = {}
+    for k, v in obj.items():
+        key = f'{prefix}{k}'
+        if isinstance(v, dict):
+            flat.update(flatten(v, f'{key}.'))
+        else:
+            flat[key] = v
+    return flat
+
+
+def write_ndjson(items, path, batch_size=1000, compression=None):
+    """Writes the items as newline delimited JSON, one object per line.
+
+    Args
+    ----
+    items: `iterable`
+        The objects to write, e.g. from `MistiFi.iterate()`
+    path: `str`
+        The output file
+    batch_size: `int`, default 1000
+        Number of items encoded and written at a time
+    compression: `str`, optional
+        'gzip', 'bz2' or 'xz', guessed from the file extension if not set
+
+    Returns
+    -------
+    The number of items written
+    """
+    logger.info('Calling write_ndjson()')
+
+    count = 0
+    with _open(path, compression) as f:
+        for batch in _batches(items, batch_size):
+            f.write(''.join(codec.dumps(item) + '\n' for item in batch))
+            count += len(batch)
+
+    logger.debug(f'Written {count} items to {path}')
+
+    return count
+
+
+def write_csv(items, path, fields=None, batch_size=1000, compression=None):
+    """Writes the items as CSV.
+
+    Nested objects are flattened into dotted column names and lists are
+    written as JSON. Columns not in `fields` are left out, and logged if
+    the columns were taken from the first batch.
+
+    Args
+    ----
+    items: `iterable`
+        The objects to write, e.g. from `MistiFi.iterate()`
+    path: `str`
+        The output file
+    fields: `list`, optional
+        The columns, taken from the first batch if not provided
+    batch_size: `int`, default 1000
+        Number of items written at a time
+    compression: `str`, optional
+        'gzip', 'bz2' or 'xz', guessed from the file extension if not set
+
+    Returns
+    -------
+    The number of items written
+    """
+    logger.info('Calling write_csv()')
+
+    count = 0
+    # Keys first seen after the header was written
+    dropped = None
+    with _open(path, compression) as f:
+        writer = None
+        for batch in _batches(items, batch_size):
+            rows = [
+                {k: codec.dumps(v) if isinstance(v, list) else v for k, v in flatten(item).items()}
+                for item in batch
+            ]
+
+            if writer is None:
+                if fields is None:
+                    fields = list(dict.fromkeys(k for row in rows for k in row))
+                    dropped = set(fields)
+                writer = csv.DictWriter(f, fieldnames=fields, extrasaction='ignore')
+                writer.writeheader()
+            elif dropped is not None:
+                new = {k for row in rows for k in row} - dropped
+                if new:
+                    logger.error(f'Columns not in the first batch left out: {sorted(new)}')
+                    dropped |= new
+
+            writer.writerows(rows)
+            count += len(rows)
+
+    logger.debug(f'Written {count} items to {path}')
+
+    return count
+
+
+def write_parquet(items, path, fields=None, batch_size=10000, compression='snappy', schema=None):
+    """Writes the items as a Parquet file, one row group per batch.
+
+    Nested objects are flattened into dotted column names. Needs the
+    `pyarrow` package.
+
+    The file schema is inferred from the first batch unless `schema` is
+    given. A later batch which doesn't fit it, e.g. a float in an int
+    column or a value in a column which was all None, raises ValueError,
+    since the row groups already written can't be changed.
+
+    Args
+    ----
+    items: `iterable`
+        The objects to write, e.g. from `MistiFi.iterate()`
+    path: `str`
+        The output file
+    fields: `list`, optional
+        The columns, taken from the first batch if not provided
+    batch_size: `int`, default 10000
+        Number of items in a row group
+    compression: `str`, default 'snappy'
+        Any Parquet compression supported by pyarrow, or None
+    schema: `pyarrow.Schema`, optional
+        The schema of the file
+
+    Returns
+    -------
+    The number of items written
+    """
+    logger.info('Calling write_parquet()')
+
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise ImportError("write_parquet() needs 'pyarrow', install it with 'pip install pyarrow'")
+
+    from .frames import record_batches
+
+    count = 0
+    writer = None
+    try:
+        for batch in record_batches(items, fields, batch_size, schema):
+            if writer is None:
+                writer = pq.ParquetWriter(path, batch.schema, compression=compression)
+            elif batch.schema != writer.schema:
+                try:
+                    batch = batch.cast(writer.schema)
+                except (pa.ArrowInvalid, pa.ArrowNotImplementedError) as e:
+                    raise ValueError(f'Batch {count // batch_size + 1} does not fit the schema of the '
+                                     f'first one, pass the schema: {e}') from e
+
+            writer.write_batch(batch)
+            count += batch.num_rows
+    finally:
+        if writer is not None:
+            writer.close()
+
+    logger.debug(f'Written {count} items to {path}')
+
+    return count
@@ -0,0 +1,174 @@
+import itertools
+
+from ._log import logger
+
+from .export import flatten
+
+
+def _getter(path):
+    """Returns a function getting the value at a dotted path, or None.
+    """
+    keys = path.split('.')
+
+    if len(keys) == 1:
+        key = keys[0]
+        return lambda obj: obj.get(key)
+
+    def get(obj):
+        for key in keys:
+            if not isinstance(obj, dict):
+                return None
+            obj = obj.get(key)
+        return obj
+
+    return get
+
+
+def columns(items, fields=None, batch_size=10000):
+    """Builds column lists directly from the items, a batch at a time.
+
+    Only the values of the requested fields are read, nothing is copied
+    into per row dicts.
+
+    Args
+    ----
+    items: `iterable`
+        The objects, e.g. from `MistiFi.iterate()` or a `resource()` list
+    fields: `list`, optional
+        Dotted paths of the columns, e.g. ['mac', 'wlan.ssid']. Taken from
+        the first batch if not provided.
+    batch_size: `int`, default 10000
+        Number of items per batch
+
+    Yields
+    ------
+    A dict of field name to list of values per batch
+    """
+    items = iter(items)
+    getters = None
+
+    while True:
+        batch = list(itertools.islice(items, batch_size))
+        if not batch:
+            return
+
+        if getters is None:
+            if fields is None:
+                fields = list(dict.fromkeys(k for item in batch for k in flatten(item)))
+            getters = [(field, _getter(field)) for field in fields]
+
+        yield {field: [get(item) for item in batch] for field, get in getters}
+
+
+def record_batches(items, fields=None, batch_size=10000, schema=None):
+    """Builds Arrow record batches from the items.
+
+    Without a `schema` the types are inferred per batch and promoted
+    across the batches: a column which was all None gets the type of its
+    first values and ints become floats once a float shows up. A batch has
+    the schema of all the batches so far, so the later ones may be wider
+    than the first ones. Needs `pyarrow`.
+
+    Args
+    ----
+    schema: `pyarrow.Schema`, optional
+        The schema of all the batches. Values which don't fit it, e.g. a
+        float in an int column, raise `pyarrow.ArrowInvalid`.
+
+    Yields
+    ------
+    A `pyarrow.RecordBatch` per batch of items
+    """
+    try:
+        import pyarrow as pa
+    except ImportError:
+        raise ImportError("Arrow conversion needs 'pyarrow', install it with 'pip install pyarrow'")
+
+    if schema is not None and fields is None:
+        fields = schema.names
+
+    promoted = None
+    for cols in columns(items, fields, batch_size):
+        # Inferred first, building with a schema would truncate floats
+        batch = pa.RecordBatch.from_pydict(cols)
+
+        if schema is not None:
+            yield batch.cast(schema)
+            continue
+
+        if promoted is None:
+            promoted = batch.schema
+        else:
+            promoted = pa.unify_schemas([promoted, batch.schema], promote_options='permissive')
+        yield batch.cast(promoted)
+
+
+def to_arrow(items, fields=None, batch_size=10000, schema=None):
+    """Converts the items of a list endpoint to a `pyarrow.Table`.
+
+    Args
+    ----
+    items: `iterable`
+        The objects, e.g. from `MistiFi.iterate()` or a `resource()` list
+    fields: `list`, optional
+        Dotted paths of the columns to keep, all of them if not provided
+    batch_size: `int`, default 10000
+        Number of items converted at a time
+    schema: `pyarrow.Schema`, optional
+        The schema of the table, inferred from all the items if not set
+
+    Returns
+    -------
+    The table, with dotted column names for nested fields
+
+    Examples:
+    ---------
+    >>> clients = mist.iterate(org_id=":org_id", uri="clients/search", limit=1000)
+    >>> table = to_arrow(clients, fields=["mac", "site_id", "rssi"])
+    """
+    logger.info('Calling to_arrow()')
+
+    import pyarrow as pa
+
+    batches = list(record_batches(items, fields, batch_size, schema))
+    if not batches:
+        if schema is not None:
+            return schema.empty_table()
+        return pa.table({field: [] for field in fields or []})
+
+    # The last batch has the schema promoted over all of them
+    schema = batches[-1].schema
+    return pa.Table.from_batches([batch.cast(schema) for batch in batches], schema=schema)
+
+
+def to_pandas(items, fields=None, batch_size=10000):
+    """Converts the items of a list endpoint to a `pandas.DataFrame`.
+
+    Goes through Arrow if `pyarrow` is installed, otherwise the frame is
+    built from the column lists.
+
+    Args
+    ----
+    Same as for `to_arrow()`
+
+    Returns
+    -------
+    The data frame, with dotted column names for nested fields
+    """
+    logger.info('Calling to_pandas()')
+
+    try:
+        import pyarrow
+    except ImportError:
+        pass
+    else:
+        return to_arrow(items, fields, batch_size).to_pandas()
+
+    import pandas as pd
+
+    merged = {}
+    for cols in columns(items, fields, batch_size):
+        for field, values in cols.items():
+            merged.setdefault(field, []).extend(values)
+
+    return pd.DataFrame(merged, columns=fields)
@@ -0,0 +1,234 @@
+import threading
+import time
+
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from ._log import logger
+
+
+class LatencyTracker:
+    """Recent call latencies per endpoint template.
+
+    Parameters
+    ----------
+    window: `int`, optional, default: 200
+        Number of recent latencies kept per template.
+
+    min_samples: `int`, optional, default: 20
+        Latencies needed before a percentile is given.
+    """
+    def __init__(self, window=200, min_samples=20):
+
+        self.window = window
+        self.min_samples = min_samples
+
+        self.latencies = {}
+        self._lock = threading.Lock()
+
+    def add(self, key, seconds):
+        with self._lock:
+            latencies = self.latencies.get(key)
+            if latencies is None:
+                latencies = self.latencies[key] = deque(maxlen=self.window)
+            latencies.append(seconds)
+
+    def percentile(self, key, p):
+        """The `p` percentile of the template in seconds, or None if there are too few samples.
+        """
+        with self._lock:
+            latencies = sorted(self.latencies.get(key, ()))
+
+        if len(latencies) < self.min_samples:
+            return None
+
+        return latencies[min(len(latencies) - 1, int(p / 100 * len(latencies)))]
+
+
+class Hedger:
+    """Hedged GETs, to cut the tail latency of interactive lookups.
+
+    If a GET hasn't been answered after the `percentile` latency of its
+    endpoint template, a second identical request is sent and whichever
+    answers first is used. The other one is left to finish and dropped.
+
+    Hedges are limited by a budget: every call earns `budget` of a hedge,
+    up to `burst` saved, so at most about ``budget * calls`` extra requests
+    are sent.
+
+    Parameters
+    ----------
+    percentile: `float`, optional, default: 95
+        Latency percentile of the template after which a hedge is sent.
+
+    budget: `float`, optional, default: 0.05
+        Extra requests allowed as a fraction of the calls.
+
+    burst: `float`, optional, default: 10
+        Maximum number of hedges saved up.
+
+    min_delay: `float`, optional, default: 0.01
+        Hedges are never sent sooner than this many seconds.
+
+    default_delay: `float`, optional, default: None
+        Delay used until enough latencies were seen for a template. Calls
+        aren't hedged before that if not set.
+
+    max_workers: `int`, optional, default: 16
+        Maximum number of hedgeable calls in flight, and separately of
+        hedges. Calls beyond that are made by the caller without a hedge,
+        and hedges never wait behind the slow calls they are hedging.
+
+    Examples:
+    ---------
+    >>> mist = MistiFi(token="thetoken", hedger=Hedger(percentile=95, budget=0.05))
+    >>> mist.comms()
+    >>> mist.stats()['hedge']
+    """
+    def __init__(self, percentile=95, budget=0.05, burst=10, min_delay=0.01, default_delay=None,
+                 max_workers=16, window=200, min_samples=20):
+
+        self.percentile = percentile
+        self.budget = budget
+        self.burst = burst
+        self.min_delay = min_delay
+        self.default_delay = default_delay
+
+        self.tracker = LatencyTracker(window=window, min_samples=min_samples)
+        self.counters = {'calls': 0, 'hedged': 0, 'hedge_wins': 0, 'denied': 0, 'no_slot': 0, 'busy': 0}
+
+        self._tokens = float(burst)
+        self._lock = threading.Lock()
+
+        # The primary requests only go to a worker which is free, so that
+        # they never queue, and the hedges have their own
+        self._workers = threading.BoundedSemaphore(max_workers)
+        self._primaries = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='mistifi-primary')
+        self._hedges = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='mistifi-hedge')
+
+    def delay(self, key):
+        """Seconds after which a call to the template is hedged, or None.
+        """
+        threshold = self.tracker.percentile(key, self.percentile)
+        if threshold is None:
+            threshold = self.default_delay
+        if threshold is None:
+            return None
+
+        return max(threshold, self.min_delay)
+
+    def _take_hedge(self):
+        with self._lock:
+            if self._tokens < 1:
+                self.counters['denied'] += 1
+                return False
+            self._tokens -= 1
+            self.counters['hedged'] += 1
+            return True
+
+    def _timed(self, key, request, started=None):
+        if started is not None:
+            started.set()
+        start = time.perf_counter()
+        response = request()
+        self.tracker.add(key, time.perf_counter() - start)
+        return response
+
+    def send(self, key, request, acquire=None, release=None):
+        """Makes the request, hedged if it is slow.
+
+        Args
+        ----
+        key: `str`
+            The endpoint template
+        request: `callable`
+            Makes the request and returns the response, called once or twice
+        acquire: `callable`, optional
+            Takes a slot for the hedge, e.g. of a scheduler, returning False
+            if there is none free. The hedge isn't sent without one.
+        release: `callable`, optional
+            Frees the slot of the hedge once it is done
+
+        Returns
+        -------
+        The first response, or the exception of the request is raised if
+        both failed
+        """
+        with self._lock:
+            self.counters['calls'] += 1
+            self._tokens = min(self.burst, self._tokens + self.budget)
+
+        delay = self.delay(key)
+        if delay is None:
+            return self._timed(key, request)
+
+        if not self._workers.acquire(blocking=False):
+            with self._lock:
+                self.counters['busy'] += 1
+            return self._timed(key, request)
+
+        # The delay runs from when the request is sent, not from when it
+        # was handed to the worker
+        started = threading.Event()
+        primary = self._primaries.submit(self._timed, key, request, started)
+        primary.add_done_callback(lambda _: self._workers.release())
+        started.wait()
+
+        done, _ = wait([primary], timeout=delay)
+        if done:
+            return primary.result()
+
+        if acquire is not None and not acquire():
+            with self._lock:
+                self.counters['no_slot'] += 1
+            return primary.result()
+
+        if not self._take_hedge():
+            if release is not None:
+                release()
+            return primary.result()
+
+        logger.debug(f'Hedging {key} after {delay:.3f}s')
+        hedge = self._hedges.submit(self._timed, key, request)
+        if release is not None:
+            hedge.add_done_callback(lambda _: release())
+
+        pending = {primary, hedge}
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            # A success wins over a failure finished at the same time
+            for future in sorted(done, key=lambda f: f.exception() is not None):
+                if future.exception() is not None and pending:
+                    continue
+
+                for loser in pending:
+                    loser.add_done_callback(_close)
+
+                if future is hedge and future.exception() is None:
+                    with self._lock:
+                        self.counters['hedge_wins'] += 1
+
+                return future.result()
+
+    def stats(self):
+        """Hedge counters and the current hedge delay per endpoint template.
+        """
+        with self._lock:
+            stats = dict(self.counters)
+
+        stats['delays'] = {key: self.delay(key) for key in list(self.tracker.latencies)}
+
+        return stats
+
+    def close(self):
+        """Stops the request threads once the requests in flight are done.
+        """
+        self._primaries.shutdown(wait=False)
+        self._hedges.shutdown(wait=False)
+
+
+def _close(future):
+    """Releases the connection of a response nobody waits for.
+    """
+    if future.exception() is None and hasattr(future.result(), 'close'):
+        future.result().close()
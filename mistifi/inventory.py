@@ -0,0 +1,228 @@
+import threading
+
+from ._log import logger
+
+
+def _mac(value):
+    """Normalises a MAC address to the Mist format, e.g. '5c5b35000001'.
+    """
+    return ''.join(c for c in value.lower() if c in '0123456789abcdef')
+
+
+class Inventory:
+    """In-memory index of an organization's sites, devices and WLANs.
+
+    Loaded from the org list endpoints and the WLANs of every site and
+    kept in dicts, so resolving a
+    name, MAC or serial to an ID is a single lookup instead of listing and
+    scanning all the sites on every call. Attached to a `MistiFi` instance
+    it also resolves ``site_name`` and ``wlan_name`` kwargs of `resource()`.
+
+    Parameters
+    ----------
+    mist: `MistiFi`
+        An instance on which `comms()` has already been called.
+
+    org_id: `str`
+        The Organization ID to index.
+
+    Examples:
+    ---------
+    >>> inventory = Inventory(mist, org_id=":org_id")
+    >>> inventory.load()
+    >>> inventory.start(interval=300)
+    >>> mist.inventory = inventory
+    >>> mist.resource("GET", site_name="LON-DC1", uri="devices")
+    """
+    def __init__(self, mist, org_id):
+
+        self.mist = mist
+        self.org_id = org_id
+
+        # All indexes live in one dict which is replaced as a whole
+        # on every load, so readers never see a half built index
+        self._index = self._build([], [], [])
+
+        self._stop = threading.Event()
+        self._thread = None
+
+    def load(self):
+        """Fetches the sites, devices and WLANs and rebuilds the indexes.
+
+        The WLANs are the derived ones of every site, which include the org
+        level WLANs applied to it, so that a site's WLANs resolve by SSID.
+
+        Returns
+        -------
+        True if the indexes were rebuilt, False if any of the lists could
+        not be fetched, in which case the previous indexes are kept.
+        """
+        logger.info('Calling load()')
+
+        from .mistifi import PageError
+
+        try:
+            sites = list(self.mist.iterate('GET', org_id=self.org_id, uri='sites'))
+            devices = list(self.mist.iterate('GET', org_id=self.org_id, uri='inventory'))
+            wlans = [
+                (site['id'], wlan)
+                for site in sites
+                for wlan in self.mist.iterate('GET', site_id=site['id'], uri='wlans/derived')
+            ]
+        except PageError as e:
+            logger.error(f'Inventory not refreshed, keeping the previous one: {e}')
+            return False
+
+        self._index = self._build(sites, devices, wlans)
+
+        logger.debug(f'Indexed {len(sites)} sites, {len(devices)} devices and {len(wlans)} site WLANs')
+
+        return True
+
+    @staticmethod
+    def _build(sites, devices, wlans):
+        """Builds the lookup dicts.
+
+        The WLANs are (site_id, wlan) tuples, by the site they were listed for.
+        """
+        index = {
+            'sites': {},
+            'site_names': {},
+            'devices': {},
+            'device_names': {},
+            'device_macs': {},
+            'device_serials': {},
+            'wlans': {},
+            'wlan_ssids': {},
+            'site_wlans': {},
+        }
+
+        for site in sites:
+            index['sites'][site['id']] = site
+            index['site_names'][site.get('name')] = site
+
+        for device in devices:
+            index['devices'][device['id']] = device
+            if device.get('name'):
+                index['device_names'][device['name']] = device
+            if device.get('mac'):
+                index['device_macs'][_mac(device['mac'])] = device
+            if device.get('serial'):
+                index['device_serials'][device['serial']] = device
+
+        for site_id, wlan in wlans:
+            # Org level WLANs are listed once for every site they are on
+            if wlan['id'] not in index['wlans']:
+                index['wlans'][wlan['id']] = wlan
+                index['wlan_ssids'].setdefault(wlan.get('ssid'), []).append(wlan)
+
+            # A site's own WLAN wins over an org level one with the same SSID
+            key = (site_id, wlan.get('ssid'))
+            if key not in index['site_wlans'] or wlan.get('site_id') == site_id:
+                index['site_wlans'][key] = wlan
+
+        return index
+
+    def start(self, interval=300):
+        """Starts refreshing the indexes in a background thread.
+
+        Args
+        ----
+        interval: `int`, default 300
+            Seconds between refreshes
+        """
+        logger.info('Calling start()')
+
+        if self._thread is not None and self._thread.is_alive():
+            return
+
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, args=(interval,), daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Stops the background refresh.
+        """
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _run(self, interval):
+        while not self._stop.wait(interval):
+            try:
+                self.load()
+            except Exception:
+                logger.exception('Inventory refresh failed')
+
+    #
+    ## Lookups
+    #
+
+    def site(self, key):
+        """Returns the site with the given ID or name, or None.
+        """
+        index = self._index
+        return index['sites'].get(key) or index['site_names'].get(key)
+
+    def device(self, key):
+        """Returns the device with the given ID, MAC, serial or name, or None.
+        """
+        index = self._index
+        return (
+            index['devices'].get(key)
+            or index['device_serials'].get(key)
+            or index['device_names'].get(key)
+            or index['device_macs'].get(_mac(key))
+        )
+
+    def wlan(self, key, site_id=None):
+        """Returns the WLAN with the given ID or SSID, or None.
+
+        Args
+        ----
+        key: `str`
+            The WLAN ID or the SSID
+        site_id: `str`, optional
+            Picks the WLAN with the SSID which is on the site, its own or
+            an org level one
+        """
+        index = self._index
+
+        if key in index['wlans']:
+            return index['wlans'][key]
+
+        if site_id is not None:
+            return index['site_wlans'].get((site_id, key))
+
+        candidates = index['wlan_ssids'].get(key)
+        return candidates[0] if candidates else None
+
+    def resolve(self, **kwargs):
+        """Replaces ``site_name`` and ``wlan_name`` kwargs with their IDs.
+
+        Keyword Args
+        ------------
+        The `resource()` kwargs
+
+        Returns
+        -------
+        The kwargs with ``site_id`` and ``wlan_id`` set instead
+
+        Raises
+        ------
+        KeyError if a name is not in the inventory
+        """
+        if 'site_name' in kwargs:
+            site = self.site(kwargs.pop('site_name'))
+            if site is None:
+                raise KeyError('site_name')
+            kwargs['site_id'] = site['id']
+
+        if 'wlan_name' in kwargs:
+            wlan = self.wlan(kwargs.pop('wlan_name'), site_id=kwargs.get('site_id'))
+            if wlan is None:
+                raise KeyError('wlan_name')
+            kwargs['wlan_id'] = wlan['id']
+
+        return kwargs
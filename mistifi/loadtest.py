@@ -0,0 +1,396 @@
+import argparse
+import itertools
+import math
+import os
+import sys
+import threading
+import time
+
+from concurrent.futures import ThreadPoolExecutor
+
+from ._log import logger
+
+
+MODES = ('sync', 'threaded')
+
+
+class LatencyHistogram:
+    """Log-bucketed latency histogram.
+
+    Memory stays the same however long the run is, so a soak test doesn't
+    measure its own growth. Buckets are 5% wide, which is also the
+    precision of the percentiles.
+    """
+    # Buckets per factor of e
+    SCALE = 20
+
+    def __init__(self):
+        self.buckets = {}
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self._lock = threading.Lock()
+
+    def add(self, seconds):
+        bucket = int(math.log(max(seconds, 1e-6) * 1e6) * self.SCALE)
+        with self._lock:
+            self.buckets[bucket] = self.buckets.get(bucket, 0) + 1
+            self.count += 1
+            self.total += seconds
+            if seconds > self.max:
+                self.max = seconds
+
+    def percentile(self, p):
+        """The `p` percentile in seconds, or None if nothing was recorded.
+        """
+        if not self.count:
+            return None
+
+        rank = p / 100 * self.count
+        seen = 0
+        for bucket in sorted(self.buckets):
+            seen += self.buckets[bucket]
+            if seen >= rank:
+                # Upper bound of the bucket, but never above the maximum
+                return min(math.exp((bucket + 1) / self.SCALE) / 1e6, self.max)
+
+        return self.max
+
+
+def rss():
+    """Resident set size of this process in bytes, or None if unknown.
+    """
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError):
+        pass
+
+    try:
+        import resource
+    except ImportError:
+        return None
+
+    # Peak RSS, in KB on Linux and in bytes on macOS
+    maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return maxrss if sys.platform == 'darwin' else maxrss * 1024
+
+
+def open_sockets():
+    """Number of sockets this process has open, or None if unknown.
+    """
+    try:
+        fds = os.listdir('/proc/self/fd')
+    except OSError:
+        return None
+
+    count = 0
+    for fd in fds:
+        try:
+            if os.readlink(f'/proc/self/fd/{fd}').startswith('socket:'):
+                count += 1
+        except OSError:
+            # Closed since it was listed
+            pass
+
+    return count
+
+
+class LoadTest:
+    """Load and soak test harness for `MistiFi.resource()`.
+
+    Runs a workload of `resource()` calls at a fixed concurrency, for a
+    duration or a number of calls, and reports the throughput, latency
+    percentiles and error rate. The RSS and the number of open sockets
+    are sampled during the run to spot leaks in long soak tests.
+
+    A call returning None is counted as an error. The connection pool of
+    the instance is grown to the concurrency, otherwise the calls above the
+    pool size would measure opening and closing connections.
+
+    Parameters
+    ----------
+    mist: `MistiFi`
+        An instance on which `comms()` has already been called.
+
+    calls: `list`
+        The workload, dicts of `resource()` kwargs which are called in turn,
+        e.g. ``{'method': 'GET', 'org_id': ':org_id', 'uri': 'sites'}``.
+
+    concurrency: `int`, optional, default: 8
+        Number of calls in flight at the same time. Always 1 for 'sync'.
+
+    mode: `str`, optional, default: 'threaded'
+        'sync' calls from the calling thread and 'threaded' from a pool of
+        threads.
+
+    sample_interval: `float`, optional, default: 10
+        Seconds between the RSS and socket samples.
+
+    Examples:
+    ---------
+    >>> test = LoadTest(mist, [{'org_id': ':org_id', 'uri': 'sites'}], concurrency=16)
+    >>> report = test.run(duration=60)
+    >>> print(format_report(report))
+    """
+    def __init__(self, mist, calls, concurrency=8, mode='threaded', sample_interval=10):
+
+        if mode not in MODES:
+            raise ValueError(f'Not a valid mode {MODES}')
+        if not calls:
+            raise ValueError('The workload needs at least one call')
+
+        self.mist = mist
+        self.calls = [dict(call) for call in calls]
+        self.concurrency = 1 if mode == 'sync' else concurrency
+        self.mode = mode
+        self.sample_interval = sample_interval
+
+        self._lock = threading.Lock()
+
+    def run(self, duration=None, total=None):
+        """Runs the workload until `duration` seconds passed or `total` calls were made.
+
+        Args
+        ----
+        duration: `float`, optional
+            Length of the run in seconds
+        total: `int`, optional
+            Number of calls to make
+
+        Returns
+        -------
+        A report dict, see `format_report()`
+        """
+        logger.info('Calling run()')
+
+        if duration is None and total is None:
+            raise ValueError('Set the duration or the total number of calls')
+
+        self.latency = LatencyHistogram()
+        self.errors = 0
+        self.samples = []
+
+        self._calls = itertools.cycle(self.calls)
+        self._left = total
+        self._until = None if duration is None else time.monotonic() + duration
+
+        replaced = self._size_pool()
+
+        self._stop_sampling = threading.Event()
+        self._start = time.monotonic()
+        self._sample()
+        sampler = threading.Thread(target=self._sampler, daemon=True)
+        sampler.start()
+
+        try:
+            if self.mode == 'sync':
+                self._worker()
+            else:
+                with ThreadPoolExecutor(max_workers=self.concurrency) as executor:
+                    for future in [executor.submit(self._worker) for _ in range(self.concurrency)]:
+                        future.result()
+        finally:
+            elapsed = time.monotonic() - self._start
+            self._stop_sampling.set()
+            sampler.join()
+            self._sample()
+
+            if replaced is not None:
+                self._restore_pool(replaced)
+
+        return self._report(elapsed)
+
+    def _size_pool(self):
+        """Mounts an adapter with a connection per concurrent call if the current one has fewer.
+
+        A shared transport is left as it is, it is what is being measured.
+
+        Returns
+        -------
+        The adapter which was replaced, to be mounted again after the run,
+        or None
+        """
+        from requests.adapters import HTTPAdapter
+
+        url = self.mist.mist_base_api_url
+        adapter = self.mist.session.get_adapter(url)
+        if getattr(adapter, '_pool_maxsize', 0) >= self.concurrency:
+            return
+
+        if self.mist.shared_transport:
+            logger.error(f'The shared transport keeps {adapter._pool_maxsize} connections, '
+                         f'calls beyond that wait for one at a concurrency of {self.concurrency}')
+            return
+
+        logger.debug(f'Connection pool grown to {self.concurrency} for the run')
+        self.mist.session.mount(url, HTTPAdapter(max_retries=adapter.max_retries, pool_maxsize=self.concurrency))
+
+        return adapter
+
+    def _restore_pool(self, adapter):
+        """Mounts the adapter of the instance again, closing the one of the run.
+        """
+        url = self.mist.mist_base_api_url
+        grown = self.mist.session.get_adapter(url)
+        self.mist.session.mount(url, adapter)
+        grown.close()
+
+    def _next(self):
+        """The kwargs of the next call, or None when the run is over.
+        """
+        with self._lock:
+            if self._until is not None and time.monotonic() >= self._until:
+                return None
+            if self._left is not None:
+                if self._left <= 0:
+                    return None
+                self._left -= 1
+            return next(self._calls)
+
+    def _call(self, call):
+        kwargs = dict(call)
+        method = kwargs.pop('method', 'GET')
+
+        start = time.perf_counter()
+        try:
+            jresp = self.mist.resource(method, **kwargs)
+        except Exception:
+            logger.exception('Call raised')
+            jresp = None
+        self.latency.add(time.perf_counter() - start)
+
+        if jresp is None:
+            with self._lock:
+                self.errors += 1
+
+    def _worker(self):
+        while True:
+            call = self._next()
+            if call is None:
+                return
+            self._call(call)
+
+    def _sampler(self):
+        while not self._stop_sampling.wait(self.sample_interval):
+            self._sample()
+
+    def _sample(self):
+        self.samples.append({
+            'elapsed': time.monotonic() - self._start,
+            'calls': self.latency.count,
+            'rss': rss(),
+            'sockets': open_sockets(),
+        })
+
+    def _report(self, elapsed):
+        calls = self.latency.count
+        first, last = self.samples[0], self.samples[-1]
+
+        rss_values = [s['rss'] for s in self.samples if s['rss'] is not None]
+        sockets = [s['sockets'] for s in self.samples if s['sockets'] is not None]
+
+        return {
+            'mode': self.mode,
+            'concurrency': self.concurrency,
+            'duration': elapsed,
+            'calls': calls,
+            'errors': self.errors,
+            'error_rate': self.errors / calls if calls else 0.0,
+            'throughput': calls / elapsed if elapsed else 0.0,
+            'latency': {
+                'mean': self.latency.total / calls if calls else None,
+                'p50': self.latency.percentile(50),
+                'p90': self.latency.percentile(90),
+                'p99': self.latency.percentile(99),
+                'max': self.latency.max if calls else None,
+            },
+            'rss_start': first['rss'],
+            'rss_end': last['rss'],
+            'rss_max': max(rss_values) if rss_values else None,
+            'rss_growth': last['rss'] - first['rss'] if None not in (first['rss'], last['rss']) else None,
+            'sockets_start': first['sockets'],
+            'sockets_end': last['sockets'],
+            'sockets_max': max(sockets) if sockets else None,
+            'samples': self.samples,
+        }
+
+
+def format_report(report):
+    """Formats a `LoadTest.run()` report as text.
+    """
+    def ms(seconds):
+        return '-' if seconds is None else f'{seconds * 1000:.1f}ms'
+
+    def mb(size):
+        return '-' if size is None else f'{size / 2 ** 20:.1f}MB'
+
+    latency = report['latency']
+    lines = [
+        f"Mode:        {report['mode']} x{report['concurrency']}",
+        f"Duration:    {report['duration']:.1f}s",
+        f"Calls:       {report['calls']} ({report['throughput']:.1f}/s)",
+        f"Errors:      {report['errors']} ({report['error_rate']:.2%})",
+        f"Latency:     mean {ms(latency['mean'])}, p50 {ms(latency['p50'])}, p90 {ms(latency['p90'])}, "
+        f"p99 {ms(latency['p99'])}, max {ms(latency['max'])}",
+        f"RSS:         {mb(report['rss_start'])} -> {mb(report['rss_end'])} (max {mb(report['rss_max'])})",
+        f"Sockets:     {report['sockets_start']} -> {report['sockets_end']} (max {report['sockets_max']})",
+    ]
+
+    return '\n'.join(lines)
+
+
+def main(argv=None):
+    """Command line entry, ``python -m mistifi.loadtest --help``.
+    """
+    parser = argparse.ArgumentParser(
+        prog='python -m mistifi.loadtest',
+        description='Load and soak test MistiFi.resource() against a local mock server or a cloud.')
+    parser.add_argument('--mode', choices=MODES, default='threaded')
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--duration', type=float, help='seconds to run for (default 10 if --total is not set)')
+    parser.add_argument('--total', type=int, help='number of calls to make')
+    parser.add_argument('--sample-interval', type=float, default=10)
+    parser.add_argument('--base-url', help='URL of the API, a local mock server is started if not set')
+    parser.add_argument('--token', default='mocktoken')
+    parser.add_argument('--org-id', help='organization to load, required with --base-url')
+    parser.add_argument('--sites', type=int, default=10, help='sites of the mock organization')
+    parser.add_argument('--clients', type=int, default=200, help='clients per site of the mock organization')
+    parser.add_argument('--latency', type=float, default=0, help='latency of the mock server in seconds')
+    args = parser.parse_args(argv)
+
+    from .mistifi import MistiFi
+
+    mock = None
+    if args.base_url is None:
+        from .mockserver import MockData, MockMist
+        mock = MockMist(data=MockData(sites=args.sites, clients_per_site=args.clients),
+                        latency={'*': args.latency} if args.latency else None).start()
+        base_url, org_id = mock.url, mock.data.org['id']
+        calls = [{'org_id': org_id}, {'org_id': org_id, 'uri': 'sites'}]
+        calls += [{'site_id': site['id'], 'uri': 'stats/clients'} for site in mock.data.sites]
+    else:
+        if not args.org_id:
+            parser.error('--org-id is required with --base-url')
+        base_url, org_id = args.base_url, args.org_id
+        calls = [{'org_id': org_id}, {'org_id': org_id, 'uri': 'sites'}]
+
+    try:
+        mist = MistiFi(token=args.token, base_url=base_url)
+        mist.comms()
+
+        test = LoadTest(mist, calls, concurrency=args.concurrency, mode=args.mode,
+                        sample_interval=args.sample_interval)
+        duration = args.duration if args.duration is not None or args.total is not None else 10
+        report = test.run(duration=duration, total=args.total)
+    finally:
+        if mock is not None:
+            mock.stop()
+
+    print(format_report(report))
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,288 @@
+import json
+import sqlite3
+import time
+
+import logging
+from ._log import logger, loglevel
+
+
+# The mirrored resources. Each one gets its own table with the same
+# set of indexed columns and the full JSON object kept in `data`.
+KINDS = ('orgs', 'sites', 'wlans', 'devices', 'maps')
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS {kind} (
+    id TEXT NOT NULL,
+    site_id TEXT NOT NULL DEFAULT '',
+    org_id TEXT,
+    name TEXT,
+    mac TEXT,
+    serial TEXT,
+    modified_time REAL,
+    data TEXT NOT NULL,
+    PRIMARY KEY (id, site_id)
+);
+CREATE INDEX IF NOT EXISTS {kind}_name ON {kind} (name);
+CREATE INDEX IF NOT EXISTS {kind}_site_id ON {kind} (site_id);
+CREATE INDEX IF NOT EXISTS {kind}_mac ON {kind} (mac);
+"""
+
+META_SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+
+class Mirror:
+    """Local SQLite mirror of an organization's inventory.
+
+    Orgs, sites, WLANs, devices and maps are fetched with `iterate()` and
+    stored locally so that lookups which don't need live data never leave
+    the process. The first `sync()` loads everything, later ones only write
+    the objects whose `modified_time` moved on and drop the ones that
+    disappeared from the cloud.
+
+    Parameters
+    ----------
+    mist: `MistiFi`
+        An instance on which `comms()` has already been called.
+
+    org_id: `str`
+        The Organization ID to mirror.
+
+    path: `str`, optional, default: ':memory:'
+        Path to the SQLite database file.
+
+    Examples:
+    ---------
+    >>> mirror = Mirror(mist, org_id=":org_id", path="inventory.db")
+    >>> mirror.sync()
+    >>> mirror.sites_with_wlan("Corp")
+    """
+    def __init__(self, mist, org_id, path=':memory:'):
+
+        self.mist = mist
+        self.org_id = org_id
+        self.path = path
+
+        self.db = sqlite3.connect(path)
+        self.db.row_factory = sqlite3.Row
+
+        with self.db:
+            for kind in KINDS:
+                self.db.executescript(SCHEMA.format(kind=kind))
+            self.db.executescript(META_SCHEMA)
+
+    def close(self):
+        """Closes the database connection.
+        """
+        self.db.close()
+
+    def sync(self):
+        """Brings the local mirror up to date with the cloud.
+
+        Returns
+        -------
+        A dict with the number of upserted and deleted rows per resource,
+        None for the resources which could not be fetched and are left as
+        they were, or None if the organization could not be fetched.
+        """
+        logger.info('Calling sync()')
+
+        org = self.mist.resource('GET', org_id=self.org_id)
+        if org is None:
+            logger.error(f'Could not fetch org {self.org_id}, sync aborted')
+            return
+
+        changes = {}
+        changes['orgs'] = self._merge('orgs', [org])
+
+        # A failed fetch leaves its rows alone, merging it as an empty list
+        # would delete them all
+        sites = self._list(org_id=self.org_id, uri='sites')
+        changes['sites'] = self._merge('sites', sites)
+
+        devices = self._list(org_id=self.org_id, uri='inventory')
+        changes['devices'] = self._merge('devices', devices)
+
+        # WLANs and maps only exist per site. The derived WLANs include the
+        # org level ones, without a site_id, so they are keyed by the site
+        # they were listed for.
+        if sites is None:
+            changes['wlans'] = changes['maps'] = None
+        else:
+            for kind, uri in (('wlans', 'wlans/derived'), ('maps', 'maps')):
+                objects = []
+                for site in sites:
+                    site_objects = self._list(site_id=site['id'], uri=uri)
+                    if site_objects is None:
+                        objects = None
+                        break
+                    objects.extend((site['id'], obj) for obj in site_objects)
+
+                changes[kind] = self._merge(kind, objects)
+
+        with self.db:
+            self.db.execute(
+                'INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)',
+                ('last_sync', str(time.time())))
+
+        logger.debug(f'Sync changes: {changes}')
+
+        # Reset logging to ERROR
+        loglevel(logging.ERROR)
+
+        return changes
+
+    def _list(self, **kwargs):
+        """Fetches all the pages of a list endpoint.
+
+        Returns
+        -------
+        The full list, or None if any of its pages failed
+        """
+        from .mistifi import PageError
+
+        try:
+            return list(self.mist.iterate('GET', **kwargs))
+        except PageError as e:
+            logger.error(f'Listing failed: {e}')
+            return
+
+    def _merge(self, kind, objects):
+        """Upserts the changed objects and deletes the ones that are gone.
+
+        Args
+        ----
+        kind: `str`
+            One of `KINDS`
+        objects: `list`
+            The full list of objects as returned by the cloud, or of
+            (site_id, object) tuples for the objects listed per site
+
+        Returns
+        -------
+        A dict with the `upserted` and `deleted` counts, or None if the
+        objects could not be fetched
+        """
+        if objects is None:
+            logger.error(f'Could not fetch the {kind}, left as they were')
+            return
+
+        known = {
+            (row['id'], row['site_id']): row['modified_time']
+            for row in self.db.execute(f'SELECT id, site_id, modified_time FROM {kind}')
+        }
+
+        rows = []
+        seen = set()
+        for obj in objects:
+            site_id = None
+            if isinstance(obj, tuple):
+                site_id, obj = obj
+            row = self._row(kind, obj, site_id)
+            key = (row[0], row[1])
+            seen.add(key)
+
+            # Unchanged objects are not written again
+            if key in known and row[6] is not None and known[key] == row[6]:
+                continue
+            rows.append(row)
+
+        gone = [key for key in known if key not in seen]
+
+        with self.db:
+            self.db.executemany(
+                f'INSERT OR REPLACE INTO {kind} '
+                '(id, site_id, org_id, name, mac, serial, modified_time, data) '
+                'VALUES (?, ?, ?, ?, ?, ?, ?, ?)', rows)
+            self.db.executemany(f'DELETE FROM {kind} WHERE id = ? AND site_id = ?', gone)
+
+        return {'upserted': len(rows), 'deleted': len(gone)}
+
+    @staticmethod
+    def _row(kind, obj, site_id=None):
+        """Flattens a cloud object into the columns of its table.
+        """
+        # WLANs are looked up by their SSID
+        name = obj.get('ssid') if kind == 'wlans' else obj.get('name')
+
+        return (
+            obj['id'],
+            site_id or obj.get('site_id') or '',
+            obj.get('org_id'),
+            name,
+            obj.get('mac'),
+            obj.get('serial'),
+            obj.get('modified_time'),
+            json.dumps(obj),
+        )
+
+    #
+    ## Local lookups
+    #
+
+    def last_sync(self):
+        """Time of the last successful sync as a UNIX timestamp, or None.
+        """
+        row = self.db.execute("SELECT value FROM meta WHERE key = 'last_sync'").fetchone()
+        return float(row['value']) if row else None
+
+    def find(self, kind, **columns):
+        """Returns all the mirrored objects of `kind` matching the columns.
+
+        Args
+        ----
+        kind: `str`
+            One of 'orgs', 'sites', 'wlans', 'devices' or 'maps'
+
+        Keyword Args
+        ------------
+        Any of ``id``, ``site_id``, ``org_id``, ``name``, ``mac`` or ``serial``.
+        For WLANs ``name`` is the SSID.
+
+        Returns
+        -------
+        A list of the objects as they were returned by the cloud
+        """
+        if kind not in KINDS:
+            raise ValueError(f'Not a valid kind {KINDS}')
+
+        allowed = {'id', 'site_id', 'org_id', 'name', 'mac', 'serial'}
+        unknown = set(columns) - allowed
+        if unknown:
+            raise ValueError(f'Not valid columns {sorted(unknown)}, use {sorted(allowed)}')
+
+        query = f'SELECT data FROM {kind}'
+        if columns:
+            query += ' WHERE ' + ' AND '.join(f'{col} = ?' for col in columns)
+
+        return [json.loads(row['data']) for row in self.db.execute(query, tuple(columns.values()))]
+
+    def get(self, kind, id):
+        """Returns a single object of `kind` by its ID, or None.
+        """
+        found = self.find(kind, id=id)
+        return found[0] if found else None
+
+    def site(self, name):
+        """Returns the site with the given name, or None.
+        """
+        found = self.find('sites', name=name)
+        return found[0] if found else None
+
+    def devices_on_site(self, site_id):
+        """Returns all the devices assigned to a site.
+        """
+        return self.find('devices', site_id=site_id)
+
+    def sites_with_wlan(self, ssid):
+        """Returns all the sites on which a WLAN with the given SSID is available.
+        """
+        rows = self.db.execute(
+            'SELECT sites.data FROM sites JOIN wlans ON wlans.site_id = sites.id '
+            'WHERE wlans.name = ? GROUP BY sites.id', (ssid,))
+
+        return [json.loads(row['data']) for row in rows]
@@ -1,17 +1,17 @@
+import functools
 import getpass
 import sys
-import json
+import threading
+import time
 
-import requests
-from requests import Request, Session
-from requests.adapters import HTTPAdapter
-from requests.packages.urllib3.util.retry import Retry
+from contextlib import contextmanager
+from urllib.parse import urljoin, urlparse
 
-from urllib.parse import urljoin
+from . import codec
+from . import deadline as _deadline
 
 import logging
-import logzero
-from logzero import logger
+from ._log import logger, loglevel
 
 
 clouds = {
@@ -19,8 +19,26 @@ clouds = {
     "EU": "api.eu.mist.com",
 }
 
-# Set the default logging level to ERROR
-logzero.loglevel(logging.ERROR)
+
+class PageError(Exception):
+    """A page of `MistiFi.iterate()` failed, so the items yielded before it
+    are only a part of the list.
+
+    Attributes
+    ----------
+    url: `str`
+        URL of the list endpoint
+    page: `int`
+        The page which failed
+    count: `int`
+        Number of items yielded before it
+    """
+    def __init__(self, url, page, count):
+        super().__init__(f'Page {page} of {url} failed after {count} items')
+        self.url = url
+        self.page = page
+        self.count = count
+
 
 class MistiFi:
     """All Mist API URIs are found on https://api.mist.com/api/v1/docs/Home
@@ -51,8 +69,40 @@ class MistiFi:
         certificate, or a string, in which case it must be a path to a CA
         bundle to use.
 
-    timeout: `int`, optional, default: 10
-        The timeout for the connection.
+    timeout: `float` or `tuple`, optional, default: 10
+        The timeout of the calls in seconds, or a ``(connect, read)`` tuple.
+
+    base_url: `str`, optional, default: None
+        Overrides the URL of the selected cloud, e.g. to point the instance
+        to a local `mistifi.mockserver.MockMist`.
+
+    session_store: `mistifi.sessionstore.SessionStore`, optional, default: None
+        Keeps the login session of a username/password login on disk, so
+        that it is reused by the next `comms()` until it expires instead of
+        logging in again. `comms()` checks the stored session with the cloud
+        and asks for the password if it was revoked. A session which expires
+        later on is only replaced if `password` is set, otherwise the calls
+        fail until `comms()` is called again.
+
+    shared_transport: `bool`, optional, default: False
+        Reuse the connection pool of the other instances talking to the same
+        cloud, see `mistifi.transport`. Each instance keeps its own auth.
+
+    breaker: `mistifi.breaker.CircuitBreaker`, optional, default: None
+        Fails calls to degraded endpoints fast instead of sending them.
+
+    hedger: `mistifi.hedge.Hedger`, optional, default: None
+        Sends a second GET if the first one is slower than usual for its
+        endpoint and takes whichever answers first.
+
+    scheduler: `mistifi.priority.PriorityScheduler`, optional, default: None
+        Queues the calls by their `priority`, so that interactive calls
+        don't wait behind bulk ones.
+
+    intern: `bool` or `mistifi.codec.InternTable`, optional, default: False
+        Decode the responses through an intern table, `codec.default_table`
+        if True, so repeated keys and values share one string. Worth it
+        when the responses are kept, e.g. in a cache or an inventory.
 
     Examples:
     ---------
@@ -69,7 +119,9 @@ class MistiFi:
     >>> mist = MMClient(username="theuser")
     >>> mist.comms()
     """
-    def __init__(self, cloud="us", token="", username="", password="", apiv="1", verify=False, timeout=10):
+    def __init__(self, cloud="us", token="", username="", password="", apiv="1", verify=False, timeout=10,
+                 base_url=None, session_store=None, shared_transport=False,
+                 breaker=None, hedger=None, scheduler=None, intern=False):
 
         # Constructor attributes
         self.cloud = self._select_cloud(cloud)
@@ -78,16 +130,37 @@ class MistiFi:
         self.password = password
         self.apiv = apiv
         self.verify = bool(verify)
-        self.timeout = abs(timeout)
+        self.timeout = tuple(abs(t) for t in timeout) if isinstance(timeout, (tuple, list)) else abs(timeout)
+        self.session_store = session_store
+        self.shared_transport = shared_transport
+        self.breaker = breaker
+        self.hedger = hedger
+        self.scheduler = scheduler
+        self.intern = intern
 
         # Other class attributes used later
         self.csrftoken = None
-        self.mist_base_api_url = f'https://{self.cloud}/'
+        self.mist_base_api_url = f"{base_url.rstrip('/')}/" if base_url else f'https://{self.cloud}/'
+
+        # Optional mistifi.inventory.Inventory used to resolve
+        # 'site_name' and 'wlan_name' kwargs of resource()
+        self.inventory = None
+
+        # Expired login sessions are replaced once however many calls
+        # fail with it, the generation tells callers it already happened
+        self._login_lock = threading.Lock()
+        self._login_generation = 0
+        # A password the cloud rejected is not sent again
+        self._rejected_password = None
 
     def comms(self):
         """The first method to be called to configure the session and to login to the Mist cloud.
 
         It sets up the login payload and the session headders depending on the type of login.
+
+        Returns
+        -------
+        True if the session is ready, False if the login failed
         """
 
         logger.info('Calling comms()')
@@ -118,6 +191,11 @@ class MistiFi:
 
             self.login_payload['email'] = self.username
 
+            # A stored session saves both the password prompt and the login
+            if self._restore_session():
+                loglevel(logging.ERROR)
+                return True
+
             #
             # If password not provided, ask for it
             #
@@ -132,10 +210,16 @@ class MistiFi:
             logger.debug('Using username and password')
 
             # Finally login
-            self._user_login(self.login_payload)
+            if self._user_login(self.login_payload) is None:
+                logger.error(f'Login of {self.username} failed')
+                loglevel(logging.ERROR)
+                return False
+            self._save_session()
 
         # Reset the log level to ERROR only
-        logzero.loglevel(logging.ERROR)
+        loglevel(logging.ERROR)
+
+        return True
 
     def logout(self):
         """Logs out of the cloud, which is not really
@@ -152,18 +236,139 @@ class MistiFi:
 
         logging.debug(f'Logout response: {resp}')
 
+        if self.shared_transport:
+            from . import transport
+            transport.release(self.mist_base_api_url, self)
+
         # Reset logging to ERROR as this method is called through _api_call and
         # is not reset as if it were with by calling resource
-        logzero.loglevel(logging.ERROR)
+        loglevel(logging.ERROR)
 
         return resp
 
+    def _restore_session(self):
+        """Loads the cookies of a stored login session into the session.
+
+        Returns
+        -------
+        True if a valid session was found in `session_store` and the cloud
+        still accepts it
+        """
+        if self.session_store is None:
+            return False
+
+        cookies = self.session_store.load(self.mist_base_api_url, self.username)
+        if cookies is None:
+            return False
+
+        domain = urlparse(self.mist_base_api_url).hostname
+        for name, value in cookies.items():
+            self.session.cookies.set(name, value, domain=domain, path='/')
+        self.session.headers['X-CSRFTOKEN'] = cookies['csrftoken']
+
+        # The session may have been revoked before it expired, which is
+        # only found out now while the password can still be asked for
+        resp = self.session.get(self._resource_url(uri='/self'), timeout=self.timeout)
+        if resp.status_code >= 400:
+            logger.info(f'Stored session of {self.username} rejected with {resp.status_code}')
+            self.session_store.invalidate(self.mist_base_api_url, self.username)
+            self.session.cookies.clear()
+            del self.session.headers['X-CSRFTOKEN']
+            return False
+
+        logger.debug(f'Reusing the stored session of {self.username}')
+
+        return True
+
+    def _save_session(self):
+        """Stores the cookies of the current login session in `session_store`.
+        """
+        if self.session_store is None:
+            return
+
+        cookies = {}
+        expires = None
+        for cookie in self.session.cookies:
+            cookies[cookie.name] = cookie.value
+            if cookie.name == 'sessionid':
+                expires = cookie.expires
+
+        if 'sessionid' not in cookies:
+            return
+
+        # The cloud sets a day long session
+        if expires is None:
+            expires = time.time() + 86400
+
+        self.session_store.save(self.mist_base_api_url, self.username, cookies, expires)
+
+    @staticmethod
+    def _session_rejected(response):
+        """Whether the cloud rejected the login session of a call.
+
+        An expired session gets 401, a stale CSRF token gets 403.
+        """
+        if response.status_code == 401:
+            return True
+
+        return response.status_code == 403 and 'CSRF' in response.text
+
+    def _login_again(self, generation):
+        """Replaces a login session which the cloud rejected.
+
+        Only the first of the concurrent callers logs in, the others wait
+        for it and replay their calls with the new session. A password the
+        cloud rejected is not tried again, and the password is never asked
+        for here since this runs on the threads making the calls.
+
+        Args
+        ----
+        generation: `int`
+            The `_login_generation` at the time the failed call was sent
+
+        Returns
+        -------
+        True if there is a new session and the call should be replayed
+        """
+        if self.token:
+            return False
+
+        with self._login_lock:
+            if self._login_generation != generation:
+                return True
+
+            logger.info('Login session rejected, logging in again')
+
+            if self.session_store is not None:
+                self.session_store.invalidate(self.mist_base_api_url, self.username)
+            self.session.cookies.clear()
+
+            if not self.password:
+                logger.error('Login session rejected and no password to log in again')
+                return False
+            if self.password == self._rejected_password:
+                logger.error(f'Login session rejected and the password of {self.username} was rejected before')
+                return False
+            self.login_payload['password'] = self.password
+
+            if self._user_login(self.login_payload) is None:
+                return False
+            self._save_session()
+
+            self._login_generation += 1
+
+        return True
+
     def _config_session(self):
         """Session configuration for requests.Session()
         """
 
         logger.info(f'Calling _config_session()')
 
+        # Imported here so that importing mistifi doesn't pay for requests
+        import requests
+        from requests.adapters import HTTPAdapter
+
         # Setup base headers
         headers = {
             'Content-Type': 'application/json',
@@ -177,8 +382,17 @@ class MistiFi:
 
         # Setup the retry strategy
         # https://findwork.dev/blog/advanced-usage-python-requests-timeouts-retries-hooks/
-        retries = Retry(total=3, backoff_factor=1, status_forcelist=[429, 500, 502, 503, 504])
-        self.session.mount(self.mist_base_api_url, HTTPAdapter(max_retries=retries))
+        # Retries stop early rather than run past the deadline of a call
+        retries = _deadline.retry(total=3, backoff_factor=1, status_forcelist=[429, 500, 502, 503, 504])
+
+        # The session only carries the auth state, the connections to the
+        # cloud can be shared between all the instances
+        if self.shared_transport:
+            from . import transport
+            shared = transport.adapter(self.mist_base_api_url, max_retries=retries, client=self)
+            self.session.mount(self.mist_base_api_url, shared)
+        else:
+            self.session.mount(self.mist_base_api_url, HTTPAdapter(max_retries=retries))
 
         # Handle response status
         #assert_status_hook = lambda response, *args, **kwargs: response.raise_for_status()
@@ -210,7 +424,7 @@ class MistiFi:
 
         Return
         ------
-            None
+            The login response, or None if the login failed
         """
         error_resp = {'err': True}
 
@@ -218,14 +432,26 @@ class MistiFi:
 
         url_login = self._resource_url(uri='/login')
 
+        timeout = self._timeout()
+        if timeout is None:
+            logger.error('Deadline exceeded, not logging in')
+            return
+
+        # Imported here so that importing mistifi doesn't pay for requests
+        import requests
+
         # Login with or without the 2 factor token
-        resp = self.session.post(url_login, json=login_payload)
+        try:
+            resp = self.session.post(url_login, json=login_payload, timeout=timeout)
+        except requests.RequestException as e:
+            logger.error(f'Login of {login_payload.get("email")} failed: {e!r}')
+            return
 
         # The headers and cookies in the response
         resp_head = resp.headers
         resp_status_code = resp.status_code
         resp_text = resp.text
-        resp_jtext = json.loads(resp_text)
+        resp_jtext = codec.loads(resp_text)
 
         # Return nothing if status code is higher than 400
         if resp_status_code >= 400:
@@ -233,16 +459,18 @@ class MistiFi:
             if 'detail' in resp_jtext:
                 error_resp['detail'] = resp_jtext['detail']
 
+            # Rejected credentials, unlike a cloud or rate limit error
+            if resp_status_code < 500 and resp_status_code != 429:
+                self._rejected_password = login_payload.get('password')
+
             logger.error(f'Login response code: {resp.status_code}')
             logger.error(f"Response Error:\n{error_resp}")
-            exit(0)
-        # Otherwise return the JSON response
-        else:
-            jresponse = resp.json()
-            logger.info(f'Login response code: {resp.status_code}')
-            logger.debug(f'Response HEAD: {resp_head}')
-            logger.debug(f'The response: {jresponse}')
-            return jresponse
+            return
+
+        jresponse = resp_jtext
+        logger.info(f'Login response code: {resp.status_code}')
+        logger.debug('Response HEAD: %s', resp_head)
+        logger.debug('The response: %s', jresponse)
 
         # Need to update the headers with the CSRF token to be able
         # to POST, PUT or DELETE in further requests
@@ -251,11 +479,13 @@ class MistiFi:
             self.session.headers['X-CSRFTOKEN'] = resp_csrftoken
         except KeyError:
             logger.exception("'Set-Cookie' not in header response")
-            return
+            return jresponse
 
         logger.debug(f'Session headers should include X-CSRFTOKEN token: {self.session.headers}')
 
-    def _api_call(self, method, url, **kwargs):
+        return jresponse
+
+    def _api_call(self, method, url, priority=None, fields=None, **kwargs):
         """The API call handler.
 
         This method is used by `resource()`. kwargs passed in get passed to the
@@ -269,6 +499,12 @@ class MistiFi:
         url: `str`
             URL with the endpoint included
 
+        priority: `str`, optional
+            The priority class the call is queued with by the `scheduler`
+
+        fields: `list`, optional
+            Dotted paths of the fields kept while decoding the response
+
         Keyword Args
         ------------
         These are passed into the requests and include the `params` and `json`
@@ -287,14 +523,35 @@ class MistiFi:
         logger.info(f"Method is: {method.upper()}")
         logger.info(f"Calling URL: {url}")
 
+        deadline = _deadline.current()
+        if deadline is not None and deadline.expired():
+            logger.error(f'Deadline exceeded, {url} not called')
+            return
+
+        # Imported here so that importing mistifi doesn't pay for requests
+        import requests
+
         # This is where the call happens
-        response = getattr(self.session, method.lower())(url, **kwargs)
+        try:
+            response = self._dispatch(method, url, priority, **kwargs)
+            if response is None:
+                return
+        except requests.RequestException as e:
+            # Timeouts cut to the deadline and retries given up on
+            if deadline is None:
+                raise
+            logger.error(f'Call to {url} failed within the deadline: {e!r}')
+            return
 
         # Some response variables here
         resp_head = response.headers
         resp_status_code = response.status_code
         resp_text = response.text
-        resp_jtext = json.loads(resp_text)
+        # Error responses are decoded whole, for their 'detail'
+        if resp_status_code < 400:
+            resp_jtext = codec.loads(resp_text, fields=fields, intern=self.intern)
+        else:
+            resp_jtext = codec.loads(resp_text)
 
         logger.info(f"Response status code: {resp_status_code}")
 
@@ -308,11 +565,180 @@ class MistiFi:
             return
         # Otherwise return the JSON response
         else:
-            jresponse = response.json()
-            logger.debug(f'Response HEAD: {resp_head}')
-            logger.debug(f'The response: {jresponse}')
+            jresponse = resp_jtext
+            # Formatted only if debug logging is on, large responses are
+            # expensive to turn into a string
+            logger.debug('Response HEAD: %s', resp_head)
+            logger.debug('The response: %s', jresponse)
             return jresponse
 
+    def _dispatch(self, method, url, priority=None, **kwargs):
+        """Sends the call, through the circuit breaker and in a slot of the
+        scheduler if they are set.
+
+        Returns
+        -------
+        The response, or None if the circuit is open or the deadline passed
+        """
+        if self.breaker is not None:
+            return self._send_guarded(method, url, priority, **kwargs)
+
+        with self._slot(url, priority) as acquired:
+            if not acquired:
+                return
+            return self._send(method, url, priority, **kwargs)
+
+    @contextmanager
+    def _slot(self, url, priority=None):
+        """Holds a slot of the scheduler, if there is one, for the call.
+
+        Yields
+        ------
+        True, or False if the deadline passed while waiting for the slot
+        """
+        if self.scheduler is None:
+            yield True
+            return
+
+        # Time spent in the queue counts against the deadline
+        deadline = _deadline.current()
+        timeout = None if deadline is None else deadline.remaining()
+        with self.scheduler.slot(priority, timeout=timeout) as acquired:
+            if not acquired:
+                logger.error(f'Deadline exceeded in the {priority} queue, {url} not called')
+            yield acquired
+
+    def _send(self, method, url, priority=None, **kwargs):
+        """Sends the call, hedged if it is a GET and a `hedger` is set.
+        """
+        if self.hedger is None or method.upper() != 'GET':
+            return self._send_once(method, url, **kwargs)
+
+        from .breaker import template
+
+        # The hedger's threads make the request under this thread's deadline
+        request = _deadline.bind(functools.partial(self._send_once, method, url, **kwargs))
+
+        # A hedge is one more call, it needs its own slot of the scheduler
+        if self.scheduler is None:
+            return self.hedger.send(template(url), request)
+
+        return self.hedger.send(template(url), request,
+                                acquire=functools.partial(self.scheduler.try_acquire, priority),
+                                release=self.scheduler.release)
+
+    def _send_once(self, method, url, **kwargs):
+        """Sends the call, logging in again if the session was rejected.
+        """
+        generation = self._login_generation
+        response = self._request(method, url, **kwargs)
+        if response is None or not self._session_rejected(response):
+            return response
+
+        # The login session may have expired or been revoked, login again
+        # and replay the call once, if there is time left for both
+        deadline = _deadline.current()
+        if deadline is not None and deadline.expired():
+            logger.error(f'Deadline exceeded, not logging in again for {url}')
+            return response
+
+        if self._login_again(generation):
+            response = self._request(method, url, **kwargs)
+
+        return response
+
+    def _timeout(self):
+        """The timeout of the next request, cut to the current deadline.
+
+        Returns
+        -------
+        The timeout, or None if the deadline passed, requests doesn't take
+        a timeout of 0
+        """
+        deadline = _deadline.current()
+        if deadline is None:
+            return self.timeout
+
+        timeout = deadline.timeout(self.timeout)
+        if deadline.expired() or min(timeout if isinstance(timeout, tuple) else (timeout,)) <= 0:
+            return None
+
+        return timeout
+
+    def _request(self, method, url, **kwargs):
+        """Makes the request with the timeout cut to the current deadline.
+
+        Returns
+        -------
+        The response, or None if the deadline passed before it was sent
+        """
+        timeout = self._timeout()
+        if timeout is None:
+            logger.error(f'Deadline exceeded, {url} not called')
+            return
+
+        return getattr(self.session, method.lower())(url, timeout=timeout, **kwargs)
+
+    def _send_guarded(self, method, url, priority=None, **kwargs):
+        """Sends the call through the circuit breaker of its endpoint template.
+
+        Returns
+        -------
+        The response, or None if the circuit is open or no call was made
+        """
+        from .breaker import template
+
+        key = template(url)
+        # Before queueing for a slot, so that calls to a degraded endpoint
+        # fail fast instead of waiting behind the others
+        if not self.breaker.allow(key):
+            logger.error(f'Circuit open for {key}, call not sent')
+            return
+
+        with self._slot(url, priority) as acquired:
+            if not acquired:
+                self.breaker.cancel(key)
+                return
+
+            start = time.perf_counter()
+            try:
+                response = self._send(method, url, priority, **kwargs)
+            except Exception:
+                self.breaker.record(key, True, time.perf_counter() - start)
+                raise
+
+        # Nothing was answered, e.g. the login session couldn't be
+        # replaced, which says nothing about the endpoint
+        if response is None:
+            self.breaker.cancel(key)
+            return
+
+        self.breaker.record(key, response.status_code >= 500, time.perf_counter() - start)
+
+        return response
+
+    def stats(self):
+        """Runtime stats of the instance.
+
+        Returns
+        -------
+        A dict with the number of `logins` made again after the session was
+        rejected and, if set, the circuit `breaker` state per endpoint template,
+        the `hedge` counters and the `scheduler` queues
+        """
+        stats = {'logins': self._login_generation}
+
+        if self.breaker is not None:
+            stats['breaker'] = self.breaker.stats()
+
+        if self.hedger is not None:
+            stats['hedge'] = self.hedger.stats()
+
+        if self.scheduler is not None:
+            stats['scheduler'] = self.scheduler.stats()
+
+        return stats
+
     def _resource_url(self, **kwargs):
         """The resource URL formatter
 
@@ -463,6 +889,23 @@ class MistiFi:
         These get passed to the `_params()` and `_resource_url()` methods, so read
         what is accepted there.
 
+        site_name: `str`
+            Resolved to ``site_id`` if an `inventory` is attached.
+        wlan_name: `str`
+            The SSID, resolved to ``wlan_id`` if an `inventory` is attached.
+        model: `type`
+            A `mistifi.models` class, e.g. `Device`, the response objects
+            are built into.
+        deadline: `float` or `mistifi.deadline.Deadline`
+            Total time budget in seconds, including the retries and the
+            calls made by the callers of this one.
+        priority: `str`
+            The priority class of the call if a `scheduler` is set, e.g.
+            'interactive', 'normal' or 'bulk'.
+        fields: `list`
+            Dotted paths of the fields to keep, e.g. ['mac', 'rssi'], the
+            others are dropped while the response is decoded.
+
         Returns:
         --------
         The JSON response with either the successful response or the error response.
@@ -470,6 +913,20 @@ class MistiFi:
         logger.info("Calling resource()")
         logger.debug(f'kwargs in: {kwargs}')
 
+        model = kwargs.pop('model', None)
+        deadline = kwargs.pop('deadline', None)
+        priority = kwargs.pop('priority', None)
+        fields = kwargs.pop('fields', None)
+
+        # Resolve names to IDs with the attached inventory
+        if self.inventory is not None:
+            try:
+                kwargs = self.inventory.resolve(**kwargs)
+            except KeyError as e:
+                logger.error(f'Not found in the inventory: {e}')
+                loglevel(logging.ERROR)
+                return
+
         # Get the params from the passed in kwargs
         params = self._params(**kwargs)
 
@@ -477,13 +934,150 @@ class MistiFi:
         resource_url = self._resource_url(**kwargs)
 
         # Get the JSON response
-        jresp = self._api_call(method, resource_url, params=params, json=jpayload)
+        with _deadline.scope(deadline):
+            jresp = self._api_call(method, resource_url, params=params, json=jpayload, priority=priority,
+                                   fields=fields)
+
+        if model is not None and jresp is not None:
+            jresp = self._build_models(model, jresp)
 
         # Reset logging to ERROR
-        logzero.loglevel(logging.ERROR)
+        loglevel(logging.ERROR)
 
         return jresp
 
+    def iterate(self, method='GET', limit=100, **kwargs):
+        """Iterates over the items of a list endpoint, page by page.
+
+        Pages are requested with the `limit` and `page` params until a page
+        comes back shorter than `limit`. For the search endpoints, which
+        return a dict with 'results', the 'next' link is followed instead.
+        Only one page is held in memory at a time.
+
+        Args:
+        -----
+        method: `str`, default 'GET'
+            A valid HTTP method.
+        limit: `int`, default 100
+            Number of items per page, if not set in the `params` kwarg.
+
+        Keyword Args
+        ------------
+        Same as for the `resource()` method. A `deadline` starts when
+        `iterate()` is called and is shared by all the pages.
+
+        Yields:
+        -------
+        The items of all the pages.
+
+        Raises:
+        -------
+        `PageError` if the call for a page fails, including the first one,
+        so that a partial list is never taken for the whole
+        """
+        logger.info("Calling iterate()")
+        logger.debug(f'kwargs in: {kwargs}')
+
+        model = kwargs.pop('model', None)
+        deadline = _deadline.earliest(kwargs.pop('deadline', None))
+        priority = kwargs.pop('priority', None)
+        fields = kwargs.pop('fields', None)
+        items = self._iterate(method, limit, deadline, priority, fields, **kwargs)
+
+        if model is None:
+            return items
+
+        return (model.from_json(item) for item in items)
+
+    def _iterate(self, method, limit, deadline, priority, fields, **kwargs):
+        """The page iterator behind `iterate()`.
+        """
+        if self.inventory is not None:
+            try:
+                kwargs = self.inventory.resolve(**kwargs)
+            except KeyError as e:
+                logger.error(f'Not found in the inventory: {e}')
+                return
+
+        params = dict(self._params(**kwargs))
+        params.setdefault('limit', limit)
+        page = int(params.get('page', 1))
+
+        resource_url = self._resource_url(**kwargs)
+        previous = None
+        count = 0
+
+        try:
+            while True:
+                params['page'] = page
+                with _deadline.scope(deadline):
+                    jresp = self._api_call(method, resource_url, params=params, priority=priority,
+                                           fields=fields)
+
+                if jresp is None:
+                    raise PageError(resource_url, page, count)
+
+                # Search endpoints link to the next page
+                if isinstance(jresp, dict) and 'results' in jresp:
+                    while True:
+                        yield from jresp['results']
+                        count += len(jresp['results'])
+
+                        if not jresp.get('next'):
+                            return
+                        page += 1
+                        next_url = urljoin(self.mist_base_api_url, jresp['next'])
+                        with _deadline.scope(deadline):
+                            jresp = self._api_call(method, next_url, priority=priority, fields=fields)
+                        if jresp is None:
+                            raise PageError(resource_url, page, count)
+
+                # Not a list endpoint
+                if not isinstance(jresp, list):
+                    yield jresp
+                    return
+
+                # Endpoints ignoring the paging params return the same
+                # full page again and again
+                if jresp and jresp == previous:
+                    logger.error(f'Page {page} of {resource_url} repeats page {page - 1}, stopped')
+                    return
+                previous = jresp
+
+                yield from jresp
+                count += len(jresp)
+
+                if len(jresp) < int(params['limit']):
+                    return
+                page += 1
+        finally:
+            # Reset logging to ERROR
+            loglevel(logging.ERROR)
+
+    @staticmethod
+    def _build_models(model, jresp):
+        """Builds the model instances from a JSON response.
+
+        Args
+        ----
+        model: `type`
+            A `mistifi.models.Model` subclass
+        jresp: `list` or `dict`
+            The decoded response
+
+        Returns
+        -------
+        A list of instances for a list, the search response with a list of
+        instances as 'results', or a single instance for any other dict
+        """
+        if isinstance(jresp, list):
+            return [model.from_json(obj) for obj in jresp]
+
+        if 'results' in jresp:
+            return dict(jresp, results=[model.from_json(obj) for obj in jresp['results']])
+
+        return model.from_json(jresp)
+
     #
     ## Here are defined resource methods that interface with a specific endpoint.
     #
@@ -0,0 +1,490 @@
+import random
+import re
+import secrets
+import threading
+import time
+import uuid
+
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+from ._log import logger
+
+from . import codec
+
+
+API = '/api/v1'
+
+
+class MockData:
+    """Deterministic synthetic Mist inventory and stats.
+
+    Parameters
+    ----------
+    sites: `int`, optional, default: 10
+        Number of sites in the organization.
+
+    devices_per_site: `int`, optional, default: 20
+        Number of APs per site.
+
+    clients_per_site: `int`, optional, default: 200
+        Number of wireless clients per site.
+
+    events: `int`, optional, default: 10000
+        Number of client events, spread over the last day.
+
+    seed: `int`, optional, default: 0
+        Seed of the generated data.
+    """
+    def __init__(self, sites=10, devices_per_site=20, clients_per_site=200, events=10000, seed=0):
+
+        rnd = random.Random(seed)
+
+        def uid():
+            return str(uuid.UUID(int=rnd.getrandbits(128), version=4))
+
+        now = int(time.time())
+
+        self.org = {'id': uid(), 'name': 'Mock Org', 'created_time': now - 86400, 'modified_time': now - 86400}
+        org_id = self.org['id']
+
+        self.wlans = [
+            {'id': uid(), 'org_id': org_id, 'ssid': ssid, 'enabled': True, 'vlan_id': vlan,
+             'created_time': now - 86400, 'modified_time': now - 86400}
+            for ssid, vlan in (('Corp', 100), ('Guest', 200), ('IoT', 300))
+        ]
+
+        self.sites = []
+        self.devices = {}
+        self.clients = {}
+        self.maps = {}
+
+        for s in range(sites):
+            site = {'id': uid(), 'org_id': org_id, 'name': f'SITE-{s:04d}', 'timezone': 'Europe/London',
+                    'country_code': 'GB', 'created_time': now - 86400, 'modified_time': now - 86400}
+            self.sites.append(site)
+            site_id = site['id']
+
+            floor = {'id': uid(), 'org_id': org_id, 'site_id': site_id, 'name': 'Floor 1', 'type': 'image',
+                     'width': 1000, 'height': 800, 'ppm': 10, 'created_time': now, 'modified_time': now}
+            self.maps[site_id] = [floor]
+
+            devices = []
+            for d in range(devices_per_site):
+                mac = f'5c5b35{s:03x}{d:03x}'
+                devices.append({
+                    'id': f'00000000-0000-0000-1000-{mac}', 'org_id': org_id, 'site_id': site_id,
+                    'map_id': floor['id'], 'name': f'ap-{s:04d}-{d:03d}', 'mac': mac,
+                    'serial': f'A{s:04d}{d:04d}', 'model': rnd.choice(('AP43', 'AP41', 'AP33')),
+                    'type': 'ap', 'version': rnd.choice(('0.10.24028', '0.12.27139')), 'status': 'connected',
+                    'x': rnd.uniform(0, 1000), 'y': rnd.uniform(0, 800),
+                    'created_time': now - 86400, 'modified_time': now - 3600,
+                })
+            self.devices[site_id] = devices
+
+            clients = []
+            for c in range(clients_per_site):
+                ap = devices[c % len(devices)] if devices else {}
+                wlan = self.wlans[c % len(self.wlans)]
+                clients.append({
+                    'mac': f'a4{s:04x}{c:06x}', 'hostname': f'client-{s}-{c}', 'ip': f'10.{s % 256}.{c // 256 % 256}.{c % 256}',
+                    'site_id': site_id, 'ap_mac': ap.get('mac'), 'ap_id': ap.get('id'),
+                    'ssid': wlan['ssid'], 'wlan_id': wlan['id'], 'band': rnd.choice(('24', '5')),
+                    'rssi': rnd.randint(-85, -35), 'snr': rnd.randint(5, 45),
+                    'tx_bytes': rnd.randint(0, 10 ** 9), 'rx_bytes': rnd.randint(0, 10 ** 9),
+                    'last_seen': now, 'uptime': rnd.randint(0, 86400),
+                })
+            self.clients[site_id] = clients
+
+        all_clients = [c for clients in self.clients.values() for c in clients] or [{}]
+        self.events = sorted(
+            (
+                {'timestamp': now - 86400 + rnd.random() * 86400, 'type': rnd.choice(('CLIENT_AUTHORIZED', 'CLIENT_DEAUTHENTICATED')),
+                 'mac': rnd.choice(all_clients).get('mac'), 'org_id': org_id}
+                for _ in range(events)
+            ),
+            key=lambda e: e['timestamp'],
+        )
+
+        self.sites_by_id = {site['id']: site for site in self.sites}
+
+
+class _MockHandler(BaseHTTPRequestHandler):
+    """Request handler, `mock` is set on the subclass made per server.
+    """
+    protocol_version = 'HTTP/1.1'
+
+    # Headers and body go out in one segment, otherwise delayed ACKs add
+    # ~40ms to every keep-alive response
+    disable_nagle_algorithm = True
+    wbufsize = -1
+
+    mock = None
+
+    def do_GET(self):
+        self.mock.handle(self, 'GET')
+
+    def do_POST(self):
+        self.mock.handle(self, 'POST')
+
+    def do_PUT(self):
+        self.mock.handle(self, 'PUT')
+
+    def do_DELETE(self):
+        self.mock.handle(self, 'DELETE')
+
+    def log_message(self, format, *args):
+        logger.debug(format % args)
+
+
+class MockMist:
+    """Local stand-in for the Mist API, for load and integration tests.
+
+    Serves a synthetic organization over plain HTTP and behaves like the
+    cloud where it matters for the client: token and login/CSRF cookie
+    authentication, the `limit`/`page` pagination with the ``X-Page-*``
+    headers, capped search results, 429s with ``Retry-After`` once the
+    rate limit is used up, and configurable latency and errors per
+    endpoint.
+
+    Endpoints are identified by their template, e.g.
+    '/sites/:site_id/stats/clients'. See `ROUTES` for the served ones.
+
+    Parameters
+    ----------
+    data: `MockData`, optional
+        The served data, `MockData()` if not provided.
+
+    tokens: `list`, optional, default: ['mocktoken']
+        Accepted API tokens.
+
+    users: `dict`, optional, default: {'user@mistifi.com': 'mockpass'}
+        Accepted login emails and passwords.
+
+    latency: `dict`, optional
+        Latency per endpoint template, '*' for all the others. A value is
+        either seconds, a ``(low, high)`` uniform range, a
+        ``('lognormal', mu, sigma)`` tuple or a callable returning seconds.
+
+    errors: `dict`, optional
+        Fraction of calls answered with 503 per endpoint template, '*' for
+        all the others.
+
+    rate_limit: `tuple`, optional
+        ``(requests per second, burst)`` of a token bucket shared by all the
+        clients. Calls over the limit get 429.
+
+    retry_after: `int`, optional, default: 1
+        Seconds sent in the ``Retry-After`` header of the 429s.
+
+    session_ttl: `float`, optional, default: 86400
+        Seconds after which a login session expires.
+
+    host: `str`, optional, default: '127.0.0.1'
+        Address to listen on.
+
+    port: `int`, optional, default: 0
+        Port to listen on, 0 picks a free one.
+
+    Examples:
+    ---------
+    >>> with MockMist(data=MockData(sites=100), latency={'*': ('lognormal', -4, 0.5)}) as mock:
+    ...     mist = MistiFi(token='mocktoken', base_url=mock.url)
+    ...     mist.comms()
+    ...     mist.resource('GET', org_id=mock.data.org['id'], uri='sites')
+    """
+    ROUTES = [
+        ('POST', '/login'),
+        ('POST', '/logout'),
+        ('GET', '/self'),
+        ('GET', '/orgs/:org_id'),
+        ('GET', '/orgs/:org_id/sites'),
+        ('GET', '/orgs/:org_id/inventory'),
+        ('GET', '/orgs/:org_id/wlans'),
+        ('GET', '/orgs/:org_id/clients/events/search'),
+        ('GET', '/orgs/:org_id/sites/:site_id'),
+        ('GET', '/sites/:site_id'),
+        ('GET', '/sites/:site_id/devices'),
+        ('GET', '/sites/:site_id/stats/devices'),
+        ('GET', '/sites/:site_id/stats/clients'),
+        ('GET', '/sites/:site_id/wlans'),
+        ('GET', '/sites/:site_id/wlans/derived'),
+        ('GET', '/sites/:site_id/maps'),
+    ]
+
+    def __init__(self, data=None, tokens=('mocktoken',), users=None, latency=None, errors=None,
+                 rate_limit=None, retry_after=1, session_ttl=86400, host='127.0.0.1', port=0):
+
+        self.data = data or MockData()
+        self.tokens = set(tokens)
+        self.users = users if users is not None else {'user@mistifi.com': 'mockpass'}
+        self.latency = dict(latency or {})
+        self.errors = dict(errors or {})
+        self.rate_limit = rate_limit
+        self.retry_after = retry_after
+        self.session_ttl = session_ttl
+
+        # Session ID to (email, CSRF token, expiry)
+        self.sessions = {}
+
+        # Calls and status codes per endpoint template
+        self.stats = {}
+
+        self._routes = [
+            (method, template, re.compile('^' + re.sub(r':(\w+)', r'(?P<\1>[^/]+)', template) + '$'))
+            for method, template in self.ROUTES
+        ]
+
+        self._lock = threading.Lock()
+        self._rnd = random.Random()
+        self._bucket = None
+        if rate_limit is not None:
+            self._bucket = [float(rate_limit[1]), time.monotonic()]
+
+        handler = type('MockHandler', (_MockHandler,), {'mock': self})
+        self.server = ThreadingHTTPServer((host, port), handler)
+        self.server.daemon_threads = True
+        self.url = f'http://{host}:{self.server.server_address[1]}/'
+
+        self._thread = None
+
+    def start(self):
+        """Starts serving in a background thread.
+        """
+        self._thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """Stops serving.
+        """
+        # shutdown() waits for serve_forever() to return, so only if started
+        if self._thread is not None:
+            self.server.shutdown()
+            self._thread.join()
+            self._thread = None
+        self.server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def expire_sessions(self):
+        """Expires all the login sessions, as if they timed out.
+        """
+        with self._lock:
+            self.sessions.clear()
+
+    #
+    ## Request handling
+    #
+
+    def handle(self, request, method):
+        url = urlparse(request.path)
+        query = {k: v[0] for k, v in parse_qs(url.query).items()}
+
+        length = int(request.headers.get('Content-Length') or 0)
+        body = request.rfile.read(length) if length else b''
+
+        path = url.path.rstrip('/')
+        if not path.startswith(API):
+            return self._reply(request, None, 404, {'detail': 'Not found.'})
+        path = path[len(API):]
+
+        for route_method, template, pattern in self._routes:
+            match = pattern.match(path)
+            if match and route_method == method:
+                break
+        else:
+            return self._reply(request, None, 404, {'detail': 'Not found.'})
+
+        self._sleep(template)
+
+        if not self._take_token():
+            return self._reply(request, template, 429, {'detail': 'Too many requests'},
+                               {'Retry-After': str(self.retry_after)})
+
+        if self._rnd.random() < self.errors.get(template, self.errors.get('*', 0)):
+            return self._reply(request, template, 503, {'detail': 'Service unavailable'})
+
+        if template == '/login':
+            return self._login(request, body)
+
+        error = self._authenticate(request, method)
+        if error is not None:
+            return self._reply(request, template, *error)
+
+        if template == '/logout':
+            return self._reply(request, template, 200, {})
+
+        data = self._data(template, match.groupdict(), request)
+        if data is None:
+            return self._reply(request, template, 404, {'detail': 'Not found.'})
+
+        if template == '/orgs/:org_id/clients/events/search':
+            return self._reply(request, template, 200, self._search(query))
+
+        if isinstance(data, list):
+            return self._page(request, template, data, query)
+
+        self._reply(request, template, 200, data)
+
+    def _sleep(self, template):
+        latency = self.latency.get(template, self.latency.get('*'))
+        if latency is None:
+            return
+
+        if callable(latency):
+            seconds = latency()
+        elif isinstance(latency, tuple) and latency[0] == 'lognormal':
+            seconds = self._rnd.lognormvariate(latency[1], latency[2])
+        elif isinstance(latency, tuple):
+            seconds = self._rnd.uniform(*latency)
+        else:
+            seconds = latency
+
+        time.sleep(seconds)
+
+    def _take_token(self):
+        """Token bucket of the rate limit.
+        """
+        if self._bucket is None:
+            return True
+
+        rate, burst = self.rate_limit
+        with self._lock:
+            now = time.monotonic()
+            tokens = min(burst, self._bucket[0] + (now - self._bucket[1]) * rate)
+            self._bucket[1] = now
+            if tokens < 1:
+                self._bucket[0] = tokens
+                return False
+            self._bucket[0] = tokens - 1
+            return True
+
+    def _login(self, request, body):
+        try:
+            credentials = codec.loads(body)
+        except ValueError:
+            credentials = {}
+
+        email = credentials.get('email')
+        if email not in self.users or self.users[email] != credentials.get('password'):
+            return self._reply(request, '/login', 400, {'detail': 'Invalid email or password'})
+
+        sessionid = secrets.token_hex(16)
+        csrftoken = secrets.token_hex(16)
+        with self._lock:
+            self.sessions[sessionid] = (email, csrftoken, time.time() + self.session_ttl)
+
+        cookies = [
+            f'csrftoken={csrftoken}; Max-Age=31449600; Path=/',
+            f'sessionid={sessionid}; HttpOnly; Max-Age={int(self.session_ttl)}; Path=/',
+        ]
+        self._reply(request, '/login', 200, {}, cookies=cookies)
+
+    def _authenticate(self, request, method):
+        """Checks the token or the session and CSRF token.
+
+        Returns
+        -------
+        None if authenticated, otherwise the status and the body to reply with
+        """
+        authorization = request.headers.get('Authorization', '')
+        if authorization.startswith('Token '):
+            if authorization[6:] in self.tokens:
+                return None
+            return 401, {'detail': 'Invalid token.'}
+
+        cookies = {}
+        for cookie in request.headers.get('Cookie', '').split(';'):
+            if '=' in cookie:
+                k, v = cookie.strip().split('=', 1)
+                cookies[k] = v
+
+        with self._lock:
+            session = self.sessions.get(cookies.get('sessionid'))
+
+        if session is None or session[2] < time.time():
+            return 401, {'detail': 'Authentication credentials were not provided.'}
+
+        if method != 'GET' and request.headers.get('X-CSRFTOKEN') != session[1]:
+            return 403, {'detail': 'CSRF Failed: CSRF token missing or incorrect.'}
+
+        return None
+
+    def _data(self, template, ids, request):
+        """The object or list served for an endpoint, None if an ID is unknown.
+        """
+        data = self.data
+
+        if 'org_id' in ids and ids['org_id'] != data.org['id']:
+            return None
+        if 'site_id' in ids and ids['site_id'] not in data.sites_by_id:
+            return None
+        site_id = ids.get('site_id')
+
+        if template == '/self':
+            return {'email': next(iter(self.users), 'user@mistifi.com'), 'privileges': [
+                {'scope': 'org', 'org_id': data.org['id'], 'role': 'admin'}]}
+        if template == '/orgs/:org_id':
+            return data.org
+        if template == '/orgs/:org_id/sites':
+            return data.sites
+        if template == '/orgs/:org_id/inventory':
+            return [d for devices in data.devices.values() for d in devices]
+        if template == '/orgs/:org_id/wlans':
+            return data.wlans
+        if template == '/orgs/:org_id/clients/events/search':
+            return data.events
+        if template in ('/orgs/:org_id/sites/:site_id', '/sites/:site_id'):
+            return data.sites_by_id[site_id]
+        if template in ('/sites/:site_id/devices', '/sites/:site_id/stats/devices'):
+            return data.devices[site_id]
+        if template == '/sites/:site_id/stats/clients':
+            return data.clients[site_id]
+        if template in ('/sites/:site_id/wlans', '/sites/:site_id/wlans/derived'):
+            return [dict(w, site_id=site_id) for w in data.wlans]
+        if template == '/sites/:site_id/maps':
+            return data.maps[site_id]
+
+    def _search(self, query):
+        """Search results between `start` and `end`, newest first, capped at `limit`.
+        """
+        start = float(query.get('start', 0))
+        end = float(query.get('end', time.time()))
+        limit = int(query.get('limit', 1000))
+
+        results = [e for e in reversed(self.data.events) if start <= e['timestamp'] <= end][:limit]
+
+        return {'results': results, 'start': start, 'end': end, 'limit': limit, 'total': len(results)}
+
+    def _page(self, request, template, items, query):
+        limit = int(query.get('limit', 100))
+        page = int(query.get('page', 1))
+
+        headers = {
+            'X-Page-Limit': str(limit),
+            'X-Page-Page': str(page),
+            'X-Page-Total': str(len(items)),
+        }
+        self._reply(request, template, 200, items[(page - 1) * limit:page * limit], headers)
+
+    def _reply(self, request, template, status, body, headers=None, cookies=()):
+        with self._lock:
+            counts = self.stats.setdefault(template, {})
+            counts[status] = counts.get(status, 0) + 1
+
+        payload = codec.dumps(body).encode()
+
+        request.send_response(status)
+        request.send_header('Content-Type', 'application/json')
+        request.send_header('Content-Length', str(len(payload)))
+        for k, v in (headers or {}).items():
+            request.send_header(k, v)
+        for cookie in cookies:
+            request.send_header('Set-Cookie', cookie)
+        request.end_headers()
+        request.wfile.write(payload)
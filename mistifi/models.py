@@ -0,0 +1,161 @@
+import sys
+
+from . import codec
+
+
+class _Lazy:
+    """Descriptor for a nested field kept as compact JSON until it's read.
+
+    The decoded value isn't cached, so a field that is read once in a
+    while doesn't keep its dicts and lists alive.
+    """
+    def __init__(self, name):
+        self.name = name
+        self.slot = f'_{name}'
+
+    def __get__(self, obj, objtype=None):
+        if obj is None:
+            return self
+        raw = getattr(obj, self.slot)
+        return None if raw is None else codec.loads(raw)
+
+    def __set__(self, obj, value):
+        setattr(obj, self.slot, None if value is None else codec.dumps(value))
+
+
+class Model:
+    """Base class for compact resource models.
+
+    Subclasses list their fields in `__slots__`, so an instance holds only
+    the values and no per instance dict. Fields named in `_interned` hold
+    values repeated across many objects (site IDs, models, versions) and
+    share one string object. Fields named in `_lazy` hold nested objects,
+    which are kept as compact JSON and decoded when read; their slot is
+    the field name with a leading underscore. Keys of the JSON object
+    that are not fields are dropped.
+    """
+    __slots__ = ()
+
+    _interned = ()
+    _lazy = ()
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+
+        for name in cls._lazy:
+            setattr(cls, name, _Lazy(name))
+
+        cls._fields = tuple(
+            name[1:] if name[1:] in cls._lazy else name
+            for name in cls.__slots__
+        )
+        cls._plain = tuple(f for f in cls._fields if f not in cls._lazy and f not in cls._interned)
+
+    @classmethod
+    def from_json(cls, obj):
+        """Builds an instance from a decoded JSON object.
+
+        Args
+        ----
+        obj: `dict`
+            The object as returned by `resource()`
+
+        Returns
+        -------
+        The model instance
+        """
+        self = cls.__new__(cls)
+        get = obj.get
+
+        for name in cls._plain:
+            setattr(self, name, get(name))
+
+        for name in cls._interned:
+            value = get(name)
+            setattr(self, name, sys.intern(value) if type(value) is str else value)
+
+        for name in cls._lazy:
+            value = get(name)
+            setattr(self, f'_{name}', None if value is None else codec.dumps(value))
+
+        return self
+
+    def to_dict(self):
+        """Returns the fields as a dict, leaving out the ones that are None.
+        """
+        fields = ((name, getattr(self, name)) for name in self._fields)
+        return {name: value for name, value in fields if value is not None}
+
+    def __eq__(self, other):
+        if type(other) is not type(self):
+            return NotImplemented
+        return all(getattr(self, s) == getattr(other, s) for s in self.__slots__)
+
+    def __repr__(self):
+        key = getattr(self, 'id', None) or getattr(self, 'mac', None)
+        name = getattr(self, 'name', None) or getattr(self, 'ssid', None)
+        return f'<{type(self).__name__} {key} {name!r}>'
+
+
+class Site(Model):
+    """An organization's site.
+    """
+    __slots__ = (
+        'id', 'name', 'org_id', 'timezone', 'country_code', 'address',
+        'rftemplate_id', 'networktemplate_id', 'created_time', 'modified_time',
+        '_latlng', '_sitegroup_ids',
+    )
+    _interned = ('org_id', 'timezone', 'country_code', 'rftemplate_id', 'networktemplate_id')
+    _lazy = ('latlng', 'sitegroup_ids')
+
+
+class WLAN(Model):
+    """A WLAN of an organization, site or template.
+    """
+    __slots__ = (
+        'id', 'ssid', 'org_id', 'site_id', 'template_id', 'enabled', 'band',
+        'vlan_id', 'interface', 'created_time', 'modified_time',
+        '_auth',
+    )
+    _interned = ('ssid', 'org_id', 'site_id', 'template_id', 'band', 'interface')
+    _lazy = ('auth',)
+
+
+class Device(Model):
+    """A device from the inventory or the device lists and stats.
+    """
+    __slots__ = (
+        'id', 'name', 'mac', 'serial', 'model', 'type', 'org_id', 'site_id',
+        'map_id', 'version', 'status', 'ip', 'x', 'y', 'last_seen', 'uptime',
+        'created_time', 'modified_time',
+        '_radio_stat',
+    )
+    _interned = ('model', 'type', 'org_id', 'site_id', 'map_id', 'version', 'status')
+    _lazy = ('radio_stat',)
+
+
+class Client(Model):
+    """A wireless client from the client stats.
+    """
+    __slots__ = (
+        'mac', 'hostname', 'ip', 'ssid', 'wlan_id', 'ap_mac', 'ap_id', 'site_id',
+        'org_id', 'map_id', 'band', 'channel', 'proto', 'os', 'manufacture',
+        'rssi', 'snr', 'tx_rate', 'rx_rate', 'tx_bytes', 'rx_bytes',
+        'tx_pkts', 'rx_pkts', 'uptime', 'idle_time', 'last_seen', 'x', 'y',
+    )
+    _interned = (
+        'ssid', 'wlan_id', 'ap_mac', 'ap_id', 'site_id', 'org_id', 'map_id',
+        'band', 'proto', 'os', 'manufacture',
+    )
+
+
+class Map(Model):
+    """A floor plan of a site.
+    """
+    __slots__ = (
+        'id', 'name', 'org_id', 'site_id', 'type', 'width', 'height', 'ppm',
+        'url', 'thumbnail_url', 'created_time', 'modified_time',
+        '_wall_path',
+    )
+    _interned = ('org_id', 'site_id', 'type')
+    _lazy = ('wall_path',)
@@ -0,0 +1,221 @@
+import threading
+import time
+
+from concurrent.futures import ThreadPoolExecutor
+
+from ._log import logger
+
+from . import deadline as _deadline
+
+
+def merge(results):
+    """Merges the responses of several clouds into one list.
+
+    Lists are concatenated, the 'results' of search responses too, and
+    single objects are collected. Failed clouds (None) are left out.
+    """
+    merged = []
+    for jresp in results:
+        if jresp is None:
+            continue
+        if isinstance(jresp, dict) and isinstance(jresp.get('results'), list):
+            merged.extend(jresp['results'])
+        elif isinstance(jresp, list):
+            merged.extend(jresp)
+        else:
+            merged.append(jresp)
+
+    return merged
+
+
+class MultiCloud:
+    """One query over the organizations of several Mist clouds.
+
+    Holds a `MistiFi` instance, with its own session and auth, per cloud
+    and sends each query to all of them at the same time. The latency and
+    errors of each cloud are tracked.
+
+    Parameters
+    ----------
+    clients: `dict`
+        Cloud name to `MistiFi` instance, e.g. ``{'us': ..., 'eu': ...}``.
+
+    max_workers: `int`, optional
+        Maximum number of clouds called at the same time, all of them if
+        not set.
+
+    Examples:
+    ---------
+    >>> clouds = MultiCloud.from_tokens({"us": "ustoken", "eu": "eutoken"})
+    >>> clouds.comms()
+    >>> clouds.query("GET", uri="self")
+    >>> clouds.query("GET", uri="sites", per_cloud={"us": {"org_id": ":us_org_id"}, "eu": {"org_id": ":eu_org_id"}})
+    """
+    def __init__(self, clients, max_workers=None):
+
+        if not clients:
+            raise ValueError('At least one cloud is needed')
+
+        self.clients = dict(clients)
+
+        self.counters = {
+            name: {'calls': 0, 'errors': 0, 'total_latency': 0.0, 'last_latency': None, 'max_latency': 0.0}
+            for name in self.clients
+        }
+
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers or len(self.clients),
+                                            thread_name_prefix='mistifi-cloud')
+
+    @classmethod
+    def from_tokens(cls, tokens, max_workers=None, **kwargs):
+        """Creates a token instance per cloud.
+
+        Args
+        ----
+        tokens: `dict`
+            Cloud, 'us' or 'eu', to the token for that cloud
+
+        Keyword Args
+        ------------
+        Passed to every `MistiFi`, e.g. ``timeout`` or ``shared_transport``.
+        """
+        from .mistifi import MistiFi
+
+        return cls({cloud: MistiFi(cloud=cloud, token=token, **kwargs) for cloud, token in tokens.items()},
+                   max_workers=max_workers)
+
+    def comms(self):
+        """Calls `comms()` on all the clouds at the same time.
+        """
+        logger.info('Calling comms()')
+
+        for future in [self._executor.submit(client.comms) for client in self.clients.values()]:
+            future.result()
+
+    def _call(self, name, fn, kwargs):
+        start = time.perf_counter()
+        try:
+            jresp = fn(**kwargs)
+        except Exception:
+            logger.exception(f'Call to the {name} cloud raised')
+            jresp = None
+        latency = time.perf_counter() - start
+
+        with self._lock:
+            counters = self.counters[name]
+            counters['calls'] += 1
+            counters['errors'] += jresp is None
+            counters['total_latency'] += latency
+            counters['last_latency'] = latency
+            counters['max_latency'] = max(counters['max_latency'], latency)
+
+        if jresp is None:
+            logger.error(f'Call to the {name} cloud failed')
+
+        return jresp
+
+    def resource(self, method, jpayload=None, per_cloud=None, paginate=False, **kwargs):
+        """Sends one call to every cloud at the same time.
+
+        Args
+        ----
+        method: `str`
+            A valid HTTP method
+        jpayload: `dict`, optional
+            JSON payload, as for `MistiFi.resource()`
+        per_cloud: `dict`, optional
+            Cloud name to the kwargs only meant for it, e.g. its ``org_id``.
+            If set only these clouds are called.
+        paginate: `bool`, default False
+            Read all the pages with `MistiFi.iterate()`, GET only
+
+        Keyword Args
+        ------------
+        Passed to `MistiFi.resource()` of every cloud. A `deadline` is
+        shared by all the clouds.
+
+        Returns
+        -------
+        A dict of cloud name to response, None for the clouds which failed
+        """
+        logger.info('Calling resource()')
+
+        names = list(self.clients) if per_cloud is None else [n for n in per_cloud if n in self.clients]
+        deadline = kwargs.pop('deadline', None)
+
+        futures = {}
+        with _deadline.scope(deadline):
+            for name in names:
+                client = self.clients[name]
+                call_kwargs = {**kwargs, **(per_cloud or {}).get(name, {})}
+                if paginate:
+                    fn = _deadline.bind(lambda client=client, **kw: list(client.iterate(method, **kw)))
+                else:
+                    call_kwargs['jpayload'] = jpayload
+                    fn = _deadline.bind(lambda client=client, **kw: client.resource(method, **kw))
+                futures[name] = self._executor.submit(self._call, name, fn, call_kwargs)
+
+        return {name: future.result() for name, future in futures.items()}
+
+    def query(self, method='GET', tag=None, **kwargs):
+        """Sends one call to every cloud and merges the responses.
+
+        Args
+        ----
+        method: `str`, default 'GET'
+            A valid HTTP method
+        tag: `str`, optional
+            If set, the cloud name is added to every merged object under
+            this key
+
+        Keyword Args
+        ------------
+        Same as for `resource()`.
+
+        Returns
+        -------
+        A list with the objects of all the clouds which answered, see `merge()`
+        """
+        logger.info('Calling query()')
+
+        responses = self.resource(method, **kwargs)
+
+        if tag is None:
+            return merge(responses.values())
+
+        merged = []
+        for name, jresp in responses.items():
+            for obj in merge([jresp]):
+                if isinstance(obj, dict):
+                    obj[tag] = name
+                merged.append(obj)
+
+        return merged
+
+    def stats(self):
+        """Calls, errors and latency per cloud.
+
+        Returns
+        -------
+        A dict per cloud with the `calls`, `errors`, `error_rate` and the
+        `mean_latency`, `last_latency` and `max_latency` in seconds
+        """
+        with self._lock:
+            stats = {}
+            for name, counters in self.counters.items():
+                calls = counters['calls']
+                stats[name] = {
+                    'calls': calls,
+                    'errors': counters['errors'],
+                    'error_rate': counters['errors'] / calls if calls else 0.0,
+                    'mean_latency': counters['total_latency'] / calls if calls else None,
+                    'last_latency': counters['last_latency'],
+                    'max_latency': counters['max_latency'],
+                }
+            return stats
+
+    def close(self):
+        """Stops the worker threads.
+        """
+        self._executor.shutdown(wait=True)
@@ -0,0 +1,241 @@
+import heapq
+import itertools
+import threading
+import time
+
+from contextlib import contextmanager
+
+from ._log import logger
+
+
+# Default priority classes and their weights
+WEIGHTS = {'interactive': 16, 'normal': 4, 'bulk': 1}
+
+
+class _Ticket:
+    """A call waiting for its turn.
+    """
+    __slots__ = ('priority', 'tag', 'queued', 'event', 'cancelled')
+
+    def __init__(self, priority, tag):
+        self.priority = priority
+        self.tag = tag
+        self.queued = time.monotonic()
+        self.event = threading.Event()
+        self.cancelled = False
+
+
+class PriorityScheduler:
+    """Weighted fair queueing of the calls of one or more `MistiFi` instances.
+
+    Calls wait for a free slot, out of `max_concurrency`, and if `rate` is
+    set for their share of the rate limit. The waiting calls are served by
+    weighted fair queueing over their priority classes: each class gets
+    slots in proportion to its weight while it has calls waiting, so an
+    interactive call jumps the queue of a bulk export, while the export
+    still gets all the slots nobody else is using.
+
+    Parameters
+    ----------
+    max_concurrency: `int`, optional, default: 8
+        Maximum number of calls in flight.
+
+    rate: `float`, optional, default: None
+        Maximum calls per second, not limited if not set.
+
+    burst: `int`, optional, default: 1
+        Calls which can go out at once when the rate allows.
+
+    weights: `dict`, optional
+        Priority class to weight, `WEIGHTS` if not provided.
+
+    default: `str`, optional, default: 'normal'
+        Class of the calls made without a priority.
+
+    Examples:
+    ---------
+    >>> scheduler = PriorityScheduler(max_concurrency=8, rate=8)
+    >>> mist = MistiFi(token="thetoken", scheduler=scheduler)
+    >>> mist.comms()
+    >>> mist.iterate(org_id=":org_id", uri="inventory", priority="bulk")
+    >>> mist.resource("GET", uri="self", priority="interactive")
+    """
+    def __init__(self, max_concurrency=8, rate=None, burst=1, weights=None, default='normal'):
+
+        self.max_concurrency = max_concurrency
+        self.rate = rate
+        self.burst = burst
+        self.weights = dict(weights or WEIGHTS)
+        self.default = default
+
+        if default not in self.weights:
+            raise ValueError(f'The default class {default} has no weight')
+
+        self.counters = {p: {'queued': 0, 'dispatched': 0, 'cancelled': 0, 'wait': 0.0, 'max_wait': 0.0}
+                         for p in self.weights}
+
+        self._heap = []
+        self._counter = itertools.count()
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        self._vtime = 0.0
+        self._finish = {p: 0.0 for p in self.weights}
+        self._tokens = float(burst)
+        self._refilled = time.monotonic()
+
+    def _take_token(self):
+        """Takes a call out of the rate limit, False if there is none left.
+        """
+        if self.rate is None:
+            return True
+
+        now = time.monotonic()
+        self._tokens = min(self.burst, self._tokens + (now - self._refilled) * self.rate)
+        self._refilled = now
+
+        if self._tokens < 1:
+            return False
+        self._tokens -= 1
+        return True
+
+    def _dispatch(self):
+        """Lets the waiting calls with the lowest tags go, must be called holding the lock.
+        """
+        while self._heap and self._in_flight < self.max_concurrency:
+            ticket = self._heap[0][2]
+            if ticket.cancelled:
+                heapq.heappop(self._heap)
+                continue
+
+            if not self._take_token():
+                return
+
+            heapq.heappop(self._heap)
+            self._in_flight += 1
+            self._vtime = ticket.tag
+
+            waited = time.monotonic() - ticket.queued
+            counters = self.counters[ticket.priority]
+            counters['dispatched'] += 1
+            counters['wait'] += waited
+            counters['max_wait'] = max(counters['max_wait'], waited)
+
+            ticket.event.set()
+
+    def acquire(self, priority=None, timeout=None):
+        """Waits for the turn of a call.
+
+        Args
+        ----
+        priority: `str`, optional
+            The priority class, `default` if not set
+        timeout: `float`, optional
+            Maximum seconds to wait
+
+        Returns
+        -------
+        True when the call can go, False if the timeout passed first
+        """
+        priority = priority or self.default
+        if priority not in self.weights:
+            raise ValueError(f'Not a valid priority {sorted(self.weights)}')
+
+        with self._lock:
+            # Finish tag of weighted fair queueing, a class with a higher
+            # weight moves on faster in virtual time
+            tag = max(self._vtime, self._finish[priority]) + 1 / self.weights[priority]
+            self._finish[priority] = tag
+
+            ticket = _Ticket(priority, tag)
+            heapq.heappush(self._heap, (tag, next(self._counter), ticket))
+            self.counters[priority]['queued'] += 1
+            self._dispatch()
+
+        until = None if timeout is None else time.monotonic() + timeout
+
+        # Without a rate limit a released slot dispatches the next call,
+        # otherwise the waiters check again when the next token is due
+        poll = None if self.rate is None else 1 / self.rate
+        while True:
+            wait = poll
+            if until is not None:
+                left = until - time.monotonic()
+                wait = left if wait is None else min(wait, left)
+                if wait <= 0:
+                    wait = 0
+
+            if ticket.event.wait(wait):
+                return True
+
+            with self._lock:
+                self._dispatch()
+                if ticket.event.is_set():
+                    return True
+
+                if until is not None and time.monotonic() >= until:
+                    ticket.cancelled = True
+                    self.counters[priority]['cancelled'] += 1
+                    logger.error(f'Gave up waiting for a {priority} slot')
+                    return False
+
+    def try_acquire(self, priority=None):
+        """Takes a slot only if one is free now and no call is waiting for it.
+
+        Returns
+        -------
+        True if the slot was taken, to be freed with `release()`
+        """
+        priority = priority or self.default
+        if priority not in self.weights:
+            raise ValueError(f'Not a valid priority {sorted(self.weights)}')
+
+        with self._lock:
+            # Lets the waiting calls go first, dropping the cancelled ones
+            self._dispatch()
+            if self._heap or self._in_flight >= self.max_concurrency or not self._take_token():
+                return False
+
+            self._in_flight += 1
+            counters = self.counters[priority]
+            counters['queued'] += 1
+            counters['dispatched'] += 1
+            return True
+
+    def release(self):
+        """Frees the slot of a finished call.
+        """
+        with self._lock:
+            self._in_flight -= 1
+            self._dispatch()
+
+    @contextmanager
+    def slot(self, priority=None, timeout=None):
+        """Holds a slot for the duration of the block.
+
+        Yields
+        ------
+        True if the slot was acquired, False if the timeout passed first
+        """
+        acquired = self.acquire(priority, timeout)
+        try:
+            yield acquired
+        finally:
+            if acquired:
+                self.release()
+
+    def stats(self):
+        """Counters and waiting calls per priority class.
+
+        Returns
+        -------
+        A dict with the calls `in_flight` and per class the calls `queued`,
+        `dispatched` and `cancelled` so far, the ones `waiting` now and the
+        total and maximum `wait` in seconds
+        """
+        with self._lock:
+            classes = {p: dict(counters, waiting=0) for p, counters in self.counters.items()}
+            for _, _, ticket in self._heap:
+                if not ticket.cancelled:
+                    classes[ticket.priority]['waiting'] += 1
+
+            return {'in_flight': self._in_flight, 'classes': classes}
@@ -0,0 +1,126 @@
+import json
+
+
+_decoder = json.JSONDecoder()
+_WHITESPACE = ' \t\n\r'
+
+
+def compile_fields(fields):
+    """Builds the projection tree of a list of dotted field paths.
+
+    >>> compile_fields(['mac', 'radio_stat.band_5.channel'])
+    {'mac': True, 'radio_stat': {'band_5': {'channel': True}}}
+    """
+    if isinstance(fields, dict):
+        return fields
+
+    tree = {}
+    for field in fields:
+        node = tree
+        keys = field.split('.')
+        for key in keys[:-1]:
+            child = node.get(key)
+            if child is True:
+                # The whole parent is already kept
+                break
+            node = node.setdefault(key, {})
+        else:
+            node[keys[-1]] = True
+
+    return tree
+
+
+def project(obj, tree):
+    """Keeps only the fields of the projection tree in a decoded object.
+
+    Lists are projected item by item, missing fields are left out.
+    """
+    if isinstance(obj, list):
+        return [project(item, tree) for item in obj]
+
+    if not isinstance(obj, dict):
+        return obj
+
+    projected = {}
+    for key, sub in tree.items():
+        if key in obj:
+            projected[key] = obj[key] if sub is True else project(obj[key], sub)
+
+    return projected
+
+
+def _skip(text, i):
+    while i < len(text) and text[i] in _WHITESPACE:
+        i += 1
+    return i
+
+
+def iter_array(text, tree=None, decoder=None):
+    """Decodes the items of a top level JSON array one at a time.
+
+    Each item is projected as soon as it is decoded, so at most one full
+    item is held next to the kept fields of the others.
+
+    Yields
+    ------
+    The (projected) items
+    """
+    decoder = decoder or _decoder
+
+    i = _skip(text, 0)
+    if text[i:i + 1] != '[':
+        raise ValueError('Not a JSON array')
+
+    i = _skip(text, i + 1)
+    if text[i:i + 1] == ']':
+        return
+
+    while True:
+        item, i = decoder.raw_decode(text, i)
+        yield item if tree is None else project(item, tree)
+
+        i = _skip(text, i)
+        if text[i:i + 1] == ',':
+            i = _skip(text, i + 1)
+        elif text[i:i + 1] == ']':
+            if _skip(text, i + 1) != len(text):
+                raise ValueError('Extra data after the JSON array')
+            return
+        else:
+            raise ValueError(f'Expecting , or ] at {i}')
+
+
+def loads(text, fields, decoder=None):
+    """Decodes a JSON document keeping only the requested fields.
+
+    Top level arrays, what the list and stats endpoints return, are decoded
+    item by item. For objects the fields apply to the object itself, or to
+    each of the 'results' of a search response.
+
+    Args
+    ----
+    text: `str` or `bytes`
+        The JSON document
+    fields: `list`
+        Dotted paths of the fields to keep, e.g. ['mac', 'radio_stat.band_5']
+    decoder: `json.JSONDecoder`, optional
+        The decoder to use, e.g. an interning one
+
+    Returns
+    -------
+    The decoded and projected object
+    """
+    if isinstance(text, (bytes, bytearray)):
+        text = text.decode('utf-8')
+
+    tree = compile_fields(fields)
+    decoder = decoder or _decoder
+
+    if text[_skip(text, 0):][:1] == '[':
+        return list(iter_array(text, tree, decoder))
+
+    obj = decoder.decode(text)
+    if isinstance(obj, dict) and isinstance(obj.get('results'), list):
+        return dict(obj, results=project(obj['results'], tree))
+
+    return project(obj, tree)
@@ -0,0 +1,238 @@
+import heapq
+import itertools
+import random
+import threading
+import time
+
+from concurrent.futures import ThreadPoolExecutor
+
+from ._log import logger
+
+
+class _Job:
+    """A registered endpoint with its schedule and counters.
+    """
+    def __init__(self, name, interval, callback, method, kwargs):
+        self.name = name
+        self.interval = interval
+        self.callback = callback
+        self.method = method
+        self.kwargs = kwargs
+
+        # The deadline grid, jitter is added on top of it so it doesn't drift
+        self.deadline = None
+        self.running = False
+
+        self.runs = 0
+        self.skipped = 0
+        self.errors = 0
+        self.last_lag = 0.0
+        self.max_lag = 0.0
+        self.last_duration = 0.0
+
+
+class Poller:
+    """Periodic poller for the stats endpoints on a single `MistiFi` instance.
+
+    Registered endpoints are spread evenly over their intervals and each
+    run is shifted by a random jitter, so that the calls don't all go out
+    at once. Deadlines are kept on a fixed grid so they don't drift, a run
+    is skipped if the previous one of the same endpoint is still going and
+    the lag between the planned and the actual start is tracked.
+
+    All the calls go through one bounded pool of worker threads.
+
+    Parameters
+    ----------
+    mist: `MistiFi`
+        An instance on which `comms()` has already been called.
+
+    max_workers: `int`, optional, default: 4
+        Maximum number of calls running at the same time.
+
+    jitter: `float`, optional, default: 0.1
+        Maximum random shift of a run as a fraction of its interval.
+
+    Examples:
+    ---------
+    >>> poller = Poller(mist, max_workers=4)
+    >>> poller.add("devices", 60, callback=store, site_id=":site_id", uri="stats/devices")
+    >>> poller.start()
+    """
+    def __init__(self, mist, max_workers=4, jitter=0.1):
+
+        self.mist = mist
+        self.max_workers = max_workers
+        self.jitter = jitter
+
+        self.jobs = {}
+
+        self._heap = []
+        self._counter = itertools.count()
+        self._cond = threading.Condition()
+        self._stop = False
+        self._thread = None
+        self._executor = None
+
+    def add(self, name, interval, callback=None, method='GET', **kwargs):
+        """Registers an endpoint to be polled.
+
+        Args
+        ----
+        name: `str`
+            Unique name of the job
+        interval: `float`
+            Seconds between runs
+        callback: `callable`, optional
+            Called as ``callback(name, response)`` with every response
+        method: `str`, default 'GET'
+            A valid HTTP method
+
+        Keyword Args
+        ------------
+        Passed to `resource()` to build the endpoint URL and params.
+        """
+        logger.info(f'Adding job {name} every {interval}s')
+
+        if name in self.jobs:
+            raise ValueError(f'Job {name} already registered')
+
+        with self._cond:
+            job = _Job(name, interval, callback, method, kwargs)
+            self.jobs[name] = job
+
+            # Jobs added while running are placed into the next interval
+            if self._thread is not None:
+                self._schedule(job, time.monotonic() + random.uniform(0, interval))
+                self._cond.notify()
+
+    def remove(self, name):
+        """Unregisters a job, a run in progress is finished.
+        """
+        with self._cond:
+            self.jobs.pop(name)
+
+    def start(self):
+        """Starts polling in a background thread.
+        """
+        logger.info('Calling start()')
+
+        with self._cond:
+            if self._thread is not None:
+                return
+
+            self._stop = False
+            self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='mistifi-poller')
+
+            # Spread the first runs evenly over the interval of each job
+            now = time.monotonic()
+            jobs = list(self.jobs.values())
+            for i, job in enumerate(jobs):
+                self._schedule(job, now + job.interval * i / len(jobs))
+
+            self._thread = threading.Thread(target=self._run, daemon=True)
+            self._thread.start()
+
+    def stop(self, wait=True):
+        """Stops polling.
+
+        Args
+        ----
+        wait: `bool`, default True
+            Wait for the calls in progress to finish
+        """
+        logger.info('Calling stop()')
+
+        with self._cond:
+            self._stop = True
+            self._cond.notify()
+
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+        if self._executor is not None:
+            self._executor.shutdown(wait=wait)
+            self._executor = None
+        self._heap = []
+
+    def stats(self):
+        """Counters per job.
+
+        Returns
+        -------
+        A dict with ``runs``, ``skipped``, ``errors``, ``last_lag``,
+        ``max_lag`` and ``last_duration`` per job name
+        """
+        return {
+            name: {
+                'runs': job.runs,
+                'skipped': job.skipped,
+                'errors': job.errors,
+                'last_lag': job.last_lag,
+                'max_lag': job.max_lag,
+                'last_duration': job.last_duration,
+            }
+            for name, job in self.jobs.items()
+        }
+
+    def _schedule(self, job, deadline):
+        """Puts the job on the heap, must be called holding the lock.
+        """
+        job.deadline = deadline
+        fire = deadline + random.uniform(0, self.jitter * job.interval)
+        heapq.heappush(self._heap, (fire, next(self._counter), job))
+
+    def _run(self):
+        with self._cond:
+            while not self._stop:
+                if not self._heap:
+                    self._cond.wait()
+                    continue
+
+                fire, _, job = self._heap[0]
+                now = time.monotonic()
+                if fire > now:
+                    self._cond.wait(fire - now)
+                    continue
+
+                heapq.heappop(self._heap)
+
+                # Removed jobs are dropped here
+                if self.jobs.get(job.name) is not job:
+                    continue
+
+                if job.running:
+                    job.skipped += 1
+                    logger.error(f'Job {job.name} still running, run skipped')
+                else:
+                    job.running = True
+                    self._executor.submit(self._call, job, fire)
+
+                # Next deadline on the grid, missed ones are skipped
+                deadline = job.deadline + job.interval
+                if deadline < now:
+                    missed = int((now - deadline) // job.interval) + 1
+                    job.skipped += missed
+                    deadline += missed * job.interval
+                self._schedule(job, deadline)
+
+    def _call(self, job, fire):
+        # The lag is measured from the jittered start time
+        start = time.monotonic()
+        job.last_lag = start - fire
+        job.max_lag = max(job.max_lag, job.last_lag)
+
+        try:
+            resp = self.mist.resource(job.method, **job.kwargs)
+            if resp is None:
+                job.errors += 1
+            elif job.callback is not None:
+                job.callback(job.name, resp)
+        except Exception:
+            job.errors += 1
+            logger.exception(f'Job {job.name} failed')
+        finally:
+            job.runs += 1
+            job.last_duration = time.monotonic() - start
+            job.running = False
@@ -0,0 +1,144 @@
+import os
+import stat
+import tempfile
+import threading
+import time
+
+from ._log import logger
+
+from . import codec
+
+
+# The cookies that make up a login session
+COOKIES = ('sessionid', 'csrftoken')
+
+
+class SessionStore:
+    """On-disk store of login sessions, so a process start can skip `/login`.
+
+    The `sessionid` and `csrftoken` cookies of a username/password login are
+    kept in a JSON file, per cloud URL and username, with the expiry of the
+    session. The file is only readable by its owner (0600) and is ignored,
+    like an SSH key, if anyone else can read it.
+
+    Parameters
+    ----------
+    path: `str`, optional
+        The file the sessions are kept in, ``$MISTIFI_SESSIONS`` or
+        ``~/.mistifi/sessions.json`` if not provided.
+
+    margin: `float`, optional, default: 300
+        Seconds before their expiry that sessions are not used any more.
+
+    Examples:
+    ---------
+    >>> mist = MistiFi(username="user@example.com", session_store=SessionStore())
+    >>> mist.comms()
+    """
+    def __init__(self, path=None, margin=300):
+
+        if path is None:
+            path = os.environ.get('MISTIFI_SESSIONS') or os.path.join(
+                os.path.expanduser('~'), '.mistifi', 'sessions.json')
+
+        self.path = path
+        self.margin = margin
+
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(url, username):
+        return f'{url}|{username}'
+
+    def _read(self):
+        try:
+            mode = os.stat(self.path).st_mode
+        except FileNotFoundError:
+            return {}
+
+        if mode & (stat.S_IRWXG | stat.S_IRWXO):
+            logger.error(f'{self.path} is accessible by other users, stored sessions are ignored')
+            return {}
+
+        try:
+            with open(self.path) as f:
+                return codec.loads(f.read())
+        except (OSError, ValueError):
+            logger.exception(f'Could not read {self.path}')
+            return {}
+
+    def _write(self, sessions):
+        directory = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(directory, mode=0o700, exist_ok=True)
+
+        # Written to a private temporary file first, so that the file is
+        # never readable by others or left half written
+        fd, tmp = tempfile.mkstemp(dir=directory, prefix='.sessions.')
+        try:
+            with os.fdopen(fd, 'w') as f:
+                f.write(codec.dumps(sessions))
+            os.chmod(tmp, 0o600)
+            os.replace(tmp, self.path)
+        except BaseException:
+            os.unlink(tmp)
+            raise
+
+    def load(self, url, username):
+        """Returns the stored cookies of a session, or None if there is no valid one.
+
+        Args
+        ----
+        url: `str`
+            Base URL of the cloud
+        username: `str`
+            The login email
+
+        Returns
+        -------
+        A dict of cookie name to value
+        """
+        with self._lock:
+            stored = self._read().get(self._key(url, username))
+
+        if not stored:
+            return None
+
+        if stored.get('expires', 0) - self.margin <= time.time():
+            logger.debug(f'Stored session of {username} expired')
+            return None
+
+        cookies = stored.get('cookies') or {}
+        if not all(name in cookies for name in COOKIES):
+            return None
+
+        return cookies
+
+    def save(self, url, username, cookies, expires):
+        """Stores the cookies of a session.
+
+        Args
+        ----
+        url: `str`
+            Base URL of the cloud
+        username: `str`
+            The login email
+        cookies: `dict`
+            Cookie name to value, only the ones in `COOKIES` are kept
+        expires: `float`
+            Expiry of the session as a UNIX timestamp
+        """
+        with self._lock:
+            sessions = self._read()
+            sessions[self._key(url, username)] = {
+                'cookies': {name: cookies[name] for name in COOKIES if name in cookies},
+                'expires': expires,
+            }
+            self._write(sessions)
+
+    def invalidate(self, url, username):
+        """Drops the stored session, e.g. after the cloud rejected it.
+        """
+        with self._lock:
+            sessions = self._read()
+            if sessions.pop(self._key(url, username), None) is not None:
+                self._write(sessions)
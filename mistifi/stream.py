@@ -0,0 +1,274 @@
+import asyncio
+import queue
+import ssl
+import threading
+
+from ._log import logger
+
+from . import codec
+
+try:
+    import websocket
+except ImportError:
+    websocket = None
+
+
+# Marks the end of the stream in the message queue
+_CLOSED = object()
+
+
+class Stream:
+    """Client for the Mist WebSocket streaming API.
+
+    Uses the authentication of a `MistiFi` instance, either the token or the
+    session cookies from the username/password login, and keeps the
+    connection up in a background thread. Lost connections are re-established
+    with an exponential backoff and all the channels are subscribed again.
+
+    Messages are decoded and delivered to the `on_message` callback if one is
+    given, otherwise they are queued and read by iterating over the stream,
+    either with ``for`` or ``async for``.
+
+    Needs the `websocket-client` package, ``pip install mistifi[stream]``.
+
+    Parameters
+    ----------
+    mist: `MistiFi`
+        An instance on which `comms()` has already been called.
+
+    channels: `list`, optional
+        Channels to subscribe to, e.g. '/sites/:site_id/stats/devices'.
+
+    on_message: `callable`, optional
+        Called with every decoded message from the background thread.
+
+    url: `str`, optional
+        The streaming URL, derived from the instance cloud if not provided.
+
+    reconnect_delay: `float`, optional, default: 1
+        Seconds to wait before the first reconnect, doubled on each failure.
+
+    max_reconnect_delay: `float`, optional, default: 60
+        Upper limit of the reconnect delay.
+
+    maxsize: `int`, optional, default: 10000
+        Size of the message queue. When full the stream stops reading from
+        the socket until the consumer catches up.
+
+    Examples:
+    ---------
+    >>> stream = Stream(mist, channels=["/sites/:site_id/stats/devices"])
+    >>> stream.start()
+    >>> for message in stream:
+    ...     print(message["channel"], message["data"])
+    """
+    def __init__(self, mist, channels=None, on_message=None, url=None,
+                 reconnect_delay=1, max_reconnect_delay=60, maxsize=10000):
+
+        if websocket is None:
+            raise ImportError("Stream needs 'websocket-client', install it with 'pip install mistifi[stream]'")
+
+        self.mist = mist
+        self.channels = set(channels or [])
+        self.on_message = on_message
+        self.url = url or f"wss://{mist.cloud.replace('api.', 'api-ws.', 1)}/api-ws/v1/stream"
+        self.reconnect_delay = reconnect_delay
+        self.max_reconnect_delay = max_reconnect_delay
+
+        self.messages = queue.Queue(maxsize=maxsize)
+        self.connected = threading.Event()
+
+        self._ws = None
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        """Starts the background thread which connects and reads the messages.
+        """
+        logger.info('Calling start()')
+
+        if self._thread is not None and self._thread.is_alive():
+            return
+
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def close(self):
+        """Closes the connection and ends the iteration over the stream.
+        """
+        logger.info('Calling close()')
+
+        self._stop.set()
+
+        # Unblocks the reading thread, which then closes the connection
+        with self._lock:
+            if self._ws is not None:
+                self._ws.abort()
+
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def subscribe(self, channel):
+        """Subscribes to a channel, now if connected and after every reconnect.
+        """
+        logger.info(f'Subscribing to {channel}')
+
+        with self._lock:
+            self.channels.add(channel)
+            self._send({'subscribe': channel})
+
+    def unsubscribe(self, channel):
+        """Unsubscribes from a channel.
+        """
+        logger.info(f'Unsubscribing from {channel}')
+
+        with self._lock:
+            self.channels.discard(channel)
+            self._send({'unsubscribe': channel})
+
+    def _send(self, message):
+        """Sends a message if connected, must be called holding the lock.
+        """
+        if self._ws is None:
+            return
+        try:
+            self._ws.send(codec.dumps(message))
+        except (websocket.WebSocketException, OSError):
+            logger.exception(f'Could not send {message}, will be sent on reconnect')
+
+    def _connect(self):
+        """Opens the connection with the instance credentials.
+        """
+        options = {}
+
+        if self.mist.token:
+            options['header'] = [f'Authorization: Token {self.mist.token}']
+        else:
+            cookies = self.mist.session.cookies
+            options['cookie'] = '; '.join(f'{c.name}={c.value}' for c in cookies)
+            if 'X-CSRFTOKEN' in self.mist.session.headers:
+                options['header'] = [f"X-CSRFTOKEN: {self.mist.session.headers['X-CSRFTOKEN']}"]
+
+        if not self.mist.verify:
+            options['sslopt'] = {'cert_reqs': ssl.CERT_NONE}
+
+        # Only the connect part of a (connect, read) timeout
+        timeout = self.mist.timeout
+        if isinstance(timeout, tuple):
+            timeout = timeout[0]
+
+        logger.debug(f'Connecting to {self.url}')
+
+        return websocket.create_connection(self.url, timeout=timeout, **options)
+
+    def _run(self):
+        try:
+            self._run_connected()
+        except Exception:
+            logger.exception(f'Stream from {self.url} failed')
+        finally:
+            # Make room for the end marker if nobody is reading
+            try:
+                self.messages.put_nowait(_CLOSED)
+            except queue.Full:
+                self.messages.get_nowait()
+                self.messages.put_nowait(_CLOSED)
+
+    def _run_connected(self):
+        """Keeps the connection open, reconnecting until closed.
+        """
+        delay = self.reconnect_delay
+
+        while not self._stop.is_set():
+            try:
+                ws = self._connect()
+            except (websocket.WebSocketException, OSError) as e:
+                logger.error(f'Connection to {self.url} failed: {e}')
+                self._stop.wait(delay)
+                delay = min(delay * 2, self.max_reconnect_delay)
+                continue
+
+            try:
+                with self._lock:
+                    self._ws = ws
+                    for channel in self.channels:
+                        ws.send(codec.dumps({'subscribe': channel}))
+
+                # The read timeout is only for connecting
+                ws.settimeout(None)
+                self.connected.set()
+                delay = self.reconnect_delay
+
+                self._read(ws)
+            except (websocket.WebSocketException, OSError) as e:
+                if not self._stop.is_set():
+                    logger.error(f'Connection to {self.url} lost: {e}')
+            finally:
+                self.connected.clear()
+                with self._lock:
+                    self._ws = None
+                ws.close()
+
+            if not self._stop.is_set():
+                self._stop.wait(delay)
+
+    def _read(self, ws):
+        while not self._stop.is_set():
+            raw = ws.recv()
+
+            # An empty read means the server closed the connection
+            if not raw:
+                raise websocket.WebSocketConnectionClosedException('Closed by the server')
+
+            # A bad frame is dropped, not the connection
+            try:
+                message = codec.loads(raw)
+            except ValueError:
+                logger.error(f'Not a JSON message: {raw[:200]!r}')
+                continue
+            if not isinstance(message, dict):
+                logger.error(f'Not a JSON object message: {raw[:200]!r}')
+                continue
+
+            # Data is sent as a JSON string inside the message
+            if isinstance(message.get('data'), str):
+                try:
+                    message['data'] = codec.loads(message['data'])
+                except ValueError:
+                    pass
+
+            if self.on_message is not None:
+                try:
+                    self.on_message(message)
+                except Exception:
+                    logger.exception('on_message callback failed')
+            else:
+                self._put(message)
+
+    def _put(self, message):
+        """Queues a message, waiting for space but giving up if closed.
+        """
+        while not self._stop.is_set():
+            try:
+                self.messages.put(message, timeout=0.5)
+                return
+            except queue.Full:
+                continue
+
+    def __iter__(self):
+        while True:
+            message = self.messages.get()
+            if message is _CLOSED:
+                return
+            yield message
+
+    async def __aiter__(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            message = await loop.run_in_executor(None, self.messages.get)
+            if message is _CLOSED:
+                return
+            yield message
@@ -0,0 +1,136 @@
+import requests
+import responses
+import time
+import unittest
+
+from unittest import mock
+
+from ..breaker import CLOSED, HALF_OPEN, OPEN, CircuitBreaker, template
+from ..mistifi import MistiFi
+from ..priority import PriorityScheduler
+from .test_data.test_data import *
+
+
+class TestCircuitBreaker(unittest.TestCase):
+    '''Test class for the circuit breaker.
+    '''
+
+    def setUp(self):
+        self.breaker = CircuitBreaker(window=4, min_calls=4, open_for=0.05, half_open_calls=2)
+
+        self.mist = MistiFi(token='careparetoken', breaker=self.breaker)
+        self.mist.comms()
+
+    def test_template(self):
+        '''Test that IDs and MACs are replaced in the templates
+        '''
+        self.assertEqual(
+            '/api/v1/sites/:id/stats/devices/:mac',
+            template(f'https://api.mist.com/api/v1/sites/{site_ids[0]}/stats/devices/5c5b35000001?limit=5'))
+        self.assertEqual('/api/v1/self', template('https://api.mist.com/api/v1/self/'))
+
+    def test_states(self):
+        '''Test the transitions between the states
+        '''
+        key = '/api/v1/self'
+        for failed in (True, False, True, False):
+            self.assertTrue(self.breaker.allow(key))
+            self.breaker.record(key, failed, 0.01)
+        self.assertEqual(OPEN, self.breaker.state(key))
+        self.assertFalse(self.breaker.allow(key))
+
+        time.sleep(0.06)
+        self.assertTrue(self.breaker.allow(key))
+        self.assertTrue(self.breaker.allow(key))
+        self.assertEqual(HALF_OPEN, self.breaker.state(key))
+        # Only half_open_calls trial calls at a time
+        self.assertFalse(self.breaker.allow(key))
+
+        self.breaker.record(key, False, 0.01)
+        self.breaker.record(key, False, 0.01)
+        self.assertEqual(CLOSED, self.breaker.state(key))
+
+    def test_slow_calls(self):
+        '''Test that slow calls open the circuit
+        '''
+        breaker = CircuitBreaker(slow_call=1, window=4, min_calls=4)
+        for duration in (2, 2, 0.1, 0.1):
+            breaker.record('/api/v1/self', False, duration)
+
+        self.assertEqual(OPEN, breaker.state('/api/v1/self'))
+
+    @responses.activate
+    def test_fail_fast(self):
+        '''Test that calls to an open circuit are not sent
+        '''
+        url = f'https://api.mist.com/api/v1/sites/{site_ids[0]}/stats/devices'
+        responses.add(responses.GET, url, status=503, json={'detail': 'Service unavailable'})
+        responses.add(responses.GET, 'https://api.mist.com/api/v1/self', status=200, json={'email': 'a@b.c'})
+
+        # No backoff sleeps between the retries
+        self.mist.session.get_adapter(url).max_retries.backoff_factor = 0
+
+        # Retried by the session until they give up
+        for _ in range(4):
+            with self.assertRaises(requests.exceptions.RetryError):
+                self.mist.resource('GET', site_id=site_ids[0], uri='stats/devices')
+
+        sent = len(responses.calls)
+        for _ in range(2):
+            self.assertIsNone(self.mist.resource('GET', site_id=site_ids[0], uri='stats/devices'))
+
+        self.assertEqual(sent, len(responses.calls))
+
+        # Other endpoints are not affected
+        self.assertEqual({'email': 'a@b.c'}, self.mist.resource('GET', uri='self'))
+
+        stats = self.mist.stats()['breaker']['/api/v1/sites/:id/stats/devices']
+        self.assertEqual(OPEN, stats['state'])
+        self.assertEqual(2, stats['rejected'])
+        self.assertEqual(4, stats['failures'])
+
+    def test_no_response(self):
+        '''Test a call which got no response
+        '''
+        with mock.patch.object(self.mist, '_send', return_value=None):
+            self.assertIsNone(self.mist.resource('GET', uri='self'))
+
+        self.assertEqual(0, self.mist.stats()['breaker']['/api/v1/self']['calls'])
+
+    def test_cancel(self):
+        '''Test that a trial call which was not made is given back
+        '''
+        key = '/api/v1/self'
+        for _ in range(4):
+            self.breaker.record(key, True, 0.01)
+        time.sleep(0.06)
+
+        self.assertTrue(self.breaker.allow(key))
+        self.assertTrue(self.breaker.allow(key))
+        self.breaker.cancel(key)
+        self.assertTrue(self.breaker.allow(key))
+        self.assertFalse(self.breaker.allow(key))
+
+    def test_open_before_queue(self):
+        '''Test that a call to an open circuit fails fast without waiting for a slot
+        '''
+        scheduler = PriorityScheduler(max_concurrency=1)
+        mist = MistiFi(token='careparetoken', breaker=self.breaker, scheduler=scheduler)
+        mist.comms()
+
+        for _ in range(4):
+            self.breaker.record('/api/v1/self', True, 0.01)
+
+        # The only slot is taken by another call
+        self.assertTrue(scheduler.acquire('bulk'))
+
+        start = time.monotonic()
+        self.assertIsNone(mist.resource('GET', uri='self', priority='interactive', deadline=1))
+        self.assertLess(time.monotonic() - start, 0.5)
+        self.assertEqual(0, scheduler.stats()['classes']['interactive']['queued'])
+
+        scheduler.release()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,80 @@
+import json
+import responses
+import unittest
+
+from .. import codec
+from ..codec import InternTable
+from ..mistifi import MistiFi
+from .test_data.test_data import *
+
+DEVICES = [
+    {'id': f'00000000-0000-0000-1000-00000000000{i}', 'site_id': site_ids[0], 'model': 'AP43',
+     'version': '0.14.29', 'name': f'ap-{i}'}
+    for i in range(4)
+]
+
+
+class TestCodec(unittest.TestCase):
+    '''Test class for the interning decode mode.
+    '''
+
+    def test_shared(self):
+        '''Test repeated keys and values are one object across documents
+        '''
+        table = InternTable()
+        first = codec.loads(json.dumps(DEVICES), intern=table)
+        second = codec.loads(json.dumps(DEVICES).encode(), intern=table)
+
+        self.assertEqual(DEVICES, first)
+        self.assertEqual(DEVICES, second)
+
+        for device in first[1:] + second:
+            self.assertIs(first[0]['site_id'], device['site_id'])
+            self.assertIs(first[0]['model'], device['model'])
+            self.assertIs(next(iter(first[0])), next(iter(device)))
+
+    def test_bounds(self):
+        '''Test the table stops growing at maxsize and skips long strings
+        '''
+        table = InternTable(maxsize=3, max_length=8)
+        codec.loads('[{"a": "x"}, {"b": "y"}, {"c": "z"}]', intern=table)
+
+        self.assertEqual(3, len(table))
+
+        text = json.dumps([{'a': 'averylongvalue'}, {'a': 'averylongvalue'}])
+        items = codec.loads(text, intern=table)
+        self.assertIsNot(items[0]['a'], items[1]['a'])
+        self.assertIs(next(iter(items[0])), next(iter(items[1])))
+
+        table.clear()
+        self.assertEqual(0, len(table))
+
+    def test_fields(self):
+        '''Test interning together with a projection
+        '''
+        table = InternTable()
+        items = codec.loads(json.dumps(DEVICES), fields=['site_id', 'name'], intern=table)
+
+        self.assertEqual([{'site_id': d['site_id'], 'name': d['name']} for d in DEVICES], items)
+        self.assertIs(items[0]['site_id'], items[-1]['site_id'])
+
+    @responses.activate
+    def test_resource(self):
+        '''Test intern on the responses of resource()
+        '''
+        table = InternTable()
+        mist = MistiFi(token='careparetoken', intern=table)
+        mist.comms()
+
+        url = f'https://api.mist.com/api/v1/orgs/{org_id}/inventory'
+        responses.add(responses.GET, url, json=DEVICES)
+
+        first = mist.resource('GET', org_id=org_id, uri='inventory')
+        second = mist.resource('GET', org_id=org_id, uri='inventory')
+
+        self.assertEqual(DEVICES, second)
+        self.assertIs(first[0]['version'], second[3]['version'])
+
+
+if __name__ == '__main__':
+    unittest.main()
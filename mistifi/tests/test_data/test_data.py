@@ -1 +1,37 @@
-login_resp = {'Access-Control-Allow-Credentials': 'true', 'Access-Control-Allow-Origin': 'https://manage.mist.com', 'Access-Control-Expose-Headers': 'X-CSRFTOKEN,X-Requested-With,X-Page-Page,X-Page-Total', 'Allow': 'OPTIONS, POST', 'Cache-Control': 'no-cache, no-store', 'Content-Type': 'application/json', 'Date': 'Wed, 18 Mar 2020 14:23:11 GMT', 'Pragma': 'no-cache', 'Server': 'gunicorn/19.10.0', 'Set-Cookie': 'csrftoken=MoMzPM3ZGAYbEahsuCx1CviRPbBtQXE8; Domain=.mist.com; expires=Wed, 17-Mar-2021 14:23:11 GMT; Max-Age=31449600; Path=/; Secure, sessionid=35l5sucjl4agnhza7eyuvec10sj53ar0; Domain=.mist.com; expires=Wed, 01-Apr-2020 14:23:11 GMT; HttpOnly; Max-Age=1209600; Path=/; Secure', 'Vary': 'Origin', 'Via': 'kong/0.9.3', 'X-Frame-Options': 'SAMEORIGIN', 'X-Kong-Proxy-Latency': '0', 'X-Kong-Upstream-Latency': '44', 'Content-Length': '2', 'Connection': 'keep-alive'}
\ No newline at end of file
+login_resp = {'Access-Control-Allow-Credentials': 'true', 'Access-Control-Allow-Origin': 'https://manage.mist.com', 'Access-Control-Expose-Headers': 'X-CSRFTOKEN,X-Requested-With,X-Page-Page,X-Page-Total', 'Allow': 'OPTIONS, POST', 'Cache-Control': 'no-cache, no-store', 'Content-Type': 'application/json', 'Date': 'Wed, 18 Mar 2020 14:23:11 GMT', 'Pragma': 'no-cache', 'Server': 'gunicorn/19.10.0', 'Set-Cookie': 'csrftoken=MoMzPM3ZGAYbEahsuCx1CviRPbBtQXE8; Domain=.mist.com; expires=Wed, 17-Mar-2021 14:23:11 GMT; Max-Age=31449600; Path=/; Secure, sessionid=35l5sucjl4agnhza7eyuvec10sj53ar0; Domain=.mist.com; expires=Wed, 01-Apr-2020 14:23:11 GMT; HttpOnly; Max-Age=1209600; Path=/; Secure', 'Vary': 'Origin', 'Via': 'kong/0.9.3', 'X-Frame-Options': 'SAMEORIGIN', 'X-Kong-Proxy-Latency': '0', 'X-Kong-Upstream-Latency': '44', 'Content-Length': '2', 'Connection': 'keep-alive'}
+
+org_id = 'a3b5e5a8-6c3b-4f53-9cf4-1c1b2b0e4d11'
+site_ids = ['d0b3c6a2-0b7d-4a8e-9e6f-5b6a8f0c1d21', '7e5a1d0c-2f3b-4c6d-8e9f-0a1b2c3d4e51']
+
+org_resp = {'id': org_id, 'name': 'Mistifi Org', 'modified_time': 1584541391}
+
+sites_resp = [
+    {'id': site_ids[0], 'org_id': org_id, 'name': 'LON-DC1', 'modified_time': 1584541391},
+    {'id': site_ids[1], 'org_id': org_id, 'name': 'LON-DC2', 'modified_time': 1584541392},
+]
+
+inventory_resp = [
+    {'id': '00000000-0000-0000-1000-5c5b35000001', 'org_id': org_id, 'site_id': site_ids[0], 'name': 'ap-01',
+     'mac': '5c5b35000001', 'serial': 'A0000001', 'model': 'AP43', 'type': 'ap', 'modified_time': 1584541391},
+    {'id': '00000000-0000-0000-1000-5c5b35000002', 'org_id': org_id, 'site_id': site_ids[0], 'name': 'ap-02',
+     'mac': '5c5b35000002', 'serial': 'A0000002', 'model': 'AP43', 'type': 'ap', 'modified_time': 1584541391},
+    {'id': '00000000-0000-0000-1000-5c5b35000003', 'org_id': org_id, 'site_id': site_ids[1], 'name': 'ap-03',
+     'mac': '5c5b35000003', 'serial': 'A0000003', 'model': 'AP41', 'type': 'ap', 'modified_time': 1584541391},
+]
+
+wlans_resp = {
+    site_ids[0]: [
+        {'id': 'be22bba7-8e22-e1cf-5185-b880816fe2cf', 'org_id': org_id, 'site_id': site_ids[0], 'ssid': 'Corp', 'modified_time': 1584541391},
+        {'id': 'c1d2bba7-8e22-e1cf-5185-b880816fe2d0', 'org_id': org_id, 'site_id': site_ids[0], 'ssid': 'Guest', 'modified_time': 1584541391},
+    ],
+    site_ids[1]: [
+        {'id': 'be22bba7-8e22-e1cf-5185-b880816fe2cf', 'org_id': org_id, 'site_id': site_ids[1], 'ssid': 'Corp', 'modified_time': 1584541391},
+    ],
+}
+
+maps_resp = {
+    site_ids[0]: [
+        {'id': '845a23bf-bed9-e43c-4c86-6fa474be7ae5', 'org_id': org_id, 'site_id': site_ids[0], 'name': 'Floor 1', 'modified_time': 1584541391},
+    ],
+    site_ids[1]: [],
+}
@@ -0,0 +1,119 @@
+import time
+import unittest
+
+from unittest import mock
+
+from ..deadline import Deadline, bind, current, scope
+from ..mistifi import MistiFi, PageError
+from ..mockserver import MockData, MockMist
+
+USER = 'user@mistifi.com'
+
+
+class TestDeadline(unittest.TestCase):
+    '''Test class for the call timeouts and deadlines.
+    '''
+
+    def setUp(self):
+        self.mock = MockMist(data=MockData(sites=1, devices_per_site=1, clients_per_site=250, events=0)).start()
+        self.org_id = self.mock.data.org['id']
+        self.site_id = self.mock.data.sites[0]['id']
+
+        self.mist = MistiFi(token='mocktoken', base_url=self.mock.url, timeout=(1, 0.1))
+        self.mist.comms()
+
+    def tearDown(self):
+        self.mock.stop()
+
+    def test_scope(self):
+        '''Test that the earliest deadline is current and it is restored
+        '''
+        self.assertIsNone(current())
+
+        with scope(10) as outer:
+            self.assertEqual((1, 2), outer.timeout((1, 2)))
+            with scope(0.5) as inner:
+                self.assertIs(inner, current())
+                self.assertLessEqual(inner.timeout(10), 0.5)
+                # Later deadlines don't extend the budget
+                with scope(60):
+                    self.assertIs(inner, current())
+            self.assertIs(outer, current())
+            self.assertIs(outer, bind(current)())
+
+        self.assertIsNone(current())
+        self.assertTrue(Deadline(0).expired())
+
+    def test_read_timeout(self):
+        '''Test that the read timeout and retries stay within the deadline
+        '''
+        self.mock.latency = {'/orgs/:org_id': 0.3}
+
+        start = time.monotonic()
+        self.assertIsNone(self.mist.resource('GET', org_id=self.org_id, deadline=1))
+        self.assertLess(time.monotonic() - start, 1.2)
+
+    def test_login_again(self):
+        '''Test that logging in again stays within the deadline
+        '''
+        mist = MistiFi(username=USER, password='mockpass', base_url=self.mock.url)
+        mist.comms()
+
+        self.mock.latency = {'/login': 0.6}
+        self.mock.expire_sessions()
+
+        start = time.monotonic()
+        self.assertIsNone(mist.resource('GET', org_id=self.org_id, deadline=0.3))
+        self.assertLess(time.monotonic() - start, 0.5)
+
+        # Nothing is sent once the deadline passed
+        with scope(0.01):
+            time.sleep(0.02)
+            self.assertIsNone(mist._send_once('GET', f'{self.mock.url}api/v1/orgs/{self.org_id}'))
+
+    def test_login_timeout(self):
+        '''Test that a stalled login fails after the timeout
+        '''
+        self.mock.latency = {'/login': 1}
+        mist = MistiFi(username=USER, password='mockpass', base_url=self.mock.url, timeout=0.2)
+
+        start = time.monotonic()
+        self.assertFalse(mist.comms())
+        self.assertLess(time.monotonic() - start, 0.8)
+
+    def test_errors_raised(self):
+        '''Test that errors other than failed requests are raised within a deadline
+        '''
+        with mock.patch.object(self.mist, '_dispatch', side_effect=KeyError('bug')):
+            with self.assertRaises(KeyError):
+                self.mist.resource('GET', org_id=self.org_id, deadline=1)
+
+    def test_retry_after(self):
+        '''Test that a Retry-After longer than the deadline is cut short
+        '''
+        with MockMist(data=self.mock.data, rate_limit=(0.001, 1), retry_after=30) as mock:
+            mist = MistiFi(token='mocktoken', base_url=mock.url)
+            mist.comms()
+
+            self.assertIsNotNone(mist.resource('GET', org_id=self.org_id))
+
+            start = time.monotonic()
+            self.assertIsNone(mist.resource('GET', org_id=self.org_id, deadline=0.5))
+            self.assertLess(time.monotonic() - start, 1)
+
+    def test_pages(self):
+        '''Test that the pages of iterate() share one deadline
+        '''
+        self.mock.latency = {'/sites/:site_id/stats/clients': 0.04}
+
+        clients = []
+        with self.assertRaises(PageError) as cm:
+            clients.extend(self.mist.iterate(site_id=self.site_id, uri='stats/clients', limit=25, deadline=0.2))
+
+        self.assertEqual(len(clients), cm.exception.count)
+        self.assertTrue(0 < len(clients) < 250)
+        self.assertEqual(self.mock.data.clients[self.site_id][:len(clients)], clients)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,161 @@
+import copy
+import responses
+import unittest
+
+from ..delta import DeltaTracker, diff
+from ..mistifi import MistiFi
+from ..mockserver import MockData, MockMist
+from .test_data.test_data import *
+
+DEVICES = [
+    {'id': f'00000000-0000-0000-1000-00000000000{i}', 'name': f'ap-{i}', 'status': 'connected',
+     'uptime': 100 + i, 'radio': {'band_5': {'channel': 36, 'power': 17}}}
+    for i in range(4)
+]
+
+
+class TestDelta(unittest.TestCase):
+    '''Test class for the change detection between polls.
+    '''
+
+    def test_diff(self):
+        '''Test the field level diff of nested objects
+        '''
+        old = DEVICES[0]
+        new = copy.deepcopy(old)
+        new['radio']['band_5']['channel'] = 40
+        new['tags'] = ['lobby']
+        del new['uptime']
+
+        self.assertEqual(
+            {'radio.band_5.channel': (36, 40), 'tags': (None, ['lobby']), 'uptime': (100, None)},
+            diff(old, new))
+        self.assertEqual({}, diff(old, copy.deepcopy(old)))
+
+    def test_update(self):
+        '''Test added, removed and modified records between snapshots
+        '''
+        tracker = DeltaTracker()
+
+        records = tracker.update(DEVICES)
+        self.assertEqual(['added'] * 4, [r['op'] for r in records])
+        self.assertEqual(4, len(tracker))
+        self.assertEqual({}, tracker.previous)
+
+        self.assertEqual([], tracker.update(copy.deepcopy(DEVICES)))
+
+        snapshot = copy.deepcopy(DEVICES[1:])
+        snapshot[0]['status'] = 'disconnected'
+        snapshot.append(dict(DEVICES[0], id='00000000-0000-0000-1000-000000000009'))
+
+        records = {r['id']: r for r in tracker.update(snapshot)}
+        self.assertEqual({DEVICES[0]['id']: 'removed', DEVICES[1]['id']: 'modified',
+                          '00000000-0000-0000-1000-000000000009': 'added'},
+                         {k: r['op'] for k, r in records.items()})
+        self.assertEqual(snapshot[0], records[DEVICES[1]['id']]['object'])
+        self.assertNotIn('changes', records[DEVICES[1]['id']])
+
+    def test_diffs(self):
+        '''Test the changes and the removed objects with diffs
+        '''
+        tracker = DeltaTracker(diffs=True, ignore=['uptime'])
+        tracker.update(DEVICES)
+
+        snapshot = copy.deepcopy(DEVICES[:3])
+        for device in snapshot:
+            device['uptime'] += 60
+        snapshot[2]['radio']['band_5']['power'] = 12
+
+        records = tracker.update(snapshot)
+        self.assertEqual(2, len(records))
+
+        modified, removed = records
+        self.assertEqual({'op': 'modified', 'id': DEVICES[2]['id'], 'object': snapshot[2],
+                          'changes': {'radio.band_5.power': (17, 12)}}, modified)
+        self.assertEqual({'op': 'removed', 'id': DEVICES[3]['id'],
+                          'object': {k: v for k, v in DEVICES[3].items() if k != 'uptime'}}, removed)
+
+    def test_key(self):
+        '''Test objects identified by several fields
+        '''
+        tracker = DeltaTracker(key=('id', 'site_id'))
+        objects = [{'id': 'a', 'site_id': s} for s in site_ids]
+
+        self.assertEqual([('a', s) for s in site_ids], [r['id'] for r in tracker.update(objects)])
+        self.assertEqual([{'op': 'removed', 'id': ('a', site_ids[0])}], tracker.update(objects[1:]))
+
+    def test_repeats_and_missing_keys(self):
+        '''Test that repeated keys and objects without a key are skipped
+        '''
+        tracker = DeltaTracker(key=('id', 'site_id'), diffs=True)
+        objects = [{'id': 'a', 'site_id': site_ids[0], 'v': 1}, {'id': 'a', 'site_id': site_ids[0], 'v': 2},
+                   {'id': 'b'}]
+
+        records = tracker.update(objects)
+        self.assertEqual([{'op': 'added', 'id': ('a', site_ids[0]), 'object': objects[0]}], records)
+        self.assertEqual(1, len(tracker))
+
+        self.assertEqual([], DeltaTracker().update([{'name': 'no id'}]))
+
+    def test_same_value(self):
+        '''Test that a change only in the encoding is not reported with diffs
+        '''
+        tracker = DeltaTracker(diffs=True)
+        tracker.update([{'id': 'a', 'v': 1}])
+
+        self.assertEqual([], tracker.update([{'id': 'a', 'v': 1.0}]))
+        self.assertEqual([{'op': 'modified', 'id': 'a', 'object': {'id': 'a', 'v': 2}, 'changes': {'v': (1.0, 2)}}],
+                         tracker.update([{'id': 'a', 'v': 2}]))
+
+    @responses.activate
+    def test_poll(self):
+        '''Test polling an endpoint, keeping the snapshot when a call fails
+        '''
+        mist = MistiFi(token='careparetoken')
+        mist.comms()
+
+        url = f'https://api.mist.com/api/v1/sites/{site_ids[0]}/stats/devices'
+        responses.add(responses.GET, url, json=DEVICES)
+        responses.add(responses.GET, url, json={'detail': 'Not found'}, status=404)
+        responses.add(responses.GET, url, json=DEVICES[:2])
+
+        tracker = DeltaTracker()
+        self.assertEqual(4, len(tracker.poll(mist, site_id=site_ids[0], uri='stats/devices')))
+        self.assertIsNone(tracker.poll(mist, site_id=site_ids[0], uri='stats/devices'))
+        self.assertEqual(['removed'] * 2, [r['op'] for r in tracker.poll(mist, site_id=site_ids[0], uri='stats/devices')])
+
+    def test_poll_pages(self):
+        '''Test that the snapshot has the objects of all the pages
+        '''
+        with MockMist(data=MockData(sites=1, devices_per_site=1, clients_per_site=250, events=0)) as mock:
+            mist = MistiFi(token='mocktoken', base_url=mock.url)
+            mist.comms()
+
+            tracker = DeltaTracker(key='mac')
+            records = tracker.poll(mist, site_id=mock.data.sites[0]['id'], uri='stats/clients')
+
+        self.assertEqual(250, len(records))
+
+    @responses.activate
+    def test_poll_partial(self):
+        '''Test that the snapshot is kept when a page after the first fails
+        '''
+        mist = MistiFi(token='careparetoken')
+        mist.comms()
+
+        url = f'https://api.mist.com/api/v1/sites/{site_ids[0]}/stats/devices'
+        devices = [dict(DEVICES[0], id=str(i)) for i in range(100)]
+        responses.add(responses.GET, url, json=DEVICES)
+        responses.add(responses.GET, url, json=devices,
+                      match=[responses.matchers.query_param_matcher({'limit': '100', 'page': '1'})])
+        responses.add(responses.GET, url, json={'detail': 'Not found'}, status=404,
+                      match=[responses.matchers.query_param_matcher({'limit': '100', 'page': '2'})])
+
+        tracker = DeltaTracker()
+        tracker.poll(mist, site_id=site_ids[0], uri='stats/devices')
+
+        self.assertIsNone(tracker.poll(mist, site_id=site_ids[0], uri='stats/devices'))
+        self.assertEqual([], tracker.update(DEVICES))
+
+if __name__ == '__main__':
+    unittest.main()
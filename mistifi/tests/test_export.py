@@ -0,0 +1,112 @@
+import csv
+import gzip
+import json
+import os
+import tempfile
+import unittest
+
+from ..export import flatten, write_csv, write_ndjson, write_parquet
+from .test_data.test_data import *
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pq = None
+
+
+def _clients(n):
+    '''Generates client stats without holding them in a list.
+    '''
+    for i in range(n):
+        yield {'mac': f'{i:012x}', 'site_id': site_ids[i % 2], 'rssi': -40 - i % 30,
+               'wlan': {'ssid': 'Corp'}, 'tags': ['a', 'b']}
+
+
+class TestExport(unittest.TestCase):
+    '''Test class for the streaming export writers.
+    '''
+
+    def setUp(self):
+        self.dir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.dir.cleanup()
+
+    def test_flatten(self):
+        self.assertEqual({'a': 1, 'b.c': 2, 'b.d.e': [3]}, flatten({'a': 1, 'b': {'c': 2, 'd': {'e': [3]}}}))
+
+    def test_ndjson(self):
+        '''Test for NDJSON, compressed by the file extension
+        '''
+        path = os.path.join(self.dir.name, 'clients.ndjson.gz')
+
+        self.assertEqual(25, write_ndjson(_clients(25), path, batch_size=10))
+
+        with gzip.open(path, 'rt') as f:
+            self.assertEqual(list(_clients(25)), [json.loads(line) for line in f])
+
+        with self.assertRaises(ValueError):
+            write_ndjson(_clients(1), path, compression='zip')
+
+    def test_csv(self):
+        '''Test for CSV with flattened columns
+        '''
+        path = os.path.join(self.dir.name, 'clients.csv')
+
+        self.assertEqual(25, write_csv(_clients(25), path, batch_size=10))
+
+        with open(path, newline='') as f:
+            rows = list(csv.DictReader(f))
+
+        self.assertEqual(25, len(rows))
+        self.assertEqual(['mac', 'site_id', 'rssi', 'wlan.ssid', 'tags'], list(rows[0]))
+        self.assertEqual('Corp', rows[3]['wlan.ssid'])
+        self.assertEqual(['a', 'b'], json.loads(rows[3]['tags']))
+
+        write_csv(_clients(5), path, fields=['mac', 'rssi'], compression='bz2')
+
+    def test_csv_new_columns(self):
+        '''Test that columns only in later batches are logged
+        '''
+        path = os.path.join(self.dir.name, 'clients.csv')
+        items = list(_clients(3))
+        items[2]['vlan_id'] = 10
+
+        with self.assertLogs('logzero_default', level='ERROR') as logs:
+            self.assertEqual(3, write_csv(items, path, batch_size=2))
+        self.assertIn("['vlan_id']", logs.output[0])
+
+    @unittest.skipIf(pq is None, 'pyarrow not installed')
+    def test_parquet(self):
+        '''Test for Parquet with one row group per batch
+        '''
+        path = os.path.join(self.dir.name, 'clients.parquet')
+
+        self.assertEqual(25, write_parquet(_clients(25), path, batch_size=10))
+
+        parquet = pq.ParquetFile(path)
+        self.assertEqual(3, parquet.num_row_groups)
+
+        table = parquet.read()
+        self.assertEqual(['mac', 'site_id', 'rssi', 'wlan.ssid', 'tags'], table.column_names)
+        self.assertEqual([-40, -41], table.column('rssi').to_pylist()[:2])
+
+    @unittest.skipIf(pq is None, 'pyarrow not installed')
+    def test_parquet_schema(self):
+        '''Test that later batches not fitting the schema are not written wrong
+        '''
+        path = os.path.join(self.dir.name, 'clients.parquet')
+        clients = [{'mac': '5c5b35000001', 'rssi': -40, 'vlan': None},
+                   {'mac': '5c5b35000002', 'rssi': -40.5, 'vlan': 'corp'}]
+
+        with self.assertRaises(ValueError):
+            write_parquet(clients, path, batch_size=1)
+
+        schema = pa.schema([('mac', pa.string()), ('rssi', pa.float64()), ('vlan', pa.string())])
+        self.assertEqual(2, write_parquet(clients, path, batch_size=1, schema=schema))
+        self.assertEqual([-40, -40.5], pq.read_table(path).column('rssi').to_pylist())
+
+
+if __name__ == '__main__':
+    unittest.main()
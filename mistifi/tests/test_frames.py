@@ -0,0 +1,80 @@
+import unittest
+
+from ..frames import columns, record_batches, to_arrow, to_pandas
+
+try:
+    import pyarrow
+except ImportError:
+    pyarrow = None
+
+try:
+    import pandas
+except ImportError:
+    pandas = None
+
+CLIENTS = [
+    {'mac': '5c5b35000001', 'rssi': -40, 'wlan': {'ssid': 'Corp'}},
+    {'mac': '5c5b35000002', 'rssi': -55, 'wlan': {'ssid': 'Guest'}},
+    {'mac': '5c5b35000003', 'rssi': -70},
+]
+
+
+class TestFrames(unittest.TestCase):
+    '''Test class for the Arrow and pandas adapters.
+    '''
+
+    def test_columns(self):
+        '''Test that columns are built per batch with dotted paths
+        '''
+        batches = list(columns(iter(CLIENTS), batch_size=2))
+
+        self.assertEqual(2, len(batches))
+        self.assertEqual(
+            {'mac': ['5c5b35000001', '5c5b35000002'], 'rssi': [-40, -55], 'wlan.ssid': ['Corp', 'Guest']},
+            batches[0])
+        self.assertEqual({'mac': ['5c5b35000003'], 'rssi': [-70], 'wlan.ssid': [None]}, batches[1])
+
+        projected = list(columns(CLIENTS, fields=['wlan.ssid', 'mac.missing']))
+        self.assertEqual([{'wlan.ssid': ['Corp', 'Guest', None], 'mac.missing': [None, None, None]}], projected)
+
+    @unittest.skipIf(pyarrow is None, 'pyarrow not installed')
+    def test_to_arrow(self):
+        table = to_arrow(iter(CLIENTS), fields=['mac', 'wlan.ssid'], batch_size=2)
+
+        self.assertEqual(['mac', 'wlan.ssid'], table.column_names)
+        self.assertEqual(['Corp', 'Guest', None], table.column('wlan.ssid').to_pylist())
+
+        self.assertEqual(0, to_arrow([], fields=['mac']).num_rows)
+
+    @unittest.skipIf(pyarrow is None, 'pyarrow not installed')
+    def test_promoted_schema(self):
+        '''Test columns starting all None and ints followed by floats
+        '''
+        clients = [{'mac': '5c5b35000001', 'rssi': -40, 'vlan': None},
+                   {'mac': '5c5b35000002', 'rssi': -40.5, 'vlan': 'corp'}]
+
+        table = to_arrow(clients, batch_size=1)
+        self.assertEqual(pyarrow.float64(), table.schema.field('rssi').type)
+        self.assertEqual(pyarrow.string(), table.schema.field('vlan').type)
+        self.assertEqual([-40, -40.5], table.column('rssi').to_pylist())
+        self.assertEqual([None, 'corp'], table.column('vlan').to_pylist())
+
+        schema = pyarrow.schema([('mac', pyarrow.string()), ('rssi', pyarrow.int64())])
+        with self.assertRaises(pyarrow.ArrowInvalid):
+            list(record_batches(clients, schema=schema))
+
+        schema = pyarrow.schema([('rssi', pyarrow.float32()), ('vlan', pyarrow.string())])
+        table = to_arrow(clients, batch_size=1, schema=schema)
+        self.assertEqual(schema, table.schema)
+        self.assertEqual([-40, -40.5], table.column('rssi').to_pylist())
+
+    @unittest.skipIf(pandas is None, 'pandas not installed')
+    def test_to_pandas(self):
+        frame = to_pandas(iter(CLIENTS))
+
+        self.assertEqual(['mac', 'rssi', 'wlan.ssid'], list(frame.columns))
+        self.assertEqual(-55, frame['rssi'][1])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,135 @@
+import itertools
+import threading
+import time
+import unittest
+
+from ..hedge import Hedger, LatencyTracker
+from ..mistifi import MistiFi
+from ..mockserver import MockData, MockMist
+from ..priority import PriorityScheduler
+
+
+class TestHedger(unittest.TestCase):
+    '''Test class for the hedged GETs.
+    '''
+
+    def setUp(self):
+        # 10 fast calls to learn the latency, then a slow one and fast ones
+        self.delays = itertools.chain([0.01] * 10, [1], itertools.repeat(0.01))
+
+        self.mock = MockMist(data=MockData(sites=1, devices_per_site=1, clients_per_site=1, events=0),
+                             latency={'/self': lambda: next(self.delays)}).start()
+
+    def tearDown(self):
+        self.mock.stop()
+
+    def _client(self, hedger, scheduler=None):
+        mist = MistiFi(token='mocktoken', base_url=self.mock.url, hedger=hedger, scheduler=scheduler)
+        mist.comms()
+        for _ in range(10):
+            self.assertIsNotNone(mist.resource('GET', uri='self'))
+        return mist
+
+    def test_tracker(self):
+        '''Test the latency percentiles per template
+        '''
+        tracker = LatencyTracker(min_samples=10)
+        for ms in range(1, 101):
+            tracker.add('/api/v1/self', ms / 1000)
+
+        self.assertEqual(0.096, tracker.percentile('/api/v1/self', 95))
+        self.assertIsNone(tracker.percentile('/api/v1/orgs/:id', 95))
+
+    def test_hedged(self):
+        '''Test that a slow GET is hedged and the hedge answers first
+        '''
+        hedger = Hedger(percentile=90, min_samples=5)
+        mist = self._client(hedger)
+        # Warm-up calls slower than the first ones may be hedged too
+        before = mist.stats()['hedge']
+
+        start = time.monotonic()
+        self.assertIsNotNone(mist.resource('GET', uri='self'))
+        self.assertLess(time.monotonic() - start, 0.5)
+
+        stats = mist.stats()['hedge']
+        self.assertEqual(1, stats['hedged'] - before['hedged'])
+        self.assertEqual(1, stats['hedge_wins'] - before['hedge_wins'])
+        self.assertIn('/api/v1/self', stats['delays'])
+
+    def test_inline(self):
+        '''Test that calls which can't be hedged yet are made by the caller
+        '''
+        hedger = Hedger(min_samples=5)
+        threads = []
+
+        hedger.send('/api/v1/self', lambda: threads.append(threading.current_thread()))
+        self.assertEqual([threading.current_thread()], threads)
+
+    def test_busy_workers(self):
+        '''Test that hedges don't wait behind slow calls and calls past max_workers aren't queued
+        '''
+        hedger = Hedger(percentile=50, min_samples=5, max_workers=1)
+        for _ in range(5):
+            hedger.tracker.add('/api/v1/self', 0.01)
+
+        # The first request hangs, its hedge answers
+        hung = threading.Event()
+        calls = itertools.count()
+
+        def request():
+            if next(calls) == 0:
+                hung.wait(5)
+                return 'slow'
+            return 'fast'
+
+        start = time.monotonic()
+        self.assertEqual('fast', hedger.send('/api/v1/self', request))
+        self.assertLess(time.monotonic() - start, 0.5)
+
+        # The only worker is still taken by the hung request
+        threads = []
+        hedger.send('/api/v1/self', lambda: threads.append(threading.current_thread()))
+        self.assertEqual([threading.current_thread()], threads)
+        self.assertEqual(1, hedger.stats()['busy'])
+
+        hung.set()
+        hedger.close()
+
+    def test_scheduler_slot(self):
+        '''Test that a hedge is only sent with a free slot of the scheduler
+        '''
+        for slots, hedged in ((1, 0), (2, 1)):
+            self.delays = itertools.chain([0.01] * 10, [1], itertools.repeat(0.01))
+            scheduler = PriorityScheduler(max_concurrency=slots)
+            mist = self._client(Hedger(percentile=90, min_samples=5), scheduler)
+            before = mist.stats()['hedge']
+
+            self.assertIsNotNone(mist.resource('GET', uri='self'))
+
+            stats = mist.stats()['hedge']
+            self.assertEqual(hedged, stats['hedged'] - before['hedged'], slots)
+            self.assertEqual(1 - hedged, stats['no_slot'] - before['no_slot'], slots)
+
+            # The slot of the hedge is freed once the slow call is done
+            time.sleep(1)
+            self.assertEqual(0, scheduler.stats()['in_flight'])
+
+    def test_budget(self):
+        '''Test that no hedge is sent without budget
+        '''
+        hedger = Hedger(percentile=90, min_samples=5, budget=0, burst=0)
+        mist = self._client(hedger)
+        before = mist.stats()['hedge']
+
+        start = time.monotonic()
+        self.assertIsNotNone(mist.resource('GET', uri='self'))
+        self.assertGreaterEqual(time.monotonic() - start, 1)
+
+        stats = mist.stats()['hedge']
+        self.assertEqual(0, stats['hedged'])
+        self.assertEqual(1, stats['denied'] - before['denied'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,69 @@
+import json
+import os
+import subprocess
+import sys
+import unittest
+
+# The directory the mistifi package is in
+ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+HEAVY = ('requests', 'urllib3', 'logzero')
+
+
+def _run(code):
+    '''Runs the code in a fresh interpreter and returns its stdout and stderr.
+    '''
+    proc = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', code],
+        cwd=ROOT, capture_output=True, text=True, check=True)
+    return proc.stdout, proc.stderr
+
+
+def _import_time(stderr, module):
+    '''The cumulative import time of a module in microseconds from -X importtime.
+    '''
+    for line in stderr.splitlines():
+        parts = [p.strip() for p in line.split('|')]
+        if len(parts) == 3 and parts[2] == module:
+            return int(parts[1])
+    raise AssertionError(f'{module} not in the import time output')
+
+
+class TestImportTime(unittest.TestCase):
+    '''Benchmark guarding the startup cost of `import mistifi`.
+    '''
+
+    def test_import_is_lazy(self):
+        '''Test that importing the package doesn't load the transport or logging
+        '''
+        stdout, _ = _run(
+            'import sys, json, mistifi\n'
+            f'print(json.dumps([m for m in {HEAVY!r} if m in sys.modules]))')
+        self.assertEqual([], json.loads(stdout))
+
+    def test_transport_loaded_by_comms(self):
+        '''Test that requests is loaded by comms() and not before
+        '''
+        stdout, _ = _run(
+            'import sys, json\n'
+            'from mistifi import MistiFi\n'
+            'mist = MistiFi(token="careparetoken")\n'
+            'before = "requests" in sys.modules\n'
+            'mist.comms()\n'
+            'print(json.dumps([before, "requests" in sys.modules]))')
+        self.assertEqual([False, True], json.loads(stdout))
+
+    def test_import_time(self):
+        '''Test that `import mistifi` costs a fraction of importing requests
+        '''
+        _, stderr = _run('import mistifi')
+        mistifi_time = _import_time(stderr, 'mistifi')
+
+        _, stderr = _run('import requests')
+        requests_time = _import_time(stderr, 'requests')
+
+        self.assertLess(mistifi_time, requests_time / 5)
+
+
+if __name__ == '__main__':
+    unittest.main()
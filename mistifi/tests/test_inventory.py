@@ -0,0 +1,100 @@
+import responses
+import unittest
+
+from ..mistifi import MistiFi
+from ..inventory import Inventory
+from ..mockserver import MockData, MockMist
+from .test_data.test_data import *
+
+API_URL = 'https://api.mist.com/api/v1'
+
+
+class TestInventory(unittest.TestCase):
+    '''Test class for the in-memory inventory index.
+    '''
+
+    @responses.activate
+    def setUp(self):
+        self.mist = MistiFi(token='careparetoken')
+        self.mist.comms()
+
+        # The derived WLANs of a site include the org level ones
+        org_wlan = {'id': 'e8c1d2a7-8e22-e1cf-5185-b880816fe2d1', 'org_id': org_id, 'ssid': 'Guest'}
+        responses.add(responses.GET, f'{API_URL}/orgs/{org_id}/sites', json=sites_resp)
+        responses.add(responses.GET, f'{API_URL}/orgs/{org_id}/inventory', json=inventory_resp)
+        for site_id in site_ids:
+            responses.add(responses.GET, f'{API_URL}/sites/{site_id}/wlans/derived',
+                          json=wlans_resp[site_id] + [org_wlan])
+
+        self.inventory = Inventory(self.mist, org_id=org_id)
+        self.assertTrue(self.inventory.load())
+
+    def test_lookups(self):
+        '''Test for looking up by ID, name, MAC and serial
+        '''
+        self.assertEqual(sites_resp[0], self.inventory.site('LON-DC1'))
+        self.assertEqual(sites_resp[1], self.inventory.site(site_ids[1]))
+        self.assertIsNone(self.inventory.site('LON-DC3'))
+
+        device = inventory_resp[1]
+        self.assertEqual(device, self.inventory.device(device['id']))
+        self.assertEqual(device, self.inventory.device('ap-02'))
+        self.assertEqual(device, self.inventory.device('A0000002'))
+        self.assertEqual(device, self.inventory.device('5C:5B:35:00:00:02'))
+
+        self.assertEqual('Corp', self.inventory.wlan('Corp')['ssid'])
+        self.assertEqual(
+            'c1d2bba7-8e22-e1cf-5185-b880816fe2d0',
+            self.inventory.wlan('Guest', site_id=site_ids[0])['id'])
+        self.assertEqual(
+            'e8c1d2a7-8e22-e1cf-5185-b880816fe2d1',
+            self.inventory.wlan('Guest', site_id=site_ids[1])['id'])
+        self.assertEqual(
+            'be22bba7-8e22-e1cf-5185-b880816fe2cf',
+            self.inventory.wlan('Corp', site_id=site_ids[1])['id'])
+        self.assertIsNone(self.inventory.wlan('IoT', site_id=site_ids[0]))
+
+    def test_pages(self):
+        '''Test that all the pages of the lists are indexed
+        '''
+        with MockMist(data=MockData(sites=10, devices_per_site=20, clients_per_site=0, events=0)) as mock:
+            mist = MistiFi(token='mocktoken', base_url=mock.url)
+            mist.comms()
+
+            inventory = Inventory(mist, org_id=mock.data.org['id'])
+            self.assertTrue(inventory.load())
+
+        self.assertEqual('5c5b35009013', inventory.device('ap-0009-019')['mac'])
+        site_id = inventory.site('SITE-0009')['id']
+        self.assertEqual(mock.data.wlans[2]['id'], inventory.wlan('IoT', site_id=site_id)['id'])
+
+    @responses.activate
+    def test_load_failure_keeps_index(self):
+        '''Test that a failed refresh keeps the previous index
+        '''
+        responses.add(responses.GET, f'{API_URL}/orgs/{org_id}/sites', status=404, json={'detail': 'Not found'})
+        responses.add(responses.GET, f'{API_URL}/orgs/{org_id}/inventory', json=[])
+
+        self.assertFalse(self.inventory.load())
+        self.assertEqual(sites_resp[0], self.inventory.site('LON-DC1'))
+
+    @responses.activate
+    def test_resource_site_name(self):
+        '''Test for resource(site_name=...) resolution
+        '''
+        self.mist.inventory = self.inventory
+
+        responses.add(responses.GET, f'{API_URL}/sites/{site_ids[0]}/devices', json=inventory_resp[:2])
+        self.assertEqual(inventory_resp[:2], self.mist.resource('GET', site_name='LON-DC1', uri='devices'))
+
+        wlan = wlans_resp[site_ids[0]][0]
+        responses.add(responses.GET, f'{API_URL}/sites/{site_ids[0]}/wlans/{wlan["id"]}', json=wlan)
+        self.assertEqual(wlan, self.mist.resource('GET', site_name='LON-DC1', wlan_name='Corp'))
+
+        # Unknown names don't make a call
+        self.assertIsNone(self.mist.resource('GET', site_name='LON-DC3', uri='devices'))
+        self.assertEqual(2, len(responses.calls))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,111 @@
+import unittest
+from unittest import mock
+
+from .. import transport
+from ..loadtest import LatencyHistogram, LoadTest, format_report, open_sockets, rss
+from ..mistifi import MistiFi
+from ..mockserver import MockData, MockMist
+
+
+class TestLoadTest(unittest.TestCase):
+    '''Test class for the load test harness.
+    '''
+
+    @classmethod
+    def setUpClass(cls):
+        cls.mock = MockMist(data=MockData(sites=2, devices_per_site=2, clients_per_site=10, events=0)).start()
+        cls.org_id = cls.mock.data.org['id']
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.mock.stop()
+
+    def setUp(self):
+        self.mist = MistiFi(token='mocktoken', base_url=self.mock.url)
+        self.mist.comms()
+
+    def test_histogram(self):
+        '''Test the latency percentiles
+        '''
+        hist = LatencyHistogram()
+        for ms in range(1, 101):
+            hist.add(ms / 1000)
+
+        self.assertEqual(100, hist.count)
+        self.assertAlmostEqual(0.050, hist.percentile(50), delta=0.050 * 0.06)
+        self.assertAlmostEqual(0.099, hist.percentile(99), delta=0.099 * 0.06)
+        self.assertEqual(0.1, hist.percentile(100))
+        self.assertIsNone(LatencyHistogram().percentile(50))
+
+    def test_modes(self):
+        '''Test a run in each mode
+        '''
+        calls = [{'org_id': self.org_id}, {'org_id': self.org_id, 'uri': 'sites'}]
+
+        for mode in ('sync', 'threaded'):
+            report = LoadTest(self.mist, calls, concurrency=4, mode=mode).run(total=40)
+
+            self.assertEqual(40, report['calls'], mode)
+            self.assertEqual(0, report['errors'], mode)
+            self.assertGreater(report['throughput'], 0, mode)
+            self.assertLessEqual(report['latency']['p50'], report['latency']['p99'], mode)
+
+        self.assertEqual(40, self.mock.stats['/orgs/:org_id/sites'][200])
+
+        with self.assertRaises(ValueError):
+            LoadTest(self.mist, calls, mode='async')
+
+    def test_pool_size(self):
+        '''Test that the connection pool is grown to the concurrency for the run only
+        '''
+        calls = [{'org_id': self.org_id}]
+        adapter = self.mist.session.get_adapter(self.mock.url)
+        sizes = []
+
+        def call(kwargs):
+            grown = self.mist.session.get_adapter(self.mock.url)
+            sizes.append((grown._pool_maxsize, grown.max_retries))
+            return self.mist.resource('GET', **kwargs)
+
+        test = LoadTest(self.mist, calls, concurrency=16)
+        with mock.patch.object(test, '_call', side_effect=call):
+            test.run(total=4)
+
+        self.assertEqual({(16, adapter.max_retries)}, set(sizes))
+        self.assertIs(adapter, self.mist.session.get_adapter(self.mock.url))
+
+    def test_shared_pool(self):
+        '''Test that a shared transport is not replaced
+        '''
+        mist = MistiFi(token='mocktoken', base_url=self.mock.url, shared_transport=True)
+        mist.comms()
+        adapter = mist.session.get_adapter(self.mock.url)
+
+        with self.assertLogs('logzero_default', level='ERROR'):
+            report = LoadTest(mist, [{'org_id': self.org_id}], concurrency=64).run(total=8)
+
+        self.assertEqual(0, report['errors'])
+        self.assertIs(adapter, mist.session.get_adapter(self.mock.url))
+        transport.clear()
+
+    def test_errors_and_duration(self):
+        '''Test that failed calls are counted and duration ends the run
+        '''
+        calls = [{'org_id': self.org_id}, {'org_id': '00000000-0000-0000-0000-000000000000'}]
+
+        report = LoadTest(self.mist, calls, concurrency=2, sample_interval=0.05).run(duration=0.3)
+
+        self.assertGreater(report['calls'], 0)
+        self.assertAlmostEqual(0.5, report['error_rate'], delta=0.1)
+        self.assertGreaterEqual(len(report['samples']), 3)
+        self.assertIn('Errors:', format_report(report))
+
+    def test_process_stats(self):
+        '''Test the RSS and socket counters
+        '''
+        self.assertGreater(rss(), 0)
+        self.assertGreaterEqual(open_sockets(), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,157 @@
+import copy
+import responses
+import unittest
+
+from ..mistifi import MistiFi
+from ..mirror import Mirror
+from ..mockserver import MockData, MockMist
+from .test_data.test_data import *
+
+API_URL = 'https://api.mist.com/api/v1'
+
+
+class TestMirror(unittest.TestCase):
+    '''Test class for the local SQLite mirror.
+    '''
+
+    def setUp(self):
+        self.mist = MistiFi(token='careparetoken')
+        self.mist.comms()
+
+        self.mirror = Mirror(self.mist, org_id=org_id)
+
+    def tearDown(self):
+        self.mirror.close()
+
+    def _add_responses(self, sites=sites_resp, inventory=inventory_resp, wlans=wlans_resp):
+        '''Registers the responses for one full sync.
+        '''
+        responses.add(responses.GET, f'{API_URL}/orgs/{org_id}', json=org_resp)
+        responses.add(responses.GET, f'{API_URL}/orgs/{org_id}/sites', json=sites)
+        responses.add(responses.GET, f'{API_URL}/orgs/{org_id}/inventory', json=inventory)
+
+        for site_id in site_ids:
+            responses.add(responses.GET, f'{API_URL}/sites/{site_id}/wlans/derived', json=wlans[site_id])
+            responses.add(responses.GET, f'{API_URL}/sites/{site_id}/maps', json=maps_resp[site_id])
+
+    @responses.activate
+    def test_sync(self):
+        '''Test for the initial full sync and the local lookups
+        '''
+        self._add_responses()
+
+        changes = self.mirror.sync()
+        self.assertEqual({'upserted': 3, 'deleted': 0}, changes['devices'])
+        self.assertEqual({'upserted': 3, 'deleted': 0}, changes['wlans'])
+        self.assertIsNotNone(self.mirror.last_sync())
+
+        self.assertEqual(sites_resp[0], self.mirror.site('LON-DC1'))
+        self.assertIsNone(self.mirror.site('LON-DC3'))
+
+        self.assertEqual(
+            ['ap-01', 'ap-02'],
+            sorted(d['name'] for d in self.mirror.devices_on_site(site_ids[0])))
+
+        self.assertEqual(
+            ['LON-DC1', 'LON-DC2'],
+            sorted(s['name'] for s in self.mirror.sites_with_wlan('Corp')))
+        self.assertEqual(['LON-DC1'], [s['name'] for s in self.mirror.sites_with_wlan('Guest')])
+
+        self.assertEqual(inventory_resp[2], self.mirror.find('devices', mac='5c5b35000003')[0])
+
+        with self.assertRaises(ValueError):
+            self.mirror.find('devices', model='AP43')
+
+    @responses.activate
+    def test_sync_incremental(self):
+        '''Test that only changed objects are written on later syncs
+        '''
+        self._add_responses()
+        self.mirror.sync()
+
+        responses.reset()
+
+        inventory = copy.deepcopy(inventory_resp[:2])
+        inventory[0]['name'] = 'ap-01-renamed'
+        inventory[0]['modified_time'] += 10
+        self._add_responses(inventory=inventory)
+
+        changes = self.mirror.sync()
+        self.assertEqual({'upserted': 1, 'deleted': 1}, changes['devices'])
+        self.assertEqual({'upserted': 0, 'deleted': 0}, changes['sites'])
+
+        self.assertEqual('ap-01-renamed', self.mirror.get('devices', inventory[0]['id'])['name'])
+        self.assertIsNone(self.mirror.get('devices', inventory_resp[2]['id']))
+
+    @responses.activate
+    def test_sync_failed_fetch(self):
+        '''Test that a failed fetch keeps the mirrored objects
+        '''
+        self._add_responses()
+        self.mirror.sync()
+
+        responses.reset()
+        responses.add(responses.GET, f'{API_URL}/orgs/{org_id}', json=org_resp)
+        responses.add(responses.GET, f'{API_URL}/orgs/{org_id}/sites', json=sites_resp)
+        responses.add(responses.GET, f'{API_URL}/orgs/{org_id}/inventory', json={'detail': 'Error'}, status=404)
+        responses.add(responses.GET, f'{API_URL}/sites/{site_ids[0]}/wlans/derived', json=wlans_resp[site_ids[0]])
+        responses.add(responses.GET, f'{API_URL}/sites/{site_ids[1]}/wlans/derived', json={'detail': 'Error'}, status=404)
+        for site_id in site_ids:
+            responses.add(responses.GET, f'{API_URL}/sites/{site_id}/maps', json=maps_resp[site_id])
+
+        changes = self.mirror.sync()
+        self.assertIsNone(changes['devices'])
+        self.assertIsNone(changes['wlans'])
+        self.assertEqual({'upserted': 0, 'deleted': 0}, changes['maps'])
+
+        self.assertEqual(3, len(self.mirror.find('devices')))
+        self.assertEqual(['LON-DC1', 'LON-DC2'], sorted(s['name'] for s in self.mirror.sites_with_wlan('Corp')))
+
+    @responses.activate
+    def test_sync_partial_listing(self):
+        '''Test that a listing failing after its first page keeps the mirrored objects
+        '''
+        self._add_responses()
+        self.mirror.sync()
+
+        responses.reset()
+        devices = [dict(inventory_resp[0], id=f'00000000-0000-0000-1000-{i:012x}') for i in range(100)]
+        self._add_responses(inventory=devices)
+        responses.replace(responses.GET, f'{API_URL}/orgs/{org_id}/inventory', json=devices,
+                          match=[responses.matchers.query_param_matcher({'limit': '100', 'page': '1'})])
+        responses.add(responses.GET, f'{API_URL}/orgs/{org_id}/inventory', json={'detail': 'Error'}, status=404,
+                      match=[responses.matchers.query_param_matcher({'limit': '100', 'page': '2'})])
+
+        changes = self.mirror.sync()
+        self.assertIsNone(changes['devices'])
+        self.assertEqual(inventory_resp, self.mirror.find('devices'))
+
+    def test_sync_pages(self):
+        '''Test that all the pages of the lists are mirrored
+        '''
+        with MockMist(data=MockData(sites=10, devices_per_site=20, clients_per_site=0, events=0)) as mock:
+            mist = MistiFi(token='mocktoken', base_url=mock.url)
+            mist.comms()
+
+            mirror = Mirror(mist, org_id=mock.data.org['id'])
+            changes = mirror.sync()
+            mirror.close()
+
+        self.assertEqual({'upserted': 200, 'deleted': 0}, changes['devices'])
+        self.assertEqual({'upserted': 30, 'deleted': 0}, changes['wlans'])
+
+    @responses.activate
+    def test_org_wlans(self):
+        '''Test that org level WLANs are kept for every site they are on
+        '''
+        org_wlan = {'id': 'd0e2bba7-8e22-e1cf-5185-b880816fe2d1', 'org_id': org_id, 'ssid': 'Staff',
+                    'modified_time': 1584541391}
+        self._add_responses(wlans={site_id: wlans_resp[site_id] + [org_wlan] for site_id in site_ids})
+
+        changes = self.mirror.sync()
+        self.assertEqual({'upserted': 5, 'deleted': 0}, changes['wlans'])
+        self.assertEqual(['LON-DC1', 'LON-DC2'], sorted(s['name'] for s in self.mirror.sites_with_wlan('Staff')))
+
+
+if __name__ == '__main__':
+    unittest.main()
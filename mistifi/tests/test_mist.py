@@ -8,7 +8,7 @@ import unittest
 sys.path.append(os.path.dirname(__file__) + '../')
 #print(sys.path)
 
-from ..mistifi import MistiFi
+from ..mistifi import MistiFi, PageError
 from .test_data.test_data import *
 
 LOGIN_URL = 'https://api.mist.com/api/v1/login'
@@ -159,6 +159,74 @@ class TestMistiFi(unittest.TestCase):
         actual_params = self.mist._params(site_id=':site_id123', params={'param1':'value1', 'param2': 'value2'})
         self.assertEqual(expected_params, actual_params)
 
+    @responses.activate
+    def test_iterate(self):
+        '''Test for iterate() following the pages
+        '''
+        url = 'https://api.mist.com/api/v1/orgs/:org_id123/inventory'
+        pages = [[{'id': 1}, {'id': 2}], [{'id': 3}, {'id': 4}], [{'id': 5}]]
+        for page, items in enumerate(pages, 1):
+            responses.add(
+                responses.GET, url, json=items,
+                match=[responses.matchers.query_param_matcher({'limit': '2', 'page': str(page)})])
+
+        items = list(self.mist.iterate(org_id=':org_id123', uri='inventory', limit=2))
+        self.assertEqual([1, 2, 3, 4, 5], [i['id'] for i in items])
+        self.assertEqual(3, len(responses.calls))
+
+    @responses.activate
+    def test_iterate_search(self):
+        '''Test for iterate() following the 'next' links of search endpoints
+        '''
+        url = 'https://api.mist.com/api/v1/orgs/:org_id123/clients/search'
+        responses.add(
+            responses.GET, url, json={'results': [{'id': 1}], 'next': '/api/v1/orgs/:org_id123/clients/search?search_after=1'},
+            match=[responses.matchers.query_param_matcher({'limit': '100', 'page': '1'})])
+        responses.add(
+            responses.GET, url, json={'results': [{'id': 2}]},
+            match=[responses.matchers.query_param_matcher({'search_after': '1'})])
+
+        items = list(self.mist.iterate(org_id=':org_id123', uri='clients/search'))
+        self.assertEqual([1, 2], [i['id'] for i in items])
+
+    @responses.activate
+    def test_iterate_ignored_paging(self):
+        '''Test that iterate() stops when the paging params are ignored
+        '''
+        url = 'https://api.mist.com/api/v1/orgs/:org_id123/inventory'
+        responses.add(responses.GET, url, json=[{'id': 1}, {'id': 2}, {'id': 3}])
+
+        items = list(self.mist.iterate(org_id=':org_id123', uri='inventory', limit=2))
+        self.assertEqual([1, 2, 3], [i['id'] for i in items])
+        self.assertEqual(2, len(responses.calls))
+
+    @responses.activate
+    def test_iterate_error(self):
+        '''Test that iterate() raises on a failed page
+        '''
+        url = 'https://api.mist.com/api/v1/orgs/:org_id123/inventory'
+        responses.add(responses.GET, url, status=404, json={'detail': 'Not found'})
+
+        with self.assertRaises(PageError):
+            list(self.mist.iterate(org_id=':org_id123', uri='inventory'))
+
+    @responses.activate
+    def test_iterate_partial(self):
+        '''Test that a page failing after the first is not taken for the last
+        '''
+        url = 'https://api.mist.com/api/v1/orgs/:org_id123/inventory'
+        responses.add(responses.GET, url, json=[{'id': 1}, {'id': 2}],
+                      match=[responses.matchers.query_param_matcher({'limit': '2', 'page': '1'})])
+        responses.add(responses.GET, url, status=404, json={'detail': 'Not found'},
+                      match=[responses.matchers.query_param_matcher({'limit': '2', 'page': '2'})])
+
+        items = []
+        with self.assertRaises(PageError) as cm:
+            items.extend(self.mist.iterate(org_id=':org_id123', uri='inventory', limit=2))
+
+        self.assertEqual([1, 2], [i['id'] for i in items])
+        self.assertEqual((2, 2), (cm.exception.page, cm.exception.count))
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,118 @@
+import requests
+import threading
+import time
+import unittest
+
+from ..mistifi import MistiFi
+from ..mockserver import MockData, MockMist
+
+
+class TestMockMist(unittest.TestCase):
+    '''Test class for the local mock Mist API server.
+    '''
+
+    def setUp(self):
+        self.data = MockData(sites=3, devices_per_site=5, clients_per_site=250, events=50, seed=1)
+        self.mock = MockMist(data=self.data).start()
+
+    def tearDown(self):
+        self.mock.stop()
+
+    def test_stop_not_started(self):
+        '''Test that stop() returns on a server which was never started
+        '''
+        mock = MockMist(data=self.data)
+
+        stop = threading.Thread(target=mock.stop, daemon=True)
+        stop.start()
+        stop.join(timeout=5)
+
+        self.assertFalse(stop.is_alive())
+
+    def test_data_deterministic(self):
+        '''Test that the same seed generates the same data
+        '''
+        again = MockData(sites=3, devices_per_site=5, clients_per_site=250, events=50, seed=1)
+
+        self.assertEqual(self.data.org['id'], again.org['id'])
+        self.assertEqual([s['id'] for s in self.data.sites], [s['id'] for s in again.sites])
+
+    def test_token(self):
+        '''Test a MistiFi instance with a token against the mock server
+        '''
+        mist = MistiFi(token='mocktoken', base_url=self.mock.url)
+        mist.comms()
+
+        org_id = self.data.org['id']
+        self.assertEqual(self.data.org, mist.resource('GET', org_id=org_id))
+        self.assertEqual(3, len(mist.resource('GET', org_id=org_id, uri='sites')))
+        self.assertIsNone(mist.resource('GET', org_id='00000000-0000-0000-0000-000000000000'))
+
+        bad = MistiFi(token='wrong', base_url=self.mock.url)
+        bad.comms()
+        self.assertIsNone(bad.resource('GET', org_id=org_id))
+        self.assertEqual(1, self.mock.stats['/orgs/:org_id'][401])
+
+    def test_pagination(self):
+        '''Test that iterate() walks all the pages of the mock server
+        '''
+        mist = MistiFi(token='mocktoken', base_url=self.mock.url)
+        mist.comms()
+
+        site_id = self.data.sites[0]['id']
+        clients = list(mist.iterate(site_id=site_id, uri='stats/clients', limit=100))
+
+        self.assertEqual(self.data.clients[site_id], clients)
+        self.assertEqual(3, self.mock.stats['/sites/:site_id/stats/clients'][200])
+
+        resp = requests.get(f'{self.mock.url}api/v1/sites/{site_id}/stats/clients',
+                            params={'limit': 100, 'page': 3}, headers={'Authorization': 'Token mocktoken'})
+        self.assertEqual('250', resp.headers['X-Page-Total'])
+        self.assertEqual(50, len(resp.json()))
+
+    def test_login(self):
+        '''Test the login and CSRF cookie flow
+        '''
+        mist = MistiFi(username='user@mistifi.com', password='mockpass', base_url=self.mock.url)
+        mist.comms()
+
+        self.assertIn('sessionid', mist.session.cookies)
+        self.assertIn('csrftoken', mist.session.cookies)
+        self.assertEqual(self.data.org, mist.resource('GET', org_id=self.data.org['id']))
+
+        url = f'{self.mock.url}api/v1/logout'
+        self.assertEqual(403, mist.session.post(url, headers={'X-CSRFTOKEN': 'wrong'}).status_code)
+        self.assertEqual(200, mist.session.post(url).status_code)
+
+        self.mock.expire_sessions()
+        self.assertEqual(401, mist.session.get(f"{self.mock.url}api/v1/orgs/{self.data.org['id']}").status_code)
+
+    def test_rate_limit(self):
+        '''Test that calls over the rate limit get 429 with Retry-After
+        '''
+        headers = {'Authorization': 'Token mocktoken'}
+
+        with MockMist(data=self.data, rate_limit=(1, 2)) as mock:
+            codes = [requests.get(f'{mock.url}api/v1/self', headers=headers) for _ in range(3)]
+
+        self.assertEqual([200, 200, 429], [r.status_code for r in codes])
+        self.assertEqual('1', codes[-1].headers['Retry-After'])
+
+    def test_latency_errors(self):
+        '''Test the latency and error injection per endpoint
+        '''
+        self.mock.latency = {'/self': 0.2}
+        self.mock.errors = {'/orgs/:org_id': 1}
+
+        headers = {'Authorization': 'Token mocktoken'}
+
+        start = time.monotonic()
+        self.assertEqual(200, requests.get(f'{self.mock.url}api/v1/self', headers=headers).status_code)
+        self.assertGreaterEqual(time.monotonic() - start, 0.2)
+
+        url = f"{self.mock.url}api/v1/orgs/{self.data.org['id']}"
+        self.assertEqual(503, requests.get(url, headers=headers).status_code)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,71 @@
+import responses
+import sys
+import unittest
+
+from ..mistifi import MistiFi
+from ..models import Client, Device, Map, Site, WLAN
+from .test_data.test_data import *
+
+API_URL = 'https://api.mist.com/api/v1'
+
+
+class TestModels(unittest.TestCase):
+    '''Test class for the compact resource models.
+    '''
+
+    def test_from_json(self):
+        '''Test that fields are set, extra keys dropped and missing ones None
+        '''
+        device = Device.from_json(dict(inventory_resp[0], extra='dropped', radio_stat={'band_24': {'channel': 6}}))
+
+        self.assertEqual('ap-01', device.name)
+        self.assertEqual(site_ids[0], device.site_id)
+        self.assertIsNone(device.ip)
+        self.assertFalse(hasattr(device, '__dict__'))
+        self.assertFalse(hasattr(device, 'extra'))
+
+        # Nested fields are decoded when read
+        self.assertIsInstance(device._radio_stat, str)
+        self.assertEqual({'band_24': {'channel': 6}}, device.radio_stat)
+
+        self.assertEqual(dict(inventory_resp[0], radio_stat={'band_24': {'channel': 6}}), device.to_dict())
+        self.assertEqual(device, Device.from_json(device.to_dict()))
+
+        wlan = WLAN.from_json(wlans_resp[site_ids[0]][0])
+        self.assertEqual('Corp', wlan.ssid)
+        self.assertIsNone(wlan.auth)
+
+        self.assertEqual('LON-DC1', Site.from_json(sites_resp[0]).name)
+        self.assertEqual('Floor 1', Map.from_json(maps_resp[site_ids[0]][0]).name)
+
+    def test_interned(self):
+        '''Test that repeated values share one string object
+        '''
+        a = Client.from_json({'mac': '5c5b35000001', 'site_id': ''.join(['d0b3c6a2', site_ids[0][8:]])})
+        b = Client.from_json({'mac': '5c5b35000002', 'site_id': ''.join(['d0b3c6a2', site_ids[0][8:]])})
+
+        self.assertIs(a.site_id, b.site_id)
+        self.assertIs(a.site_id, sys.intern(site_ids[0]))
+
+    @responses.activate
+    def test_resource_model(self):
+        '''Test for resource(..., model=...) and iterate(..., model=...)
+        '''
+        mist = MistiFi(token='careparetoken')
+        mist.comms()
+
+        responses.add(responses.GET, f'{API_URL}/orgs/{org_id}/inventory', json=inventory_resp)
+        responses.add(responses.GET, f'{API_URL}/orgs/{org_id}/sites/{site_ids[0]}', json=sites_resp[0])
+
+        devices = mist.resource('GET', org_id=org_id, uri='inventory', model=Device)
+        self.assertEqual(['ap-01', 'ap-02', 'ap-03'], [d.name for d in devices])
+
+        site = mist.resource('GET', org_id=org_id, site_id=site_ids[0], model=Site)
+        self.assertEqual('LON-DC1', site.name)
+
+        devices = list(mist.iterate(org_id=org_id, uri='inventory', model=Device))
+        self.assertTrue(all(isinstance(d, Device) for d in devices))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,95 @@
+import time
+import unittest
+from unittest import mock
+
+from ..mistifi import MistiFi, PageError
+from ..mockserver import MockData, MockMist
+from ..multicloud import MultiCloud, merge
+
+
+class TestMultiCloud(unittest.TestCase):
+    '''Test class for the multi-cloud client.
+    '''
+
+    def setUp(self):
+        self.us = MockMist(data=MockData(sites=2, devices_per_site=1, clients_per_site=30, events=0, seed=1),
+                           latency={'*': 0.2}).start()
+        self.eu = MockMist(data=MockData(sites=3, devices_per_site=1, clients_per_site=1, events=0, seed=2),
+                           latency={'*': 0.2}, tokens=['eutoken']).start()
+
+        self.clouds = MultiCloud({
+            'us': MistiFi(token='mocktoken', base_url=self.us.url),
+            'eu': MistiFi(token='eutoken', base_url=self.eu.url),
+        })
+        self.clouds.comms()
+
+        self.per_cloud = {
+            'us': {'org_id': self.us.data.org['id']},
+            'eu': {'org_id': self.eu.data.org['id']},
+        }
+
+    def tearDown(self):
+        self.clouds.close()
+        self.us.stop()
+        self.eu.stop()
+
+    def test_merge(self):
+        '''Test merging lists, search results and objects
+        '''
+        self.assertEqual([1, 2, 3, {'id': 4}], merge([[1, 2], None, {'results': [3]}, {'id': 4}]))
+
+    def test_concurrent(self):
+        '''Test that the clouds are called at the same time and merged
+        '''
+        start = time.monotonic()
+        sites = self.clouds.query('GET', uri='sites', per_cloud=self.per_cloud, tag='cloud')
+        self.assertLess(time.monotonic() - start, 0.35)
+
+        self.assertEqual(5, len(sites))
+        self.assertEqual(['us'] * 2 + ['eu'] * 3, [s['cloud'] for s in sites])
+
+        stats = self.clouds.stats()
+        self.assertEqual(1, stats['us']['calls'])
+        self.assertGreaterEqual(stats['eu']['mean_latency'], 0.2)
+
+    def test_errors(self):
+        '''Test that a failing cloud is left out and counted
+        '''
+        self.clouds.clients['eu'].session.headers['Authorization'] = 'Token wrong'
+
+        responses = self.clouds.resource('GET', uri='sites', per_cloud=self.per_cloud)
+        self.assertIsNone(responses['eu'])
+        self.assertEqual(self.us.data.sites, responses['us'])
+
+        stats = self.clouds.stats()
+        self.assertEqual(1, stats['eu']['errors'])
+        self.assertEqual(0.0, stats['us']['error_rate'])
+
+    def test_paginate(self):
+        '''Test reading all the pages of every cloud
+        '''
+        per_cloud = {
+            'us': {'site_id': self.us.data.sites[0]['id']},
+            'eu': {'site_id': self.eu.data.sites[0]['id']},
+        }
+        clients = self.clouds.query('GET', uri='stats/clients', per_cloud=per_cloud, paginate=True, limit=10)
+
+        self.assertEqual(31, len(clients))
+
+    def test_paginate_partial(self):
+        '''Test that a cloud whose paging fails half way is counted as failed
+        '''
+        def iterate(method, **kwargs):
+            yield {'id': 1}
+            raise PageError('sites', 2, 1)
+
+        with mock.patch.object(self.clouds.clients['eu'], 'iterate', iterate):
+            responses = self.clouds.resource('GET', uri='sites', per_cloud=self.per_cloud, paginate=True)
+
+        self.assertIsNone(responses['eu'])
+        self.assertEqual(self.us.data.sites, responses['us'])
+        self.assertEqual(1, self.clouds.stats()['eu']['errors'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,109 @@
+import threading
+import time
+import unittest
+
+from concurrent.futures import ThreadPoolExecutor
+
+from ..mistifi import MistiFi
+from ..mockserver import MockData, MockMist
+from ..priority import PriorityScheduler
+
+
+class TestPriorityScheduler(unittest.TestCase):
+    '''Test class for the priority scheduler.
+    '''
+
+    def _queue(self, scheduler, priorities):
+        '''Queues a call per priority behind a held slot and returns the order they went in.
+        '''
+        order = []
+        lock = threading.Lock()
+
+        def call(priority):
+            with scheduler.slot(priority):
+                with lock:
+                    order.append(priority)
+
+        self.assertTrue(scheduler.acquire())
+        with ThreadPoolExecutor(max_workers=len(priorities)) as executor:
+            for priority in priorities:
+                executor.submit(call, priority)
+                # Queued in this order
+                while scheduler.stats()['classes'][priority]['waiting'] == 0 and priority not in order:
+                    time.sleep(0.001)
+            scheduler.release()
+
+        return order
+
+    def test_preempt(self):
+        '''Test that an interactive call goes before the queued bulk ones
+        '''
+        scheduler = PriorityScheduler(max_concurrency=1)
+        order = self._queue(scheduler, ['bulk'] * 5 + ['interactive'])
+
+        self.assertEqual('interactive', order[0])
+        self.assertEqual(5, scheduler.stats()['classes']['bulk']['dispatched'])
+
+    def test_weights(self):
+        '''Test that waiting classes share the slots by weight
+        '''
+        scheduler = PriorityScheduler(max_concurrency=1, weights={'high': 2, 'low': 1}, default='low')
+        order = self._queue(scheduler, ['low'] * 6 + ['high'] * 6)
+
+        # Two high for every low while both are waiting
+        self.assertEqual('high', order[0])
+        self.assertEqual(6, order[:9].count('high'))
+
+    def test_timeout(self):
+        '''Test that a call gives up waiting after its timeout
+        '''
+        scheduler = PriorityScheduler(max_concurrency=1)
+        self.assertTrue(scheduler.acquire())
+
+        self.assertFalse(scheduler.acquire('bulk', timeout=0.05))
+        self.assertEqual(1, scheduler.stats()['classes']['bulk']['cancelled'])
+
+        scheduler.release()
+        self.assertTrue(scheduler.acquire('bulk', timeout=0.05))
+
+    def test_rate(self):
+        '''Test that the calls are spread by the rate limit
+        '''
+        scheduler = PriorityScheduler(max_concurrency=10, rate=50)
+
+        start = time.monotonic()
+        for _ in range(6):
+            with scheduler.slot():
+                pass
+
+        self.assertGreaterEqual(time.monotonic() - start, 0.09)
+
+    def test_client(self):
+        '''Test interactive calls during a bulk export on one client
+        '''
+        with MockMist(data=MockData(sites=1, devices_per_site=1, clients_per_site=400, events=0),
+                      latency={'*': 0.02}) as mock:
+            scheduler = PriorityScheduler(max_concurrency=2)
+            mist = MistiFi(token='mocktoken', base_url=mock.url, scheduler=scheduler)
+            mist.comms()
+
+            site_id = mock.data.sites[0]['id']
+
+            def export():
+                return list(mist.iterate(site_id=site_id, uri='stats/clients', limit=10, priority='bulk'))
+
+            with ThreadPoolExecutor(max_workers=4) as executor:
+                exports = [executor.submit(export) for _ in range(4)]
+                time.sleep(0.1)
+                self.assertIsNotNone(mist.resource('GET', uri='self', priority='interactive'))
+                self.assertEqual([400] * 4, [len(f.result()) for f in exports])
+
+            classes = mist.stats()['scheduler']['classes']
+            # 40 full pages and an empty one per export
+            self.assertEqual(164, classes['bulk']['dispatched'])
+            self.assertEqual(1, classes['interactive']['dispatched'])
+            self.assertLess(classes['interactive']['max_wait'], 0.1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,81 @@
+import json
+import responses
+import unittest
+
+from .. import codec
+from ..mistifi import MistiFi
+from ..projection import compile_fields, iter_array, project
+from .test_data.test_data import *
+
+CLIENTS = [
+    {'mac': f'a4000000000{i}', 'rssi': -40 - i, 'hostname': f'client-{i}',
+     'radio': {'band': '5', 'channel': 36, 'stats': {'retries': i}}, 'tags': [{'k': 'a', 'v': i}]}
+    for i in range(3)
+]
+
+
+class TestProjection(unittest.TestCase):
+    '''Test class for the field projection while decoding.
+    '''
+
+    def test_compile(self):
+        '''Test the projection tree of dotted paths
+        '''
+        self.assertEqual(
+            {'mac': True, 'radio': {'band': True, 'stats': {'retries': True}}},
+            compile_fields(['mac', 'radio.band', 'radio.stats.retries']))
+        self.assertEqual({'radio': True}, compile_fields(['radio', 'radio.band']))
+
+    def test_project(self):
+        '''Test projecting nested objects and lists
+        '''
+        tree = compile_fields(['mac', 'radio.channel', 'tags.v', 'missing'])
+
+        self.assertEqual(
+            {'mac': 'a40000000000', 'radio': {'channel': 36}, 'tags': [{'v': 0}]},
+            project(CLIENTS[0], tree))
+
+    def test_iter_array(self):
+        '''Test decoding the items of an array one by one
+        '''
+        text = ' [ \n' + ' ,\n '.join(json.dumps(c) for c in CLIENTS) + ' ] \n'
+
+        self.assertEqual(CLIENTS, list(iter_array(text)))
+        self.assertEqual([], list(iter_array('[ ]')))
+        with self.assertRaises(ValueError):
+            list(iter_array('[1, 2] 3'))
+
+    def test_codec(self):
+        '''Test the codec with and without fields
+        '''
+        text = json.dumps(CLIENTS)
+
+        self.assertEqual(CLIENTS, codec.loads(text))
+        self.assertEqual([{'mac': c['mac'], 'rssi': c['rssi']} for c in CLIENTS],
+                         codec.loads(text.encode(), fields=['mac', 'rssi']))
+
+        search = json.dumps({'results': CLIENTS, 'next': '/next', 'total': 3})
+        self.assertEqual({'results': [{'mac': c['mac']} for c in CLIENTS], 'next': '/next', 'total': 3},
+                         codec.loads(search, fields=['mac']))
+
+        self.assertEqual({'rssi': -40}, codec.loads(json.dumps(CLIENTS[0]), fields=['rssi']))
+
+    @responses.activate
+    def test_resource(self):
+        '''Test fields on resource() and iterate()
+        '''
+        mist = MistiFi(token='careparetoken')
+        mist.comms()
+
+        url = f'https://api.mist.com/api/v1/sites/{site_ids[0]}/stats/clients'
+        responses.add(responses.GET, url, json=CLIENTS)
+
+        self.assertEqual([{'mac': c['mac'], 'radio': {'band': '5'}} for c in CLIENTS],
+                         mist.resource('GET', site_id=site_ids[0], uri='stats/clients', fields=['mac', 'radio.band']))
+
+        self.assertEqual([{'rssi': c['rssi']} for c in CLIENTS],
+                         list(mist.iterate(site_id=site_ids[0], uri='stats/clients', fields=['rssi'])))
+
+
+if __name__ == '__main__':
+    unittest.main()
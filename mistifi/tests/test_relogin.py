@@ -0,0 +1,90 @@
+import unittest
+
+from concurrent.futures import ThreadPoolExecutor
+from unittest import mock
+
+from ..mistifi import MistiFi
+from ..mockserver import MockData, MockMist
+
+USER = 'user@mistifi.com'
+
+
+class TestRelogin(unittest.TestCase):
+    '''Test class for logging in again when the session expires.
+    '''
+
+    def setUp(self):
+        self.mock = MockMist(data=MockData(sites=1, devices_per_site=1, clients_per_site=1, events=0)).start()
+        self.org_id = self.mock.data.org['id']
+
+        self.mist = MistiFi(username=USER, password='mockpass', base_url=self.mock.url)
+        self.mist.comms()
+
+    def tearDown(self):
+        self.mock.stop()
+
+    def test_csrf_header(self):
+        '''Test that the login sets the X-CSRFTOKEN header
+        '''
+        self.assertEqual(self.mist.session.cookies['csrftoken'], self.mist.session.headers['X-CSRFTOKEN'])
+        self.assertEqual({}, self.mist.logout())
+
+    def test_single_flight(self):
+        '''Test that concurrent calls failing with 401 log in again only once
+        '''
+        self.mock.expire_sessions()
+
+        with ThreadPoolExecutor(max_workers=16) as executor:
+            results = list(executor.map(lambda _: self.mist.resource('GET', org_id=self.org_id), range(32)))
+
+        self.assertEqual([self.mock.data.org] * 32, results)
+        self.assertEqual(2, self.mock.stats['/login'][200])
+
+    def test_csrf_failure(self):
+        '''Test that a 403 CSRF failure logs in again and replays the call
+        '''
+        self.mist.session.headers['X-CSRFTOKEN'] = 'stale'
+
+        self.assertEqual({}, self.mist.logout())
+        self.assertEqual(1, self.mock.stats['/logout'][403])
+        self.assertEqual(2, self.mock.stats['/login'][200])
+
+    def test_login_failure(self):
+        '''Test that a failed login doesn't exit and calls return None
+        '''
+        mist = MistiFi(username=USER, password='wrong', base_url=self.mock.url)
+        self.assertFalse(mist.comms())
+
+        # The rejected password is not sent again
+        for _ in range(3):
+            self.assertIsNone(mist.resource('GET', org_id=self.org_id))
+        self.assertEqual(1, self.mock.stats['/login'][400])
+
+        mist.password = self.mock.users[USER]
+        self.assertIsNotNone(mist.resource('GET', org_id=self.org_id))
+
+    def test_no_password_prompt(self):
+        '''Test that a restored session which expires fails the call without a prompt
+        '''
+        self.mist.password = ''
+        self.mock.expire_sessions()
+
+        with mock.patch('getpass.getpass', side_effect=AssertionError('prompted')):
+            self.assertIsNone(self.mist.resource('GET', org_id=self.org_id))
+        self.assertEqual(1, self.mock.stats['/login'][200])
+
+    def test_single_flight_failure(self):
+        '''Test that concurrent calls try a rejected password only once
+        '''
+        self.mist.password = 'changed'
+        self.mock.expire_sessions()
+
+        with ThreadPoolExecutor(max_workers=16) as executor:
+            results = list(executor.map(lambda _: self.mist.resource('GET', org_id=self.org_id), range(32)))
+
+        self.assertEqual([None] * 32, results)
+        self.assertEqual(1, self.mock.stats['/login'][400])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,70 @@
+import threading
+import time
+import responses
+import unittest
+
+from ..mistifi import MistiFi
+from ..scheduler import Poller
+from .test_data.test_data import *
+
+API_URL = 'https://api.mist.com/api/v1'
+
+
+class TestPoller(unittest.TestCase):
+    '''Test class for the polling scheduler.
+    '''
+
+    def setUp(self):
+        self.mist = MistiFi(token='careparetoken')
+        self.mist.comms()
+
+    @responses.activate
+    def test_polling(self):
+        '''Test that the jobs are run periodically with their responses
+        '''
+        responses.add(responses.GET, f'{API_URL}/sites/{site_ids[0]}/stats/devices', json=inventory_resp)
+        responses.add(responses.GET, f'{API_URL}/sites/{site_ids[1]}/stats/devices', status=404, json={'detail': 'Not found'})
+
+        received = []
+        poller = Poller(self.mist, max_workers=2, jitter=0.1)
+        poller.add('lon-dc1', 0.05, callback=lambda name, resp: received.append(name),
+                   site_id=site_ids[0], uri='stats/devices')
+        poller.add('lon-dc2', 0.05, site_id=site_ids[1], uri='stats/devices')
+
+        with self.assertRaises(ValueError):
+            poller.add('lon-dc1', 1)
+
+        poller.start()
+        time.sleep(0.5)
+        poller.stop()
+
+        stats = poller.stats()
+        self.assertGreaterEqual(stats['lon-dc1']['runs'], 5)
+        self.assertEqual(0, stats['lon-dc1']['errors'])
+        self.assertEqual(stats['lon-dc1']['runs'], len(received))
+        self.assertEqual(stats['lon-dc2']['runs'], stats['lon-dc2']['errors'])
+
+    @responses.activate
+    def test_overlapping_runs_skipped(self):
+        '''Test that a run is skipped while the previous one is still going
+        '''
+        responses.add(responses.GET, f'{API_URL}/sites/{site_ids[0]}/stats/devices', json=inventory_resp)
+
+        release = threading.Event()
+        poller = Poller(self.mist, jitter=0)
+        poller.add('slow', 0.02, callback=lambda name, resp: release.wait(5), site_id=site_ids[0], uri='stats/devices')
+
+        poller.start()
+        time.sleep(0.2)
+
+        stats = poller.stats()['slow']
+        self.assertEqual(0, stats['runs'])
+        self.assertGreater(stats['skipped'], 0)
+
+        release.set()
+        poller.stop()
+        self.assertGreaterEqual(poller.stats()['slow']['runs'], 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
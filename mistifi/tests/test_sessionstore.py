@@ -0,0 +1,105 @@
+import os
+import stat
+import tempfile
+import time
+import unittest
+
+from unittest.mock import patch
+
+from ..mistifi import MistiFi
+from ..mockserver import MockData, MockMist
+from ..sessionstore import SessionStore
+
+USER = 'user@mistifi.com'
+
+
+class TestSessionStore(unittest.TestCase):
+    '''Test class for the on-disk login session store.
+    '''
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, 'mistifi', 'sessions.json')
+        self.store = SessionStore(self.path)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_save_load(self):
+        '''Test that sessions are kept per URL and user until they expire
+        '''
+        cookies = {'sessionid': 'sid', 'csrftoken': 'csrf', 'other': 'x'}
+        self.store.save('https://api.mist.com/', USER, cookies, time.time() + 3600)
+        self.store.save('https://api.eu.mist.com/', USER, cookies, time.time() + 60)
+
+        self.assertEqual(0o600, stat.S_IMODE(os.stat(self.path).st_mode))
+        self.assertEqual({'sessionid': 'sid', 'csrftoken': 'csrf'}, self.store.load('https://api.mist.com/', USER))
+        self.assertIsNone(self.store.load('https://api.mist.com/', 'other@mistifi.com'))
+
+        # Expires within the margin
+        self.assertIsNone(self.store.load('https://api.eu.mist.com/', USER))
+
+        self.store.invalidate('https://api.mist.com/', USER)
+        self.assertIsNone(self.store.load('https://api.mist.com/', USER))
+
+    def test_permissions(self):
+        '''Test that a file readable by others is ignored
+        '''
+        self.store.save('https://api.mist.com/', USER, {'sessionid': 'sid', 'csrftoken': 'csrf'}, time.time() + 3600)
+        os.chmod(self.path, 0o644)
+
+        self.assertIsNone(self.store.load('https://api.mist.com/', USER))
+
+    def test_comms(self):
+        '''Test that comms() reuses a stored session and logs in again on 401
+        '''
+        with MockMist(data=MockData(sites=1, devices_per_site=1, clients_per_site=1, events=0)) as mock:
+            org_id = mock.data.org['id']
+
+            first = MistiFi(username=USER, password='mockpass', base_url=mock.url, session_store=self.store)
+            first.comms()
+            self.assertIsNotNone(self.store.load(mock.url, USER))
+
+            # No password needed, the stored session is used
+            second = MistiFi(username=USER, base_url=mock.url, session_store=self.store)
+            second.comms()
+            self.assertEqual(mock.data.org, second.resource('GET', org_id=org_id))
+            self.assertEqual(1, mock.stats['/login'][200])
+
+            # Without a password the expired session is not replaced on
+            # the calling threads, comms() asks for the password again
+            mock.expire_sessions()
+            self.assertIsNone(second.resource('GET', org_id=org_id))
+            self.assertIsNone(self.store.load(mock.url, USER))
+
+            with patch('getpass.getpass', return_value='mockpass') as getpass:
+                self.assertTrue(second.comms())
+            getpass.assert_called_once()
+            self.assertEqual(mock.data.org, second.resource('GET', org_id=org_id))
+            self.assertEqual(2, mock.stats['/login'][200])
+            self.assertEqual(1, mock.stats['/orgs/:org_id'][401])
+
+            # The new session was stored
+            self.assertEqual(second.session.cookies['sessionid'], self.store.load(mock.url, USER)['sessionid'])
+
+    def test_comms_revoked(self):
+        '''Test that comms() checks a stored session and asks for the password if it was revoked
+        '''
+        with MockMist(data=MockData(sites=1, devices_per_site=1, clients_per_site=1, events=0)) as mock:
+            org_id = mock.data.org['id']
+
+            MistiFi(username=USER, password='mockpass', base_url=mock.url, session_store=self.store).comms()
+            mock.expire_sessions()
+
+            mist = MistiFi(username=USER, base_url=mock.url, session_store=self.store)
+            with patch('getpass.getpass', return_value='mockpass') as getpass:
+                self.assertTrue(mist.comms())
+            getpass.assert_called_once()
+
+            self.assertEqual(1, mock.stats['/self'][401])
+            self.assertEqual(2, mock.stats['/login'][200])
+            self.assertEqual(mock.data.org, mist.resource('GET', org_id=org_id))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,218 @@
+import base64
+import hashlib
+import json
+import queue
+import socket
+import struct
+import threading
+import unittest
+
+from ..mistifi import MistiFi
+
+try:
+    from ..stream import Stream
+    import websocket
+except ImportError:
+    websocket = None
+
+WS_GUID = b'258EAFA5-E914-47DA-95CA-C5AB0DC85B11'
+
+
+class WebSocketStandIn:
+    '''A minimal local WebSocket server standing in for the Mist streaming API.
+
+    Records the handshake headers and the messages received and can push
+    text messages to, or drop, all the connected clients.
+    '''
+
+    def __init__(self):
+        self.sock = socket.socket()
+        self.sock.bind(('127.0.0.1', 0))
+        self.sock.listen()
+        self.url = f'ws://127.0.0.1:{self.sock.getsockname()[1]}/api-ws/v1/stream'
+
+        self.headers = []
+        self.received = queue.Queue()
+        self.clients = []
+
+        threading.Thread(target=self._accept, daemon=True).start()
+
+    def _accept(self):
+        while True:
+            try:
+                conn, _ = self.sock.accept()
+            except OSError:
+                return
+            threading.Thread(target=self._serve, args=(conn,), daemon=True).start()
+
+    def _serve(self, conn):
+        request = b''
+        while b'\r\n\r\n' not in request:
+            request += conn.recv(4096)
+
+        headers = {}
+        for line in request.decode().split('\r\n')[1:]:
+            if ': ' in line:
+                k, v = line.split(': ', 1)
+                headers[k.lower()] = v
+        self.headers.append(headers)
+
+        accept = base64.b64encode(hashlib.sha1(headers['sec-websocket-key'].encode() + WS_GUID).digest())
+        conn.sendall(
+            b'HTTP/1.1 101 Switching Protocols\r\nUpgrade: websocket\r\nConnection: Upgrade\r\n'
+            b'Sec-WebSocket-Accept: ' + accept + b'\r\n\r\n')
+        self.clients.append(conn)
+
+        try:
+            while True:
+                opcode, payload = self._read_frame(conn)
+                if opcode == 8:
+                    break
+                self.received.put(json.loads(payload))
+        except (OSError, ValueError):
+            pass
+        finally:
+            if conn in self.clients:
+                self.clients.remove(conn)
+            conn.close()
+
+    @staticmethod
+    def _read_exact(conn, n):
+        data = b''
+        while len(data) < n:
+            chunk = conn.recv(n - len(data))
+            if not chunk:
+                raise OSError('Closed')
+            data += chunk
+        return data
+
+    def _read_frame(self, conn):
+        b1, b2 = self._read_exact(conn, 2)
+        length = b2 & 0x7f
+        if length == 126:
+            length, = struct.unpack('!H', self._read_exact(conn, 2))
+        elif length == 127:
+            length, = struct.unpack('!Q', self._read_exact(conn, 8))
+        mask = self._read_exact(conn, 4) if b2 & 0x80 else b'\x00' * 4
+        payload = bytes(b ^ mask[i % 4] for i, b in enumerate(self._read_exact(conn, length)))
+        return b1 & 0x0f, payload
+
+    def send(self, message):
+        self.send_raw(json.dumps(message))
+
+    def send_raw(self, text):
+        payload = text.encode()
+        header = bytes([0x81, len(payload)]) if len(payload) < 126 else \
+            bytes([0x81, 126]) + struct.pack('!H', len(payload))
+        for conn in list(self.clients):
+            conn.sendall(header + payload)
+
+    def drop(self):
+        for conn in list(self.clients):
+            try:
+                conn.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+
+    def close(self):
+        self.sock.close()
+        self.drop()
+
+
+@unittest.skipIf(websocket is None, 'websocket-client not installed')
+class TestStream(unittest.TestCase):
+    '''Test class for the WebSocket streaming client.
+    '''
+
+    def setUp(self):
+        self.server = WebSocketStandIn()
+
+        self.mist = MistiFi(token='careparetoken')
+        self.mist.comms()
+
+    def tearDown(self):
+        self.server.close()
+
+    def test_default_url(self):
+        '''Test that the streaming URL follows the cloud
+        '''
+        self.assertEqual('wss://api-ws.mist.com/api-ws/v1/stream', Stream(self.mist).url)
+        self.assertEqual(
+            'wss://api-ws.eu.mist.com/api-ws/v1/stream',
+            Stream(MistiFi(cloud='eu', token='careparetoken')).url)
+
+    def test_iterate(self):
+        '''Test for subscribing and reading the messages by iterating
+        '''
+        stream = Stream(self.mist, channels=['/sites/:site_id/stats/devices'], url=self.server.url)
+        stream.start()
+
+        self.assertEqual({'subscribe': '/sites/:site_id/stats/devices'}, self.server.received.get(timeout=5))
+        self.assertEqual('Token careparetoken', self.server.headers[0]['authorization'])
+
+        data = {'mac': '5c5b35000001', 'num_clients': 3}
+        self.server.send({'event': 'data', 'channel': '/sites/:site_id/stats/devices', 'data': json.dumps(data)})
+
+        message = next(iter(stream))
+        self.assertEqual(data, message['data'])
+
+        stream.close()
+        self.assertEqual([], list(stream))
+
+    def test_timeout_tuple(self):
+        '''Test connecting with a (connect, read) timeout
+        '''
+        mist = MistiFi(token='careparetoken', timeout=(3, 30))
+        mist.comms()
+
+        stream = Stream(mist, channels=['/sites/:site_id/stats/devices'], url=self.server.url)
+        stream.start()
+
+        self.assertEqual({'subscribe': '/sites/:site_id/stats/devices'}, self.server.received.get(timeout=5))
+        self.assertTrue(stream.connected.wait(5))
+
+        stream.close()
+
+    def test_reconnect(self):
+        '''Test that the channels are subscribed again after a reconnect
+        '''
+        received = queue.Queue()
+        stream = Stream(
+            self.mist, channels=['/sites/:site_id/stats/clients'], url=self.server.url,
+            on_message=received.put, reconnect_delay=0.05)
+        stream.start()
+        self.server.received.get(timeout=5)
+
+        stream.subscribe('/sites/:site_id/stats/devices')
+        self.assertEqual({'subscribe': '/sites/:site_id/stats/devices'}, self.server.received.get(timeout=5))
+
+        self.server.drop()
+
+        resubscribed = {self.server.received.get(timeout=5)['subscribe'] for _ in range(2)}
+        self.assertEqual({'/sites/:site_id/stats/clients', '/sites/:site_id/stats/devices'}, resubscribed)
+
+        self.server.send({'event': 'data', 'channel': '/sites/:site_id/stats/clients', 'data': '{}'})
+        self.assertEqual({}, received.get(timeout=5)['data'])
+
+        stream.close()
+
+    def test_bad_frames(self):
+        '''Test that frames which aren't JSON objects are skipped
+        '''
+        stream = Stream(self.mist, channels=['/sites/:site_id/stats/devices'], url=self.server.url)
+        stream.start()
+        self.server.received.get(timeout=5)
+
+        self.server.send_raw('not json')
+        self.server.send_raw('[1, 2]')
+        self.server.send({'event': 'data', 'channel': '/sites/:site_id/stats/devices', 'data': '{}'})
+
+        self.assertEqual({}, next(iter(stream))['data'])
+        self.assertTrue(stream.connected.is_set())
+
+        stream.close()
+        self.assertEqual([], list(stream))
+
+
+if __name__ == '__main__':
+    unittest.main()
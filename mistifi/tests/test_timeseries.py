@@ -0,0 +1,97 @@
+import threading
+import unittest
+
+try:
+    import numpy as np
+    from ..timeseries import RingStore
+except ImportError:
+    np = None
+
+
+@unittest.skipIf(np is None, 'numpy not installed')
+class TestRingStore(unittest.TestCase):
+    '''Test class for the ring-buffer time-series store.
+    '''
+
+    def setUp(self):
+        self.store = RingStore(['rssi', 'tx_bytes'], retention=4)
+
+    def test_ring(self):
+        '''Test that only the newest samples are kept, in order
+        '''
+        for t in range(6):
+            self.store.ingest([{'mac': 'a', 'rssi': -40 - t, 'tx_bytes': t * 100}], timestamp=t)
+
+        timestamps, values = self.store.series('a')
+        self.assertEqual([2, 3, 4, 5], timestamps.tolist())
+        self.assertEqual([-42, -43, -44, -45], values[:, 0].tolist())
+        self.assertEqual([200, 300, 400, 500], self.store.series('a', 'tx_bytes')[1].tolist())
+        self.assertEqual({'a': -45}, self.store.latest('rssi'))
+
+    def test_counters(self):
+        '''Test that byte counters are stored exactly
+        '''
+        self.store.ingest([{'mac': 'a', 'tx_bytes': 1234567891}], timestamp=0)
+        self.store.ingest([{'mac': 'a', 'tx_bytes': 1234567950}], timestamp=1)
+
+        self.assertEqual([59], np.diff(self.store.series('a', 'tx_bytes')[1]).tolist())
+
+    def test_threads(self):
+        '''Test ingesting from several threads at once
+        '''
+        store = RingStore(['rssi'], retention=1000)
+
+        def ingest(n):
+            for t in range(200):
+                store.ingest([{'mac': f'{n}-{i}', 'rssi': -40} for i in range(20)], timestamp=t)
+
+        threads = [threading.Thread(target=ingest, args=(n,)) for n in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(80, len(store))
+        for entity in store.entities():
+            self.assertEqual(200, len(store.series(entity)[0]))
+
+    def test_missing_fields(self):
+        '''Test that missing and not numeric values are NaN
+        '''
+        self.store.ingest([{'mac': 'a', 'rssi': 'n/a'}, {'rssi': -40}], timestamp=0)
+
+        self.assertEqual(['a'], self.store.entities())
+        self.assertTrue(np.isnan(self.store.series('a')[1]).all())
+
+    def test_rollup(self):
+        '''Test min/max/mean per window, ignoring NaNs
+        '''
+        store = RingStore(['rssi'], retention=10)
+        for t, rssi in [(0, -40), (10, -50), (20, None), (30, -60), (40, -70), (50, None)]:
+            store.add('a', t, {'rssi': rssi})
+
+        rollup = store.rollup('a', 30, 'rssi')
+
+        self.assertEqual([0, 30], rollup['start'].tolist())
+        self.assertEqual([-50, -70], rollup['min'].tolist())
+        self.assertEqual([-40, -60], rollup['max'].tolist())
+        self.assertEqual([-45, -65], rollup['mean'].tolist())
+        self.assertEqual([2, 2], rollup['count'].tolist())
+
+        # All the fields when none is given
+        self.assertEqual((2, 1), store.rollup('a', 30)['mean'].shape)
+
+    def test_max_entities(self):
+        '''Test that the least recently updated entities are dropped
+        '''
+        store = RingStore(['rssi'], max_entities=2)
+        store.add('a', 0, {'rssi': -40})
+        store.add('b', 0, {'rssi': -40})
+        store.add('a', 1, {'rssi': -40})
+        store.add('c', 1, {'rssi': -40})
+
+        self.assertEqual(['a', 'c'], sorted(store.entities()))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,66 @@
+import unittest
+
+from .. import transport
+from ..mistifi import MistiFi
+from ..mockserver import MockData, MockMist
+
+
+class TestTransport(unittest.TestCase):
+    '''Test class for the shared transport registry.
+    '''
+
+    def setUp(self):
+        self.mock = MockMist(data=MockData(sites=1, devices_per_site=1, clients_per_site=1, events=0)).start()
+        self.org_id = self.mock.data.org['id']
+
+    def tearDown(self):
+        transport.clear()
+        self.mock.stop()
+
+    def _client(self, **kwargs):
+        mist = MistiFi(base_url=self.mock.url, **kwargs)
+        mist.comms()
+        return mist
+
+    def test_shared(self):
+        '''Test that instances share one pool and keep their own auth
+        '''
+        clients = [self._client(token='mocktoken', shared_transport=True) for _ in range(10)]
+        clients.append(self._client(username='user@mistifi.com', password='mockpass', shared_transport=True))
+
+        for mist in clients:
+            self.assertEqual(self.mock.data.org, mist.resource('GET', org_id=self.org_id))
+
+        adapters = {id(mist.session.get_adapter(self.mock.url)) for mist in clients}
+        self.assertEqual(1, len(adapters))
+
+        stats = transport.stats()[self.mock.url.rstrip('/')]
+        self.assertEqual(11, stats['clients'])
+        self.assertEqual(1, stats['connections'])
+
+        self.assertNotIn('sessionid', clients[0].session.cookies)
+        self.assertIn('sessionid', clients[-1].session.cookies)
+
+        # Calling comms() again doesn't count an instance twice
+        clients[0].comms()
+        self.assertEqual(11, transport.stats()[self.mock.url.rstrip('/')]['clients'])
+
+        clients[-1].logout()
+        self.assertEqual(10, transport.stats()[self.mock.url.rstrip('/')]['clients'])
+
+        # Closing a session leaves the shared pool open
+        clients[0].session.close()
+        self.assertEqual(self.mock.data.org, clients[1].resource('GET', org_id=self.org_id))
+
+    def test_not_shared(self):
+        '''Test that instances have their own pool by default
+        '''
+        first = self._client(token='mocktoken')
+        second = self._client(token='mocktoken')
+
+        self.assertIsNot(first.session.get_adapter(self.mock.url), second.session.get_adapter(self.mock.url))
+        self.assertEqual({}, transport.stats())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,137 @@
+import hashlib
+import hmac
+import json
+import requests
+import threading
+import time
+import unittest
+
+from ..webhook import WebhookReceiver
+
+SECRET = b'thesecret'
+
+
+def _post(url, payload, secret=SECRET, header='X-Mist-Signature-v2'):
+    body = json.dumps(payload).encode()
+    digest = hashlib.sha256 if header == 'X-Mist-Signature-v2' else hashlib.sha1
+    headers = {header: hmac.new(secret, body, digest).hexdigest()}
+    return requests.post(url, data=body, headers=headers)
+
+
+class TestWebhookReceiver(unittest.TestCase):
+    '''Test class for the webhook receiver.
+    '''
+
+    def setUp(self):
+        self.receiver = WebhookReceiver(
+            secret=SECRET, host='127.0.0.1', port=0, path='/mist',
+            batch_size=3, flush_interval=0.1)
+        self.receiver.start()
+        self.url = f'http://127.0.0.1:{self.receiver.port}/mist'
+
+    def tearDown(self):
+        self.receiver.stop()
+
+    def test_batching(self):
+        '''Test that events are batched per topic
+        '''
+        events = [{'type': 'AP_CONNECTED', 'mac': f'5c5b3500000{i}'} for i in range(4)]
+
+        self.assertEqual(200, _post(self.url, {'topic': 'device-events', 'events': events}).status_code)
+        self.assertEqual(200, _post(self.url, {'topic': 'alarms', 'events': [{'id': 1}]},
+                                    header='X-Mist-Signature').status_code)
+
+        batches = [self.receiver.batches.get(timeout=5) for _ in range(3)]
+
+        self.assertIn(('device-events', events[:3]), batches)
+        self.assertIn(('device-events', events[3:]), batches)
+        self.assertIn(('alarms', [{'id': 1}]), batches)
+        self.assertEqual(5, self.receiver.stats['received'])
+
+    def test_age_after_size_flush(self):
+        '''Test that the events left by a size flush wait for a full interval
+        '''
+        self.receiver.flush_interval = 0.5
+        events = [{'id': i} for i in range(4)]
+
+        _post(self.url, {'topic': 'alarms', 'events': events[:1]})
+        time.sleep(0.3)
+        _post(self.url, {'topic': 'alarms', 'events': events[1:]})
+
+        self.assertEqual(('alarms', events[:3]), self.receiver.batches.get(timeout=5))
+        flushed = time.monotonic()
+        self.assertEqual(('alarms', events[3:]), self.receiver.batches.get(timeout=5))
+        self.assertGreater(time.monotonic() - flushed, 0.3)
+
+    def test_rejected(self):
+        '''Test that bad signatures, payloads and paths are rejected
+        '''
+        payload = {'topic': 'alarms', 'events': [{'id': 1}]}
+
+        self.assertEqual(401, _post(self.url, payload, secret=b'wrong').status_code)
+        self.assertEqual(401, requests.post(self.url, json=payload).status_code)
+        self.assertEqual(404, _post(self.url.replace('/mist', '/other'), payload).status_code)
+
+        body = b'not json'
+        signature = hmac.new(SECRET, body, hashlib.sha256).hexdigest()
+        self.assertEqual(
+            400, requests.post(self.url, data=body, headers={'X-Mist-Signature-v2': signature}).status_code)
+
+        self.assertEqual(3, self.receiver.stats['rejected'])
+        self.assertTrue(self.receiver.batches.empty())
+
+
+class TestWebhookBackpressure(unittest.TestCase):
+    '''Test class for the webhook receiver backpressure.
+    '''
+
+    def test_full_queue(self):
+        '''Test that deliveries are refused with 503 when the queue is full
+        '''
+        receiver = WebhookReceiver(host='127.0.0.1', port=0, maxsize=1)
+
+        # Serve without the batching thread so nothing is consumed
+        thread = threading.Thread(target=receiver.server.serve_forever, daemon=True)
+        thread.start()
+
+        url = f'http://127.0.0.1:{receiver.port}/'
+        payload = {'topic': 'alarms', 'events': [{'id': 1}]}
+
+        self.assertEqual(200, requests.post(url, json=payload).status_code)
+        self.assertEqual(503, requests.post(url, json=payload).status_code)
+        self.assertEqual(1, receiver.stats['throttled'])
+
+        receiver.server.shutdown()
+        receiver.server.server_close()
+
+    def test_stop_full_batches(self):
+        '''Test that stop() returns when nobody consumes the batches
+        '''
+        receiver = WebhookReceiver(host='127.0.0.1', port=0, maxsize=1, batch_size=1)
+        receiver.start()
+
+        url = f'http://127.0.0.1:{receiver.port}/'
+        for i in range(2):
+            self.assertEqual(200, requests.post(url, json={'topic': 'alarms', 'events': [{'id': i}]}).status_code)
+
+        stop = threading.Thread(target=receiver.stop, daemon=True)
+        stop.start()
+        stop.join(timeout=5)
+
+        self.assertFalse(stop.is_alive())
+        self.assertEqual(('alarms', [{'id': 0}]), receiver.batches.get_nowait())
+
+    def test_stop_not_started(self):
+        '''Test that stop() returns on a receiver which was never started
+        '''
+        receiver = WebhookReceiver(host='127.0.0.1', port=0)
+
+        stop = threading.Thread(target=receiver.stop, daemon=True)
+        stop.start()
+        stop.join(timeout=5)
+
+        self.assertFalse(stop.is_alive())
+
+
+if __name__ == '__main__':
+    unittest.main()
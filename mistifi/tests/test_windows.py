@@ -0,0 +1,71 @@
+import json
+import responses
+import unittest
+
+from urllib.parse import parse_qs, urlparse
+
+from ..mistifi import MistiFi
+from ..windows import search
+from .test_data.test_data import *
+
+API_URL = 'https://api.mist.com/api/v1'
+SEARCH_URL = f'{API_URL}/orgs/{org_id}/clients/events/search'
+
+# One event every 10 seconds
+EVENTS = [{'timestamp': t, 'mac': '5c5b35000001'} for t in range(0, 1000, 10)]
+
+
+def _search(request):
+    '''Returns the events of the window, capped at the limit.
+    '''
+    query = parse_qs(urlparse(request.url).query)
+    start, end, limit = int(query['start'][0]), int(query['end'][0]), int(query['limit'][0])
+
+    results = [e for e in reversed(EVENTS) if start <= e['timestamp'] <= end][:limit]
+    return 200, {}, json.dumps({'results': results, 'limit': limit})
+
+
+class TestSearch(unittest.TestCase):
+    '''Test class for the time window splitting.
+    '''
+
+    def setUp(self):
+        self.mist = MistiFi(token='careparetoken')
+        self.mist.comms()
+
+    @responses.activate
+    def test_search(self):
+        '''Test that capped windows are split and results merged in order
+        '''
+        responses.add_callback(responses.GET, SEARCH_URL, callback=_search)
+
+        results = search(self.mist, 0, 1000, windows=2, limit=20, min_window=10,
+                         org_id=org_id, uri='clients/events/search')
+
+        self.assertEqual(EVENTS, results)
+
+        # 2 windows of 50 events split down to windows of at most 20
+        self.assertGreater(len(responses.calls), 2)
+
+    @responses.activate
+    def test_search_params(self):
+        '''Test that the params are sent with every window
+        '''
+        responses.add_callback(responses.GET, SEARCH_URL, callback=_search)
+
+        search(self.mist, 0, 100, windows=1, params={'type': 'CLIENT_AUTHORIZED'},
+               org_id=org_id, uri='clients/events/search')
+
+        self.assertIn('type=CLIENT_AUTHORIZED', responses.calls[0].request.url)
+
+    @responses.activate
+    def test_search_failure(self):
+        '''Test that None is returned if a window fails
+        '''
+        responses.add(responses.GET, SEARCH_URL, status=400, json={'detail': 'Bad request'})
+
+        self.assertIsNone(search(self.mist, 0, 1000, org_id=org_id, uri='clients/events/search'))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,254 @@
+import threading
+import time
+
+from ._log import logger
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+class _Series:
+    """Ring buffers of the timestamps and the numeric fields of one entity.
+    """
+    __slots__ = ('timestamps', 'values', 'head', 'count')
+
+    def __init__(self, retention, nfields, dtype):
+        self.timestamps = np.zeros(retention, dtype='float64')
+        self.values = np.full((retention, nfields), np.nan, dtype=dtype)
+        self.head = 0
+        self.count = 0
+
+    def ordered(self):
+        """Indexes of the stored samples from the oldest to the newest.
+        """
+        size = len(self.timestamps)
+        if self.count < size:
+            return np.arange(self.count)
+        return (np.arange(size) + self.head) % size
+
+
+class RingStore:
+    """In-memory store for the numeric stats of polled entities.
+
+    Every entity (an AP, a client, ...) gets fixed size NumPy ring buffers,
+    one column per field, so memory is capped by `retention` samples per
+    entity and old samples are overwritten. Rollups per time window are
+    computed on the arrays. Safe to feed from several `Poller` workers at
+    once. Needs `numpy`.
+
+    Parameters
+    ----------
+    fields: `list`
+        The numeric fields to keep, e.g. ['rssi', 'tx_bytes', 'rx_bytes'].
+
+    retention: `int`, optional, default: 1440
+        Number of samples kept per entity.
+
+    key: `str`, optional, default: 'mac'
+        The field identifying an entity in the polled records.
+
+    time_field: `str`, optional, default: None
+        The field with the sample time in the records, the time of the
+        ingest is used if not set or missing.
+
+    max_entities: `int`, optional, default: None
+        If set, the entities not updated for the longest are dropped to
+        stay within this number.
+
+    dtype: `str`, optional, default: 'float64'
+        The NumPy type of the values. 'float32' halves the memory but only
+        holds integers up to 2**24 exactly, too few for byte counters.
+
+    Examples:
+    ---------
+    >>> store = RingStore(["rssi", "tx_bytes", "rx_bytes"], retention=2880)
+    >>> poller.add("clients", 30, callback=store.callback, site_id=":site_id", uri="stats/clients")
+    >>> store.rollup("5c5b35000001", 300, "rssi")
+    """
+    def __init__(self, fields, retention=1440, key='mac', time_field=None, max_entities=None, dtype='float64'):
+
+        if np is None:
+            raise ImportError("RingStore needs 'numpy', install it with 'pip install numpy'")
+
+        self.fields = list(fields)
+        self.retention = retention
+        self.key = key
+        self.time_field = time_field
+        self.max_entities = max_entities
+        self.dtype = dtype
+
+        self._columns = {field: i for i, field in enumerate(self.fields)}
+
+        # Insertion ordered, moved to the end on update for the eviction
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._series)
+
+    def __contains__(self, entity):
+        return entity in self._series
+
+    def entities(self):
+        """The keys of the stored entities.
+        """
+        with self._lock:
+            return list(self._series)
+
+    def add(self, entity, timestamp, record):
+        """Stores one sample of an entity.
+
+        Args
+        ----
+        entity: `str`
+            The entity key
+        timestamp: `float`
+            The sample time as a UNIX timestamp
+        record: `dict`
+            The sample, fields missing or not numeric are stored as NaN
+        """
+        with self._lock:
+            self._add(entity, timestamp, record)
+
+    def _add(self, entity, timestamp, record):
+        series = self._series.pop(entity, None)
+        if series is None:
+            series = _Series(self.retention, len(self.fields), self.dtype)
+            if self.max_entities is not None and len(self._series) >= self.max_entities:
+                del self._series[next(iter(self._series))]
+        self._series[entity] = series
+
+        row = series.values[series.head]
+        for field, i in self._columns.items():
+            value = record.get(field)
+            row[i] = value if isinstance(value, (int, float)) else np.nan
+
+        series.timestamps[series.head] = timestamp
+        series.head = (series.head + 1) % self.retention
+        series.count = min(series.count + 1, self.retention)
+
+    def ingest(self, records, timestamp=None):
+        """Stores a sample for every record of a polled response.
+
+        Args
+        ----
+        records: `list`
+            The records as returned by `resource()`
+        timestamp: `float`, optional
+            The sample time, now if not provided and not in the records
+
+        Returns
+        -------
+        The number of records stored
+        """
+        now = timestamp if timestamp is not None else time.time()
+
+        count = 0
+        with self._lock:
+            for record in records:
+                entity = record.get(self.key)
+                if entity is None:
+                    continue
+                ts = record.get(self.time_field, now) if self.time_field else now
+                self._add(entity, ts, record)
+                count += 1
+
+        logger.debug(f'Ingested {count} records')
+
+        return count
+
+    def callback(self, name, resp):
+        """`Poller` callback storing the polled records.
+        """
+        self.ingest(resp if isinstance(resp, list) else [resp])
+
+    def series(self, entity, field=None):
+        """The samples of an entity from the oldest to the newest.
+
+        Args
+        ----
+        entity: `str`
+            The entity key
+        field: `str`, optional
+            Return only this field
+
+        Returns
+        -------
+        A tuple of the timestamps array and the values array, one column
+        per field or a single column if `field` is set
+        """
+        with self._lock:
+            series = self._series[entity]
+            order = series.ordered()
+            # Fancy indexing copies, later samples don't change the result
+            values = series.values[order]
+            timestamps = series.timestamps[order]
+
+        if field is not None:
+            values = values[:, self._columns[field]]
+
+        return timestamps, values
+
+    def latest(self, field):
+        """The newest value of a field for every entity.
+
+        Returns
+        -------
+        A dict of entity to value
+        """
+        i = self._columns[field]
+        with self._lock:
+            return {
+                entity: float(series.values[(series.head - 1) % self.retention, i])
+                for entity, series in self._series.items()
+            }
+
+    def rollup(self, entity, window, field=None):
+        """Downsamples the samples of an entity to fixed time windows.
+
+        NaNs are ignored, a window with only NaNs gives NaN.
+
+        Args
+        ----
+        entity: `str`
+            The entity key
+        window: `float`
+            The window length in seconds, windows are aligned to the epoch
+        field: `str`, optional
+            Roll up only this field
+
+        Returns
+        -------
+        A dict with the window ``start`` times and the ``min``, ``max``,
+        ``mean`` and ``count`` arrays, one row per window
+        """
+        timestamps, values = self.series(entity, field)
+
+        if len(timestamps) == 0:
+            empty = np.empty((0,) + values.shape[1:])
+            return {'start': np.empty(0), 'min': empty, 'max': empty, 'mean': empty, 'count': empty}
+
+        # Sorted so that every window is a contiguous run of samples
+        order = np.argsort(timestamps, kind='stable')
+        timestamps = timestamps[order]
+        values = values[order].astype('float64')
+
+        bins = np.floor(timestamps / window)
+        starts = np.flatnonzero(np.r_[True, bins[1:] != bins[:-1]])
+
+        valid = ~np.isnan(values)
+        count = np.add.reduceat(valid, starts, axis=0)
+        total = np.add.reduceat(np.where(valid, values, 0), starts, axis=0)
+
+        with np.errstate(invalid='ignore', divide='ignore'):
+            mean = total / count
+
+        return {
+            'start': bins[starts] * window,
+            'min': np.fmin.reduceat(values, starts, axis=0),
+            'max': np.fmax.reduceat(values, starts, axis=0),
+            'mean': mean,
+            'count': count,
+        }
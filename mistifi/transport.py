@@ -0,0 +1,131 @@
+import threading
+import weakref
+
+from urllib.parse import urlparse
+
+from ._log import logger
+
+
+# Shared adapters per 'scheme://host:port'
+_adapters = {}
+_lock = threading.Lock()
+
+
+def _key(url):
+    url = urlparse(url)
+    port = url.port or (443 if url.scheme == 'https' else 80)
+    return f'{url.scheme}://{url.hostname}:{port}'
+
+
+def adapter(url, max_retries=None, pool_maxsize=32, client=None):
+    """Returns the connection pool shared by all the instances talking to a cloud.
+
+    `MistiFi` instances created with ``shared_transport=True`` mount this
+    adapter on their session. The session keeps the auth state (token
+    header, cookies and CSRF token) of the instance, while the sockets and
+    TLS connections to the host are reused across all of them.
+
+    The adapter is created by the first caller for a host, later callers
+    get it with the settings of the first one.
+
+    Args
+    ----
+    url: `str`
+        Base URL of the cloud, e.g. 'https://api.mist.com/'
+    max_retries: `urllib3.util.retry.Retry`, optional
+        The retry strategy
+    pool_maxsize: `int`, default 32
+        Maximum number of connections kept open to the host
+    client: `object`, optional
+        The instance using the adapter, counted once in `stats()` until
+        `release()` or until it is garbage collected
+
+    Returns
+    -------
+    A `requests.adapters.HTTPAdapter`
+    """
+    key = _key(url)
+
+    with _lock:
+        shared = _adapters.get(key)
+        if shared is None:
+            logger.debug(f'New shared transport for {key}')
+            shared = _new_adapter(max_retries, pool_maxsize)
+            _adapters[key] = shared
+        if client is not None:
+            shared.clients.add(client)
+
+    return shared
+
+
+def release(url, client):
+    """Stops counting `client` as a user of the transport of `url`.
+    """
+    with _lock:
+        shared = _adapters.get(_key(url))
+        if shared is not None:
+            shared.clients.discard(client)
+
+
+def stats():
+    """Connection pool usage per host.
+
+    Returns
+    -------
+    A dict per host with the number of `clients` using the transport and
+    the `connections` it opened and has `idle`
+    """
+    with _lock:
+        adapters = dict(_adapters)
+
+    result = {}
+    for key, shared in adapters.items():
+        connections = idle = 0
+        for pool_key in shared.poolmanager.pools.keys():
+            pool = shared.poolmanager.pools.get(pool_key)
+            if pool is None:
+                continue
+            connections += pool.num_connections
+            idle += pool.pool.qsize() if pool.pool is not None else 0
+        result[key] = {'clients': len(shared.clients), 'connections': connections, 'idle': idle}
+
+    return result
+
+
+def clear():
+    """Closes all the shared connection pools.
+
+    Instances that still use them open new connections when needed.
+    """
+    with _lock:
+        adapters = list(_adapters.values())
+        _adapters.clear()
+
+    for shared in adapters:
+        shared.close_pools()
+
+
+def _new_adapter(max_retries, pool_maxsize):
+    """Builds an `HTTPAdapter` which outlives the sessions it is mounted on.
+
+    requests is imported here, so that importing this module doesn't.
+    """
+    from requests.adapters import HTTPAdapter
+
+    class SharedHTTPAdapter(HTTPAdapter):
+
+        def close(self):
+            # Called by Session.close(), the pools belong to the registry
+            pass
+
+        def close_pools(self):
+            super().close()
+
+    kwargs = {'pool_connections': 1, 'pool_maxsize': pool_maxsize}
+    if max_retries is not None:
+        kwargs['max_retries'] = max_retries
+
+    shared = SharedHTTPAdapter(**kwargs)
+    shared.clients = weakref.WeakSet()
+
+    return shared
@@ -0,0 +1,281 @@
+import hashlib
+import hmac
+import queue
+import threading
+import time
+
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from ._log import logger
+
+from . import codec
+
+
+class _WebhookHandler(BaseHTTPRequestHandler):
+    """Request handler, `receiver` is set on the subclass made per receiver.
+    """
+    # Keep-alive, so Mist can reuse the connection between deliveries
+    protocol_version = 'HTTP/1.1'
+
+    receiver = None
+
+    def do_POST(self):
+        receiver = self.receiver
+
+        if self.path.split('?', 1)[0] != receiver.path:
+            return self._reply(404)
+
+        length = int(self.headers.get('Content-Length') or 0)
+        body = self.rfile.read(length)
+
+        if not receiver.verify(body, self.headers):
+            receiver.count('rejected')
+            logger.error(f'Webhook signature mismatch from {self.client_address[0]}')
+            return self._reply(401)
+
+        try:
+            payload = codec.loads(body)
+            topic = payload['topic']
+            events = payload.get('events') or []
+        except (ValueError, KeyError, TypeError):
+            receiver.count('rejected')
+            logger.error('Not a valid webhook payload')
+            return self._reply(400)
+
+        # Backpressure, a full queue makes Mist retry the delivery later
+        if not receiver.put(topic, events):
+            receiver.count('throttled')
+            return self._reply(503)
+
+        self._reply(200)
+
+    def _reply(self, code):
+        self.send_response(code)
+        self.send_header('Content-Length', '0')
+        self.end_headers()
+
+    def log_message(self, format, *args):
+        logger.debug(format % args)
+
+
+class WebhookReceiver:
+    """Receiving side for the Mist webhooks.
+
+    Verifies the webhook secret, decodes the payloads with the same codec as
+    `MistiFi` and batches the events per topic. A batch is handed over once
+    it holds `batch_size` events or is `flush_interval` seconds old, either
+    to the `on_batch` callback or into the `batches` queue.
+
+    Incoming events are buffered in a bounded queue. When the consumer can't
+    keep up and the queue is full, deliveries are answered with 503 so that
+    the Mist cloud retries them later instead of the receiver running out of
+    memory.
+
+    Parameters
+    ----------
+    secret: `str`, optional
+        The secret set on the webhook. If not set signatures are not checked.
+
+    on_batch: `callable`, optional
+        Called as ``on_batch(topic, events)`` from the batching thread.
+        If not provided the ``(topic, events)`` tuples go to `batches`.
+
+    host: `str`, optional, default: '0.0.0.0'
+        Address to listen on.
+
+    port: `int`, optional, default: 8080
+        Port to listen on, 0 picks a free one.
+
+    path: `str`, optional, default: '/'
+        The URL path the webhook is configured with.
+
+    batch_size: `int`, optional, default: 500
+        Maximum number of events in a batch.
+
+    flush_interval: `float`, optional, default: 1
+        Maximum age of a batch in seconds.
+
+    maxsize: `int`, optional, default: 10000
+        Maximum number of deliveries waiting to be batched.
+
+    Examples:
+    ---------
+    >>> def consume(topic, events):
+    ...     print(topic, len(events))
+    >>> receiver = WebhookReceiver(secret="thesecret", on_batch=consume, port=8080)
+    >>> receiver.serve_forever()
+    """
+    def __init__(self, secret=None, on_batch=None, host='0.0.0.0', port=8080, path='/',
+                 batch_size=500, flush_interval=1, maxsize=10000):
+
+        self.secret = secret.encode() if isinstance(secret, str) else secret
+        self.on_batch = on_batch
+        self.path = path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+
+        self.batches = queue.Queue(maxsize=maxsize)
+        self.stats = {'received': 0, 'rejected': 0, 'throttled': 0, 'batches': 0}
+
+        self._incoming = queue.Queue(maxsize=maxsize)
+        self._stop = threading.Event()
+        # The stats are updated from the handler threads
+        self._lock = threading.Lock()
+
+        handler = type('WebhookHandler', (_WebhookHandler,), {'receiver': self})
+        self.server = ThreadingHTTPServer((host, port), handler)
+        self.server.daemon_threads = True
+        self.port = self.server.server_address[1]
+
+        self._batcher = None
+        self._thread = None
+        # shutdown() waits for serve_forever() to return, it must only be
+        # called once it was started
+        self._serving = False
+
+    def verify(self, body, headers):
+        """Checks the HMAC signature of a delivery.
+
+        Mist signs the body with the secret in ``X-Mist-Signature-v2``
+        (SHA256), and in ``X-Mist-Signature`` (SHA1) for older webhooks.
+
+        Returns
+        -------
+        True if there is no secret or the signature matches
+        """
+        if not self.secret:
+            return True
+
+        signature = headers.get('X-Mist-Signature-v2')
+        digest = hashlib.sha256
+        if signature is None:
+            signature = headers.get('X-Mist-Signature')
+            digest = hashlib.sha1
+        if signature is None:
+            return False
+
+        expected = hmac.new(self.secret, body, digest).hexdigest()
+
+        return hmac.compare_digest(expected, signature)
+
+    def count(self, stat, n=1):
+        """Adds `n` to one of the `stats`.
+        """
+        with self._lock:
+            self.stats[stat] += n
+
+    def put(self, topic, events, timeout=1):
+        """Queues the events of one delivery for batching.
+
+        Returns
+        -------
+        False if the queue stayed full for `timeout` seconds
+        """
+        try:
+            self._incoming.put((topic, events), timeout=timeout)
+        except queue.Full:
+            logger.error('Webhook queue full, delivery refused')
+            return False
+
+        self.count('received', len(events))
+
+        return True
+
+    def start(self):
+        """Starts the server and the batching in background threads.
+        """
+        logger.info('Calling start()')
+
+        self._start_batcher()
+        self._serving = True
+        self._thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self._thread.start()
+
+    def serve_forever(self):
+        """Runs the server in the calling thread until `stop()` is called.
+        """
+        logger.info('Calling serve_forever()')
+
+        self._start_batcher()
+        self._serving = True
+        self.server.serve_forever()
+
+    def stop(self):
+        """Stops the server and hands over all the pending events.
+        """
+        logger.info('Calling stop()')
+
+        if self._serving:
+            self.server.shutdown()
+            self._serving = False
+        self.server.server_close()
+
+        self._stop.set()
+        if self._batcher is not None:
+            self._batcher.join()
+            self._batcher = None
+
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _start_batcher(self):
+        self._stop.clear()
+        self._batcher = threading.Thread(target=self._batch, daemon=True)
+        self._batcher.start()
+
+    def _batch(self):
+        pending = {}
+        started = {}
+
+        while True:
+            # Wake up in time to flush the oldest batch
+            timeout = self.flush_interval
+            if started:
+                timeout = max(0, min(started.values()) + self.flush_interval - time.monotonic())
+
+            try:
+                topic, events = self._incoming.get(timeout=timeout)
+            except queue.Empty:
+                if self._stop.is_set():
+                    break
+            else:
+                batch = pending.setdefault(topic, [])
+                started.setdefault(topic, time.monotonic())
+                batch.extend(events)
+
+                while len(batch) >= self.batch_size:
+                    self._flush(topic, batch[:self.batch_size])
+                    del batch[:self.batch_size]
+                    # What is left starts a new batch
+                    started[topic] = time.monotonic()
+
+            now = time.monotonic()
+            for topic in [t for t, s in started.items() if now - s >= self.flush_interval]:
+                if pending[topic]:
+                    self._flush(topic, pending[topic])
+                del pending[topic]
+                del started[topic]
+
+        for topic, batch in pending.items():
+            if batch:
+                self._flush(topic, batch)
+
+    def _flush(self, topic, events):
+        self.count('batches')
+
+        if self.on_batch is None:
+            # Waits for the consumer, but not forever once stopping
+            while True:
+                try:
+                    self.batches.put((topic, events), timeout=0.5)
+                    return
+                except queue.Full:
+                    if self._stop.is_set():
+                        logger.error(f'Batches queue full on stop, {len(events)} {topic} events dropped')
+                        return
+
+        try:
+            self.on_batch(topic, events)
+        except Exception:
+            logger.exception(f'on_batch failed for topic {topic}')
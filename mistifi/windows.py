@@ -0,0 +1,113 @@
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from ._log import logger
+
+from . import deadline as _deadline
+
+
+def _results(jresp):
+    """The list of results of a search response.
+    """
+    if isinstance(jresp, dict):
+        return jresp.get('results') or []
+    return jresp or []
+
+
+def search(mist, start, end, windows=4, limit=1000, max_workers=4, min_window=60,
+           time_field='timestamp', **kwargs):
+    """Pulls a time range from a search or events endpoint in parallel windows.
+
+    The range is split into `windows` sub-windows which are requested at the
+    same time. A window that comes back with `limit` results has probably
+    been capped by the cloud, so it is split in half and both halves are
+    requested again, down to `min_window` seconds.
+
+    Args
+    ----
+    mist: `MistiFi`
+        An instance on which `comms()` has already been called
+    start: `int`
+        Start of the range as a UNIX timestamp
+    end: `int`
+        End of the range as a UNIX timestamp
+    windows: `int`, default 4
+        Number of windows the range is split into to begin with
+    limit: `int`, default 1000
+        Maximum number of results asked for per window
+    max_workers: `int`, default 4
+        Maximum number of calls running at the same time
+    min_window: `int`, default 60
+        Windows this short or shorter are not split any more
+    time_field: `str`, default 'timestamp'
+        The field the results are ordered by
+
+    Keyword Args
+    ------------
+    Passed to `resource()`, e.g. ``org_id`` and ``uri``. Any `params`
+    are sent with every window. A `deadline` is shared by all the windows.
+
+    Returns
+    -------
+    The results of all the windows ordered by `time_field`, or None if
+    any of the calls failed
+
+    Examples:
+    ---------
+    >>> events = search(mist, start, end, org_id=":org_id", uri="clients/events/search")
+    """
+    logger.info('Calling search()')
+
+    params = dict(kwargs.pop('params', {}))
+    params['limit'] = limit
+
+    deadline = _deadline.earliest(kwargs.pop('deadline', None))
+
+    def fetch(window):
+        w_start, w_end = window
+        with _deadline.scope(deadline):
+            jresp = mist.resource('GET', params={**params, 'start': w_start, 'end': w_end}, **kwargs)
+        return None if jresp is None else _results(jresp)
+
+    step = (end - start) / windows
+    bounds = [start + round(i * step) for i in range(windows)] + [end]
+    pending_windows = [(bounds[i], bounds[i + 1]) for i in range(windows) if bounds[i] < bounds[i + 1]]
+
+    done_windows = {}
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        pending = {executor.submit(fetch, w): w for w in pending_windows}
+
+        while pending:
+            finished, _ = wait(pending, return_when=FIRST_COMPLETED)
+
+            for future in finished:
+                window = pending.pop(future)
+                results = future.result()
+
+                if results is None:
+                    logger.error(f'Window {window} failed')
+                    for f in pending:
+                        f.cancel()
+                    return
+
+                w_start, w_end = window
+                if len(results) >= limit:
+                    if w_end - w_start > min_window:
+                        middle = w_start + (w_end - w_start) // 2
+                        logger.debug(f'Window {window} capped, splitting at {middle}')
+                        for half in ((w_start, middle), (middle, w_end)):
+                            pending[executor.submit(fetch, half)] = half
+                        continue
+                    logger.error(f'Window {window} capped at {limit} results, results are incomplete')
+
+                done_windows[window] = results
+
+    # Windows share their boundaries, a result on the boundary is kept
+    # only in the later window
+    merged = []
+    for w_start, w_end in sorted(done_windows):
+        results = done_windows[(w_start, w_end)]
+        if w_end != end:
+            results = [r for r in results if r.get(time_field, w_start) < w_end]
+        merged.extend(sorted(results, key=lambda r: r.get(time_field, 0)))
+
+    return merged
@@ -26,6 +26,12 @@ setup(
         'requests',
         'logzero',
     ],
+    extras_require       = {
+        'stream': ['websocket-client'],
+        'parquet': ['pyarrow'],
+        'frames': ['pyarrow', 'pandas'],
+        'timeseries': ['numpy'],
+    },
     tests_require        = [
         'responses',
         'pytest',